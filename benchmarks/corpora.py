@@ -0,0 +1,177 @@
+"""
+Synthetic inputs for the benchmarks: scripts of different shapes,
+notebooks with large outputs and projects with deep local import graphs.
+Everything is generated from fixed seeds, so a corpus is the same on
+every machine and in every run.
+"""
+
+import base64
+import json
+import random
+from pathlib import Path
+
+# import names; several differ from their distribution name (yaml, sklearn, PIL)
+THIRD_PARTY = [
+    "numpy",
+    "pandas",
+    "requests",
+    "yaml",
+    "rich",
+    "sklearn",
+    "matplotlib",
+    "PIL",
+    "bs4",
+    "dateutil",
+    "scipy",
+    "attr",
+]
+STDLIB = ["os", "sys", "json", "re", "itertools", "functools", "pathlib", "typing"]
+
+
+def _imports(rng: random.Random, n: int) -> list[str]:
+    lines = []
+    for _ in range(n):
+        name = rng.choice(THIRD_PARTY + STDLIB)
+        if rng.random() < 0.3:
+            lines.append(f"from {name} import something_{rng.randrange(100)}")
+        else:
+            lines.append(f"import {name}")
+    return lines
+
+
+def _function(rng: random.Random, i: int, body_lines: int = 8) -> list[str]:
+    lines = [f"def function_{i}(a, b=None):"]
+    for j in range(body_lines):
+        lines.append(f"    value_{j} = a * {rng.randrange(1000)} + len(str(b))")
+    if rng.random() < 0.1:
+        lines.append(f"    import {rng.choice(THIRD_PARTY)}  # lazy import")
+    lines.append("    return a")
+    lines.append("")
+    return lines
+
+
+def small_script(folder: Path, seed: int = 1) -> Path:
+    """A typical 40-line script."""
+    rng = random.Random(seed)
+    lines = ["# smartrun: rich>=13", *_imports(rng, 6), ""]
+    for i in range(3):
+        lines += _function(rng, i)
+    path = Path(folder) / "small.py"
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return path
+
+
+def huge_script(folder: Path, functions: int = 2000, seed: int = 2) -> Path:
+    """~20k lines: imports at the top and, lazily, inside functions."""
+    rng = random.Random(seed)
+    lines = _imports(rng, 40) + [""]
+    for i in range(functions):
+        lines += _function(rng, i)
+    path = Path(folder) / "huge.py"
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return path
+
+
+def docstring_heavy_script(folder: Path, blocks: int = 400, seed: int = 3) -> Path:
+    """
+    Long docstrings and comments that mention imports and smartrun
+    requirements: what the comment scanner has to read through.
+    """
+    rng = random.Random(seed)
+    lines = ['"""', "smartrun: pandas>=2 numpy", '"""', *_imports(rng, 10), ""]
+    for i in range(blocks):
+        lines.append(f"def documented_{i}():")
+        lines.append('    """')
+        for j in range(20):
+            lines.append(f"    Example {j}: import {rng.choice(THIRD_PARTY)} as shown here.")
+        lines.append('    """')
+        if i % 25 == 0:
+            name, requirement = rng.choice(THIRD_PARTY), rng.choice(THIRD_PARTY)
+            lines.append(f"    import {name}  # smartrun: {requirement}")
+        lines.append("    # a plain comment that names nothing useful")
+        lines.append("    return None")
+        lines.append("")
+    path = Path(folder) / "docstrings.py"
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return path
+
+
+def notebook(
+    folder: Path, cells: int = 200, output_kb: int = 64, seed: int = 4
+) -> Path:
+    """nbformat 4 notebook whose code cells carry large text and image outputs."""
+    rng = random.Random(seed)
+    image = base64.b64encode(rng.randbytes(output_kb * 1024)).decode()
+    text = "x" * 1024
+    nb_cells = []
+    for i in range(cells):
+        if i % 5 == 0:
+            nb_cells.append(
+                {"cell_type": "markdown", "metadata": {}, "source": [f"## Section {i}\n"]}
+            )
+            continue
+        source = [line + "\n" for line in _imports(rng, 2)] + [f"result_{i} = {i} * 2\n"]
+        outputs = [
+            {"output_type": "stream", "name": "stdout", "text": [text] * 8},
+            {
+                "output_type": "display_data",
+                "metadata": {},
+                "data": {"image/png": image, "text/plain": ["<Figure>"]},
+            },
+        ]
+        nb_cells.append(
+            {
+                "cell_type": "code",
+                "execution_count": i,
+                "metadata": {},
+                "source": source,
+                "outputs": outputs,
+            }
+        )
+    data = {
+        "cells": nb_cells,
+        "metadata": {"kernelspec": {"name": "python3", "display_name": "Python 3"}},
+        "nbformat": 4,
+        "nbformat_minor": 5,
+    }
+    path = Path(folder) / "big.ipynb"
+    path.write_text(json.dumps(data), encoding="utf-8")
+    return path
+
+
+def import_graph(folder: Path, depth: int = 200, fanout: int = 2, seed: int = 5) -> Path:
+    """
+    A project whose entry script reaches *depth* local modules: module i
+    imports the next *fanout* modules and a couple of third-party ones.
+    Returns the entry script.
+    """
+    rng = random.Random(seed)
+    folder = Path(folder) / "graph"
+    (folder / "pkg").mkdir(parents=True, exist_ok=True)
+    (folder / "pkg" / "__init__.py").write_text("", encoding="utf-8")
+    for i in range(depth):
+        lines = [f"from pkg import mod_{j}" for j in range(i + 1, min(i + 1 + fanout, depth))]
+        lines += _imports(rng, 2)
+        lines += _function(rng, i, body_lines=3)
+        content = "\n".join(lines) + "\n"
+        (folder / "pkg" / f"mod_{i}.py").write_text(content, encoding="utf-8")
+    entry = folder / "main.py"
+    entry.write_text("from pkg import mod_0\nimport rich\n", encoding="utf-8")
+    return entry
+
+
+def flat_project(folder: Path, modules: int = 500, seed: int = 6) -> Path:
+    """Many local modules and packages, some named like stdlib or installed ones."""
+    rng = random.Random(seed)
+    folder = Path(folder) / "flat"
+    folder.mkdir(parents=True, exist_ok=True)
+    shadowing = ["json", "typing", "random", "rich", "yaml", "test"]
+    for i in range(modules):
+        name = shadowing[i] if i < len(shadowing) else f"module_{i}"
+        if i % 10 == 0:
+            (folder / name).mkdir(exist_ok=True)
+            (folder / name / "__init__.py").write_text("", encoding="utf-8")
+        else:
+            content = "\n".join(_imports(rng, 3)) + "\n"
+            (folder / f"{name}.py").write_text(content, encoding="utf-8")
+    return folder
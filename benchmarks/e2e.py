@@ -0,0 +1,328 @@
+"""
+End-to-end install / run latency against a local package index
+(benchmarks/local_index.py): run_script, install_packages_smart on the uv
+and --no-uv paths, the JSON / TXT / YAML lock installers and
+write_lockfile, each in three scenarios:
+
+    cold   new environment, empty installer caches, no .smartrun state
+    warm   new environment; installer caches and .smartrun already filled
+    noop   everything already installed: what a repeated run costs
+
+    python -m benchmarks.e2e [--repeat 5] [--packages 10] [--size-kb 256]
+        [--filter NAME] [--scenario cold,warm,noop] [--json out.json] [--verbose]
+
+p50 / p90 are over the repeats of one driver and scenario. Environment
+creation is only timed where the driver does it itself (run_script).
+Drivers that need the uv binary are skipped when it is not installed.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import venv
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Optional
+
+from benchmarks.local_index import bench_packages, build_index, serve
+from smartrun.options import Options
+from smartrun.runner import install_packages_smart, run_script
+from smartrun.runner_helpers import create_venv
+from smartrun.satisfaction import check_satisfied_in_target
+from smartrun.utils import find_uv, get_bin_path, name_format_json, write_lockfile
+
+ROOT = Path(__file__).resolve().parent.parent
+SCENARIOS = ("cold", "warm", "noop")
+SCRIPT_NAME = "bench_script.py"
+# variables that would point the installers somewhere else than the local index
+CLEARED_ENV_VARS = (
+    "VIRTUAL_ENV",
+    "CONDA_DEFAULT_ENV",
+    "CONDA_PREFIX",
+    "PIP_FIND_LINKS",
+    "PIP_NO_INDEX",
+    "PIP_EXTRA_INDEX_URL",
+    "UV_DEFAULT_INDEX",
+    "UV_EXTRA_INDEX_URL",
+    "SMARTRUN_WHEELHOUSE",
+    "SMARTRUN_SHARED_ENV",
+    "SMARTRUN_NO_UV",
+)
+# the lock installers install into sys.executable: they run in the target env
+INSTALLER_MAIN = """
+import sys
+from smartrun.installers.from_json_fast import (
+    install_dependencies_from_json,
+    install_dependencies_from_txt,
+)
+from smartrun.installers.from_yaml import SmartRunYAMLHandler
+
+kind, path = sys.argv[1:]
+if kind == "json":
+    install_dependencies_from_json(path)
+elif kind == "txt":
+    install_dependencies_from_txt(path)
+else:
+    sys.exit(0 if SmartRunYAMLHandler().install_from_yaml(path) else 1)
+"""
+
+
+@dataclass
+class Bench:
+    root: Path
+    index_url: str
+    packages: list
+    uv: Optional[str] = None
+    verbose: bool = False
+
+    @property
+    def requirements(self) -> list:
+        """The packages a script imports: the ones nothing else requires."""
+        required = {r.split(">")[0] for p in self.packages for r in p.requires}
+        return [p.name for p in self.packages if p.name not in required]
+
+    @property
+    def pins(self) -> dict:
+        return {p.name: p.latest for p in self.packages}
+
+
+@dataclass
+class Driver:
+    name: str
+    run: Callable  # run(bench, workspace, env) -> bool, timed
+    env: Optional[str] = "venv"  # "venv", "site" (sees smartrun's deps) or None
+    prepare: Optional[Callable] = None  # prepare(bench, workspace, env), untimed
+    needs_uv: bool = False
+
+
+# ─────────────── drivers ────────────────
+def _options(bench: Bench, env: Path, no_uv: bool = None) -> Options:
+    no_uv = bench.uv is None if no_uv is None else no_uv
+    return Options(SCRIPT_NAME, venv=str(env), no_uv=no_uv)
+
+
+def _installed(bench: Bench, env: Path) -> bool:
+    opts = _options(bench, env)
+    return check_satisfied_in_target(opts, bench.requirements).all_satisfied
+
+
+def smart_install(no_uv: bool) -> Callable:
+    def run(bench: Bench, workspace: Path, env: Path) -> bool:
+        install_packages_smart(_options(bench, env, no_uv=no_uv), bench.requirements)
+        return _installed(bench, env)
+
+    return run
+
+
+def write_locks(bench: Bench, workspace: Path, env: Path) -> None:
+    (workspace / "lock.json").write_text(json.dumps({"resolved_packages": bench.pins}))
+    (workspace / "lock.txt").write_text("".join(f"{n}=={v}\n" for n, v in bench.pins.items()))
+    runtime = "".join(f"    {n}: '{v}'\n" for n, v in bench.pins.items())
+    (workspace / "lock.yaml").write_text(f"dependencies:\n  runtime:\n{runtime}")
+
+
+def lock_installer(kind: str) -> Callable:
+    def run(bench: Bench, workspace: Path, env: Path) -> bool:
+        cmd = [get_bin_path(env, "python"), "-c", INSTALLER_MAIN, kind, f"lock.{kind}"]
+        child_env = {**os.environ, "PYTHONPATH": str(ROOT), "VIRTUAL_ENV": str(env)}
+        out = None if bench.verbose else subprocess.DEVNULL
+        process = subprocess.run(cmd, env=child_env, stdout=out, stderr=out)
+        return process.returncode == 0 and _installed(bench, env)
+
+    return run
+
+
+def install_untimed(bench: Bench, workspace: Path, env: Path) -> None:
+    if not _installed(bench, env):
+        smart_install(bench.uv is None)(bench, workspace, env)
+
+
+def lockfile(bench: Bench, workspace: Path, env: Path) -> bool:
+    write_lockfile(SCRIPT_NAME, env)
+    return Path(name_format_json(SCRIPT_NAME)).exists()
+
+
+def write_script(bench: Bench, workspace: Path, env: Path) -> None:
+    modules = [p.module for p in bench.packages if p.name in bench.requirements]
+    lines = [f"import {m}" for m in modules] + [f"print({modules[0]}.__version__)"]
+    (workspace / SCRIPT_NAME).write_text("\n".join(lines) + "\n")
+
+
+def script_run(bench: Bench, workspace: Path, env: Path) -> bool:
+    result = run_script(_options(bench, env))
+    return bool(result and result.completed) and _installed(bench, env)
+
+
+DRIVERS = [
+    Driver("run_script", script_run, env=None, prepare=write_script),
+    Driver("install_packages_smart[uv]", smart_install(no_uv=False), needs_uv=True),
+    Driver("install_packages_smart[--no-uv]", smart_install(no_uv=True)),
+    Driver("from_json", lock_installer("json"), env="site", prepare=write_locks),
+    Driver("from_txt", lock_installer("txt"), env="site", prepare=write_locks, needs_uv=True),
+    Driver("from_yaml", lock_installer("yaml"), env="site", prepare=write_locks),
+    Driver("write_lockfile", lockfile, prepare=install_untimed),
+]
+
+
+# ─────────────── harness ────────────────
+@contextmanager
+def environment(bench: Bench, workspace: Path, cache: Path):
+    """cwd and installer settings of one sample; restored afterwards."""
+    saved_env, saved_cwd = dict(os.environ), os.getcwd()
+    for name in CLEARED_ENV_VARS:
+        os.environ.pop(name, None)
+    os.environ.update(
+        {
+            "PIP_INDEX_URL": bench.index_url,
+            "UV_INDEX_URL": bench.index_url,
+            "PIP_CACHE_DIR": str(cache / "pip"),
+            "UV_CACHE_DIR": str(cache / "uv"),
+            "PIP_DISABLE_PIP_VERSION_CHECK": "1",
+            "PIP_NO_INPUT": "1",
+            "CI": "true",  # no environment prompt in run_script
+        }
+    )
+    workspace.mkdir(parents=True, exist_ok=True)
+    os.chdir(workspace)
+    try:
+        yield
+    finally:
+        os.chdir(saved_cwd)
+        os.environ.clear()
+        os.environ.update(saved_env)
+
+
+@contextmanager
+def quiet(enabled: bool = True):
+    """Silence stdout at the file descriptor: installers and scripts print there."""
+    if not enabled:
+        yield
+        return
+    sys.stdout.flush()
+    saved = os.dup(1)
+    with open(os.devnull, "w") as null:
+        os.dup2(null.fileno(), 1)
+        try:
+            yield
+        finally:
+            sys.stdout.flush()
+            os.dup2(saved, 1)
+            os.close(saved)
+
+
+def make_env(kind: Optional[str], env: Path) -> None:
+    if kind is None or env.exists():
+        return
+    if kind == "site":
+        venv.EnvBuilder(system_site_packages=True, with_pip=False).create(env)
+    else:
+        create_venv(env)
+
+
+def sample_paths(bench: Bench, driver: Driver, scenario: str, i) -> tuple:
+    """(workspace, env, cache): new ones per cold sample, shared otherwise."""
+    base = bench.root / driver.name.replace("[", "_").replace("]", "") / scenario
+    if scenario == "cold":
+        workspace = base / str(i)
+        return workspace, workspace / ".venv", workspace / "cache"
+    env_name = f".venv-{i}" if scenario == "warm" else ".venv"
+    return base, base / env_name, base / "cache"
+
+
+def run_sample(bench: Bench, driver: Driver, scenario: str, i) -> tuple:
+    """(seconds, ok) of one timed call."""
+    workspace, env, cache = sample_paths(bench, driver, scenario, i)
+    with environment(bench, workspace, cache), quiet(not bench.verbose):
+        make_env(driver.env, env)
+        if driver.prepare is not None:
+            driver.prepare(bench, workspace, env)
+        start = time.perf_counter()
+        ok = driver.run(bench, workspace, env)
+        return time.perf_counter() - start, ok
+
+
+def percentiles(times: list) -> dict:
+    if len(times) == 1:
+        p50 = p90 = times[0]
+    else:
+        deciles = statistics.quantiles(times, n=10, method="inclusive")
+        p50, p90 = deciles[4], deciles[8]
+    return {"p50": p50, "p90": p90, "min": min(times), "max": max(times), "n": len(times)}
+
+
+def run_driver(bench: Bench, driver: Driver, scenarios: tuple, repeat: int) -> dict:
+    if driver.needs_uv and bench.uv is None:
+        return {"skipped": "uv not found"}
+    results = {}
+    for scenario in scenarios:
+        if scenario != "cold":
+            # fills the caches (warm) or the environment (noop)
+            run_sample(bench, driver, scenario, "setup")
+        times, failures = [], 0
+        for i in range(repeat):
+            seconds, ok = run_sample(bench, driver, scenario, i)
+            times.append(seconds)
+            failures += not ok
+        results[scenario] = {**percentiles(times), "failures": failures}
+    return results
+
+
+def print_results(results: dict) -> None:
+    print(f"{'driver':34} {'scenario':8} {'p50':>9} {'p90':>9} {'n':>3}  failures")
+    for name, scenarios in results.items():
+        if "skipped" in scenarios:
+            print(f"{name:34} skipped: {scenarios['skipped']}")
+            continue
+        for scenario, r in scenarios.items():
+            print(
+                f"{name:34} {scenario:8} {r['p50']:8.3f}s {r['p90']:8.3f}s {r['n']:>3}  "
+                f"{r['failures']}"
+            )
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--packages", type=int, default=10, help="generated packages")
+    parser.add_argument("--size-kb", type=int, default=256, help="payload per wheel")
+    parser.add_argument("--filter", default="", help="only drivers containing this")
+    parser.add_argument("--scenario", default=",".join(SCENARIOS))
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--verbose", action="store_true", help="show installer output")
+    args = parser.parse_args(argv)
+    scenarios = tuple(s for s in args.scenario.split(",") if s in SCENARIOS)
+
+    packages = bench_packages(args.packages, size_kb=args.size_kb)
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="smartrun-e2e-") as tmp:
+        tmp = Path(tmp)
+        with serve(build_index(tmp / "index", packages)) as url:
+            bench = Bench(tmp / "work", url, packages, uv=find_uv(), verbose=args.verbose)
+            for driver in DRIVERS:
+                if args.filter in driver.name:
+                    results[driver.name] = run_driver(bench, driver, scenarios, args.repeat)
+    print_results(results)
+    if args.json:
+        meta = {
+            "timestamp": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "uv": bench.uv,
+            "packages": args.packages,
+            "size_kb": args.size_kb,
+        }
+        Path(args.json).write_text(json.dumps({"meta": meta, "results": results}, indent=2))
+    samples = [r for s in results.values() for r in s.values() if isinstance(r, dict)]
+    return 1 if any(r["failures"] for r in samples) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
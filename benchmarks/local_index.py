@@ -0,0 +1,132 @@
+"""
+A local stand-in for PyPI: small generated wheels served as a PEP 503
+simple index over HTTP on 127.0.0.1. Installs against it exercise the
+real uv / pip code paths (index pages, downloads, resolution) without
+the variance of a remote index.
+
+    root/simple/index.html              every project
+    root/simple/<project>/index.html    links to its files, with #sha256=
+    root/packages/<wheel>
+"""
+
+import base64
+import hashlib
+import html
+import random
+import threading
+import zipfile
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from smartrun.dist_info import canonical_name
+
+
+@dataclass
+class BenchPackage:
+    name: str  # distribution name, e.g. bench-pkg-0
+    versions: list = field(default_factory=lambda: ["1.0.0", "1.1.0"])
+    requires: list = field(default_factory=list)  # Requires-Dist lines
+    size_kb: int = 256  # payload, incompressible
+
+    @property
+    def module(self) -> str:
+        return canonical_name(self.name).replace("-", "_")
+
+    @property
+    def latest(self) -> str:
+        return self.versions[-1]
+
+
+def bench_packages(count: int = 10, chain: int = 4, size_kb: int = 256) -> list:
+    """
+    *count* packages; the first *chain* each require the next one, so a
+    resolver has dependencies to follow.
+    """
+    packages = []
+    for i in range(count):
+        requires = [f"bench-pkg-{i + 1}>=1.0"] if i < chain and i + 1 < count else []
+        packages.append(BenchPackage(f"bench-pkg-{i}", requires=requires, size_kb=size_kb))
+    return packages
+
+
+def _record_hash(data: bytes) -> str:
+    digest = base64.urlsafe_b64encode(hashlib.sha256(data).digest()).rstrip(b"=")
+    return f"sha256={digest.decode()}"
+
+
+def build_wheel(folder: Path, package: BenchPackage, version: str) -> Path:
+    module = package.module
+    info = f"{module}-{version}.dist-info"
+    rng = random.Random(f"{package.name}-{version}")
+    metadata = [
+        "Metadata-Version: 2.1",
+        f"Name: {package.name}",
+        f"Version: {version}",
+        *(f"Requires-Dist: {r}" for r in package.requires),
+    ]
+    files = {
+        f"{module}/__init__.py": f"__version__ = '{version}'\n".encode(),
+        f"{module}/payload.bin": rng.randbytes(package.size_kb * 1024),
+        f"{info}/METADATA": ("\n".join(metadata) + "\n").encode(),
+        f"{info}/WHEEL": b"Wheel-Version: 1.0\nGenerator: smartrun-bench\n"
+        b"Root-Is-Purelib: true\nTag: py3-none-any\n",
+        f"{info}/top_level.txt": f"{module}\n".encode(),
+    }
+    record = [f"{name},{_record_hash(data)},{len(data)}" for name, data in files.items()]
+    record.append(f"{info}/RECORD,,")
+    files[f"{info}/RECORD"] = ("\n".join(record) + "\n").encode()
+    path = Path(folder) / f"{module}-{version}-py3-none-any.whl"
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as z:
+        for name, data in files.items():
+            z.writestr(name, data)
+    return path
+
+
+def _page(links: list) -> str:
+    body = "\n".join(
+        f'<a href="{html.escape(href)}">{html.escape(text)}</a><br>' for href, text in links
+    )
+    return f"<!DOCTYPE html>\n<html><body>\n{body}\n</body></html>\n"
+
+
+def build_index(root: Path, packages: list) -> Path:
+    """Wheels of every version of *packages* and the simple index for them."""
+    root = Path(root)
+    files_dir = root / "packages"
+    files_dir.mkdir(parents=True, exist_ok=True)
+    projects = []
+    for package in packages:
+        project = canonical_name(package.name)
+        links = []
+        for version in package.versions:
+            wheel = build_wheel(files_dir, package, version)
+            digest = hashlib.sha256(wheel.read_bytes()).hexdigest()
+            links.append((f"../../packages/{wheel.name}#sha256={digest}", wheel.name))
+        page = root / "simple" / project / "index.html"
+        page.parent.mkdir(parents=True, exist_ok=True)
+        page.write_text(_page(links), encoding="utf-8")
+        projects.append((f"{project}/", project))
+    (root / "simple" / "index.html").write_text(_page(projects), encoding="utf-8")
+    return root
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+@contextmanager
+def serve(root: Path):
+    """Serve *root* on a free local port; yields the simple index URL."""
+    handler = partial(_QuietHandler, directory=str(root))
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}/simple/"
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,187 @@
+"""
+Scanning and CLI overhead on synthetic corpora (benchmarks/corpora.py):
+Scan, SmartRunCommentRequirements, extract_imports_from_ipynb,
+get_problematic_module_names, the local import graph walk and cold CLI
+startup. Results are written as JSON and can be compared against a
+stored baseline; a median slower than the baseline by more than
+--threshold (default 0.25, i.e. 25%) is a regression and makes the run
+exit with 1.
+
+    python -m benchmarks.scan_suite [--repeat 5] [--quick] [--filter Scan]
+        [--json out.json] [--baseline baseline.json | --check] [--threshold 0.25]
+
+--check compares against the reference results committed in
+benchmarks/baselines/scan.json (a --quick run). Timings only compare on
+the same machine: refresh the file there first with
+`python -m benchmarks.scan_suite --quick --json benchmarks/baselines/scan.json`.
+On pull requests, .github/workflows/benchmarks.yml measures the base
+branch and the change on the same runner and compares the two.
+
+In-process benchmarks run warm (one untimed call first), as they do in a
+long smartrun invocation; the cli/* ones start a new interpreter each time.
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from benchmarks import corpora
+from smartrun.comments import SmartRunCommentRequirements
+from smartrun.options import Options
+from smartrun.scan_imports import make_scan, scan_file_packages
+from smartrun.utils import extract_imports_from_ipynb, get_problematic_module_names
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_THRESHOLD = 0.25  # 25% slower than the baseline median
+DEFAULT_BASELINE = ROOT / "benchmarks" / "baselines" / "scan.json"
+CLI_MAIN = "import sys; from smartrun.cli import main; main(sys.argv[1:])"
+
+
+def build_corpus(folder: Path, quick: bool = False) -> dict:
+    scale = 10 if quick else 1
+    return {
+        "small": corpora.small_script(folder),
+        "huge": corpora.huge_script(folder, functions=2000 // scale),
+        "docstrings": corpora.docstring_heavy_script(folder, blocks=400 // scale),
+        "notebook": corpora.notebook(folder, cells=200 // scale),
+        "graph": corpora.import_graph(folder, depth=200 // scale),
+        "flat": corpora.flat_project(folder, modules=500 // scale),
+    }
+
+
+def cli_command(*args: str) -> list:
+    return [sys.executable, *args]
+
+
+def run_cold(cmd: list) -> None:
+    subprocess.run(cmd, cwd=ROOT, check=True, stdout=subprocess.DEVNULL)
+
+
+def benchmarks(corpus: dict) -> dict:
+    """name -> zero-argument callable"""
+
+    def scan(path):
+        return lambda: make_scan(path)()
+
+    def comments(key):
+        return lambda: SmartRunCommentRequirements(corpus[key])
+
+    def problematic(folder):
+        return lambda: get_problematic_module_names(folder)
+
+    def graph_walk():
+        entry = corpus["graph"]
+        scan_file_packages(entry, Options(entry, no_cache=True), graph_workers=1)
+
+    return {
+        "Scan/small": scan(corpus["small"]),
+        "Scan/huge": scan(corpus["huge"]),
+        "Scan/docstrings": scan(corpus["docstrings"]),
+        "Scan/notebook": scan(corpus["notebook"]),
+        "scan_file_packages/graph": graph_walk,
+        "SmartRunCommentRequirements/huge": comments("huge"),
+        "SmartRunCommentRequirements/docstrings": comments("docstrings"),
+        "extract_imports_from_ipynb/notebook": lambda: extract_imports_from_ipynb(
+            corpus["notebook"]
+        ),
+        "get_problematic_module_names/flat": problematic(corpus["flat"]),
+        "get_problematic_module_names/graph": problematic(corpus["graph"].parent),
+        "cli/import": lambda: run_cold(cli_command("-c", "import smartrun.cli")),
+        # as the console script starts it: `-m smartrun.cli` imports cli twice
+        "cli/--version": lambda: run_cold(cli_command("-c", CLI_MAIN, "--version")),
+    }
+
+
+def measure(fn, repeat: int, warmup: int = 1) -> dict:
+    for _ in range(warmup):
+        fn()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return {
+        "median": statistics.median(times),
+        "min": min(times),
+        "mean": statistics.fmean(times),
+        "repeat": repeat,
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float = DEFAULT_THRESHOLD) -> list:
+    """(name, baseline median, median, ratio, status) per benchmark."""
+    rows = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base:
+            rows.append((name, None, result["median"], None, "new"))
+            continue
+        ratio = result["median"] / base["median"] if base["median"] else float("inf")
+        if ratio > 1 + threshold:
+            status = "regression"
+        elif ratio < 1 - threshold:
+            status = "faster"
+        else:
+            status = "ok"
+        rows.append((name, base["median"], result["median"], ratio, status))
+    return rows
+
+
+def metadata() -> dict:
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--quick", action="store_true", help="corpora a tenth of the size")
+    parser.add_argument("--filter", default="", help="only names containing this")
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--baseline", help="compare against this results file")
+    parser.add_argument(
+        "--check", action="store_true", help=f"--baseline {DEFAULT_BASELINE.relative_to(ROOT)}"
+    )
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="smartrun-bench-") as tmp:
+        corpus = build_corpus(Path(tmp), quick=args.quick)
+        for name, fn in benchmarks(corpus).items():
+            if args.filter not in name:
+                continue
+            results[name] = measure(fn, args.repeat)
+            r = results[name]
+            median, fastest = r["median"] * 1000, r["min"] * 1000
+            print(f"{name:42} median {median:9.2f}ms  min {fastest:9.2f}ms")
+    if args.json:
+        data = {"meta": {**metadata(), "quick": args.quick}, "results": results}
+        Path(args.json).write_text(json.dumps(data, indent=2))
+    baseline_path = args.baseline or (DEFAULT_BASELINE if args.check else None)
+    if not baseline_path:
+        return 0
+    stored = json.loads(Path(baseline_path).read_text())
+    if stored.get("meta", {}).get("quick", args.quick) != args.quick:
+        print("warning: the baseline was measured with a different --quick setting")
+    baseline = stored.get("results", {})
+    rows = compare(results, baseline, args.threshold)
+    print()
+    for name, base, now, ratio, status in rows:
+        change = "" if ratio is None else f"{ratio:6.2f}x"
+        print(f"{name:42} {status:10} {change}")
+    return 1 if any(row[-1] == "regression" for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
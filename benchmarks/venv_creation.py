@@ -0,0 +1,70 @@
+"""
+Environment creation time: venv + ensurepip (the old default) against
+`uv venv` and a pip-less venv, the two ways smartrun creates environments
+now (runner_helpers.create_venv).
+
+    python -m benchmarks.venv_creation [--repeat 5] [--json out.json]
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import tempfile
+import time
+import venv
+from pathlib import Path
+
+from smartrun.runner_helpers import create_venv_uv
+from smartrun.utils import _ensure_pip, find_uv, get_bin_path
+
+
+def venv_with_pip(path: Path) -> None:
+    venv.EnvBuilder(with_pip=True).create(path)
+
+
+def venv_without_pip(path: Path) -> None:
+    venv.EnvBuilder(with_pip=False).create(path)
+
+
+def venv_lazy_pip(path: Path) -> None:
+    """pip-less venv, then pip seeded as the pip fallback would."""
+    venv_without_pip(path)
+    _ensure_pip(get_bin_path(path, "python"))
+
+
+METHODS = {
+    "venv+ensurepip": venv_with_pip,
+    "venv (no pip)": venv_without_pip,
+    "venv, pip on demand": venv_lazy_pip,
+}
+if find_uv():
+    METHODS["uv venv"] = create_venv_uv
+
+
+def measure(create, repeat: int) -> list:
+    times = []
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as tmp:
+            start = time.perf_counter()
+            create(Path(tmp) / "env")
+            times.append(time.perf_counter() - start)
+    return times
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args(argv)
+    results = {}
+    for name, create in METHODS.items():
+        times = measure(create, args.repeat)
+        results[name] = {"median": statistics.median(times), "min": min(times)}
+        print(f"{name:22} median {results[name]['median']:.3f}s  min {min(times):.3f}s")
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,6 @@
-from smartrun.utils import get_packages_uv, get_packages_pip
+from smartrun.utils import get_packages_native, get_packages_pip
 
-a = get_packages_uv(".venv")
+a = get_packages_native(".venv")
 b = get_packages_pip(".venv")
 print(a)
 print(b)
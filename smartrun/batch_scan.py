@@ -0,0 +1,133 @@
+"""
+Scan a whole directory tree: every .py and .ipynb file is scanned (in a
+process pool for large trees) with the same per-file logic and scan cache
+as `smartrun script.py`. Results go into one manifest instead of
+.smartrun/packages.in.
+"""
+
+import json
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, replace
+from itertools import repeat
+from pathlib import Path
+from typing import Iterable, Optional, Union
+
+from smartrun.module_index import DEFAULT_EXCLUDE_PATTERNS
+from smartrun.options import Options
+from smartrun.utils import SMART_FOLDER, create_dir
+
+SCAN_SUFFIXES = (".py", ".ipynb")
+MANIFEST_NAME = "scan_manifest.json"
+# below this many files the pool costs more than it saves
+PARALLEL_THRESHOLD = 16
+
+
+@dataclass
+class FileScan:
+    path: str
+    packages: list = field(default_factory=list)  # requirement strings
+    skipped: dict = field(default_factory=dict)  # dist -> import kind not installed
+    cached: bool = False
+    error: Optional[str] = None
+
+
+@dataclass
+class BatchScan:
+    root: Path
+    files: list = field(default_factory=list)  # list[FileScan]
+    seconds: float = 0.0
+
+    @property
+    def counts(self) -> Counter:
+        """requirement -> number of files that need it"""
+        return Counter(p for f in self.files for p in f.packages)
+
+    @property
+    def union(self) -> list[str]:
+        return sorted(self.counts, key=str.lower)
+
+    @property
+    def errors(self) -> list[FileScan]:
+        return [f for f in self.files if f.error]
+
+    def to_dict(self) -> dict:
+        return {
+            "root": str(self.root),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "seconds": round(self.seconds, 3),
+            "union": self.union,
+            "counts": dict(sorted(self.counts.items())),
+            "files": {
+                f.path: {
+                    "packages": f.packages,
+                    "skipped": f.skipped,
+                    "cached": f.cached,
+                    "error": f.error,
+                }
+                for f in self.files
+            },
+        }
+
+
+def iter_scan_targets(
+    root: Union[str, Path], exclude_patterns: Iterable[str] = None
+) -> list[Path]:
+    """Scripts and notebooks under *root*, skipping venvs, caches and dot-dirs."""
+    exclude = set(DEFAULT_EXCLUDE_PATTERNS if exclude_patterns is None else exclude_patterns)
+    root = Path(root)
+    if root.is_file():
+        return [root]
+    targets = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(
+            d for d in dirnames if d not in exclude and not d.startswith(".")
+        )
+        for name in sorted(filenames):
+            if name.endswith(SCAN_SUFFIXES) and not name.startswith("."):
+                targets.append(Path(dirpath) / name)
+    return targets
+
+
+def scan_one(path: Union[str, Path], opts: Options) -> FileScan:
+    """Requirements of a single file; errors are recorded, not raised."""
+    from smartrun.scan_imports import scan_file_packages
+
+    path = Path(path)
+    try:
+        # graph walks stay serial: the batch already uses every core
+        result = scan_file_packages(path, replace(opts, script=path), graph_workers=1)
+    except (OSError, SyntaxError, UnicodeDecodeError, ValueError) as e:
+        return FileScan(str(path), error=f"{type(e).__name__}: {e}")
+    packages = sorted({str(p) for p in result.packages})
+    return FileScan(str(path), packages, dict(result.skipped), result.cached)
+
+
+def scan_paths(targets: list, opts: Options, max_workers: int = None) -> list[FileScan]:
+    """scan_one for every path of *targets*, in a process pool for large batches."""
+    workers = max_workers or os.cpu_count() or 1
+    if len(targets) < PARALLEL_THRESHOLD or workers == 1:
+        return [scan_one(p, opts) for p in targets]
+    chunksize = max(1, len(targets) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(scan_one, targets, repeat(opts), chunksize=chunksize))
+
+
+def scan_directory(
+    root: Union[str, Path], opts: Options, max_workers: int = None
+) -> BatchScan:
+    start = time.perf_counter()
+    files = scan_paths(iter_scan_targets(root), opts, max_workers)
+    return BatchScan(Path(root), files, time.perf_counter() - start)
+
+
+def write_manifest(batch: BatchScan, folder: Path = None) -> Path:
+    folder = Path(folder) if folder else SMART_FOLDER
+    create_dir(folder)
+    path = folder / MANIFEST_NAME
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(batch.to_dict(), indent=2), encoding="utf-8")
+    os.replace(tmp, path)
+    return path
@@ -19,7 +19,9 @@ from smartrun.runner import (
 )
 from smartrun.runner_helpers import create_venv_path_pure
 from smartrun.scan_imports import Scan, create_extra_requirements
-from smartrun.utils import get_last_env_file_name
+from smartrun.trace import trace_file, tracing
+from smartrun.utils import SMART_FOLDER, get_last_env_file_name
+from smartrun.wheelhouse import wheelhouse_dir
 
 
 # ────────────────────────────────────────── helpers ──────────────────────────
@@ -61,6 +63,11 @@ class CLI:
             "venv": self.create_env,
             "env": self.create_env,
             "list": self.list_envs,
+            "gc": self.gc_envs,
+            "bundle": self.bundle,
+            "scan": self.scan,
+            "run-many": self.run_many,
+            "plan": self.plan,
             "run": self.run,  # internal helper
         }
 
@@ -97,6 +104,8 @@ class CLI:
           • ``pkg1,pkg2``  → explicit package list
           • ``file.json``  → install from JSON lock
           • ``file.txt``   → install from requirements.txt lock
+          • ``file.yaml``  → install from YAML environment file
+        With --wheelhouse DIR every path installs from DIR, without an index.
         """
         from smartrun.installers.from_json_fast import (
             install_dependencies_from_json,
@@ -115,10 +124,18 @@ class CLI:
         if not file_path.exists():
             print(f"[red]File not found:[/red] {file_path}")
             return
+        wheelhouse = wheelhouse_dir(self.opts.wheelhouse)
+        timeout = self.opts.install_timeout
         if file_path.suffix == ".json":
-            install_dependencies_from_json(file_path)
+            install_dependencies_from_json(file_path, wheelhouse=wheelhouse, timeout=timeout)
         elif file_path.suffix == ".txt":
-            install_dependencies_from_txt(file_path)
+            install_dependencies_from_txt(file_path, wheelhouse=wheelhouse, timeout=timeout)
+        elif file_path.suffix in {".yaml", ".yml"}:
+            from smartrun.installers.from_yaml import SmartRunYAMLHandler
+
+            SmartRunYAMLHandler().install_from_yaml(
+                file_path, wheelhouse=wheelhouse, timeout=timeout
+            )
         else:
             raise ValueError("Unsupported file type for install command.")
 
@@ -137,10 +154,91 @@ class CLI:
 
         run_script(self.opts)
 
+    def scan(self) -> None:
+        """Scan every script/notebook under *second* (default: cwd)."""
+        from smartrun.batch_scan import scan_directory, write_manifest
+
+        root = Path(self.opts.second or ".")
+        if not root.exists():
+            print(f"[red]Path not found:[/red] {root}")
+            return
+        batch = scan_directory(root, self.opts, max_workers=self.opts.jobs)
+        for f in batch.files:
+            if f.error:
+                print(f"[red]{f.path}[/red]: {f.error}")
+            else:
+                print(f"[cyan]{f.path}[/cyan]: {', '.join(f.packages) or '-'}")
+        manifest = write_manifest(batch)
+        cached = sum(f.cached for f in batch.files)
+        print(
+            f"[green]{len(batch.files)} files[/green] ({cached} from cache, "
+            f"{len(batch.errors)} errors) in {batch.seconds:.2f}s"
+        )
+        print(f"[yellow]union ({len(batch.union)}):[/yellow] {' '.join(batch.union)}")
+        print(f"manifest: {manifest}")
+
+    def run_many(self) -> None:
+        """Run many scripts, one environment per compatible requirement set."""
+        from smartrun.run_many import expand_targets, run_many
+
+        targets = expand_targets(filter(None, [self.opts.second, *self.opts.extra_args]))
+        if not targets:
+            print("Usage: smartrun run-many <script|dir|glob|list.txt> ... [-j N]")
+            return
+        result = run_many(targets, self.opts, jobs=self.opts.jobs)
+        if not result.ok:
+            raise SystemExit(1)
+
+    def plan(self) -> None:
+        """Plan (and with --build create) merged environments for a directory."""
+        from smartrun.env_plan import build_plan, plan_directory, print_plan, write_plan
+
+        root = Path(self.opts.second or ".")
+        if not root.exists():
+            print(f"[red]Path not found:[/red] {root}")
+            return
+        plan = plan_directory(root, self.opts)
+        print_plan(plan)
+        print(f"plan: {write_plan(plan)}")
+        if self.opts.build:
+            for env_path in build_plan(plan, self.opts):
+                print(f"[green]built[/green] {env_path}")
+
+    def bundle(self) -> None:
+        """Download the wheels of a script's lock (or of a lock file) for offline installs."""
+        from smartrun.wheelhouse import bundle
+
+        if not self.opts.second:
+            print("Usage: smartrun bundle <script|lock> [--wheelhouse DIR]")
+            return
+        dest = wheelhouse_dir(self.opts.wheelhouse) or SMART_FOLDER / "wheelhouse"
+        house = bundle(self.opts.second, dest, self.opts)
+        print(
+            f"[green]{len(house.files)} files[/green] in {house.path} "
+            f"({len(house.requirements)} distributions)"
+        )
+        if house.missing:
+            print(f"[bold red]Could not download:[/bold red] {', '.join(house.missing)}")
+        print(f"Install offline with: smartrun install <lock> --wheelhouse {house.path}")
+
     def list_envs(self) -> None:
-        root = Path.home() / ".smartrun_envs"
-        for env_dir in root.glob("*"):
-            print(env_dir)
+        """List the shared environments in ~/.smartrun_envs."""
+        from smartrun.env_store import EnvStore
+
+        for env in EnvStore().envs():
+            print(
+                f"[cyan]{env.path}[/cyan] {env.python} refs={len(env.refs)}: "
+                f"{' '.join(env.requirements) or '-'}"
+            )
+
+    def gc_envs(self) -> None:
+        """Remove shared environments that no existing script refers to."""
+        from smartrun.env_store import EnvStore
+
+        removed = EnvStore().gc()
+        for env_path in removed:
+            print(f"[yellow]removed[/yellow] {env_path}")
+        print(f"{len(removed)} unreferenced environments removed")
 
     # ─────────────── router / dispatcher ────────────────
     def router(self) -> None:
@@ -172,6 +270,7 @@ def _build_arg_parser() -> argparse.ArgumentParser:
     )
     parser.add_argument("script", help="Command (install/add/venv) or script path")
     parser.add_argument("second", nargs="?", default=None, help="Optional argument")
+    parser.add_argument("more", nargs="*", default=[], help="More scripts (run-many)")
     parser.add_argument("--venv", action="store_true", help="Treat *second* as venv")
     parser.add_argument("--verbose", action="store_true", help="Verbose")
     parser.add_argument("--no-uv", action="store_true", help="Skip uv resolver")
@@ -179,6 +278,53 @@ def _build_arg_parser() -> argparse.ArgumentParser:
     parser.add_argument("--exc", help="Exclude packages")
     parser.add_argument("--inc", help="Include packages")
     parser.add_argument("--timeout", help="Timeout", type=int, default=1200)
+    parser.add_argument("--no-cache", action="store_true", help="Rescan imports")
+    parser.add_argument(
+        "--shared",
+        action="store_true",
+        help="Run in the shared environment for the script's requirements "
+        "(~/.smartrun_envs)",
+    )
+    parser.add_argument(
+        "--build",
+        action="store_true",
+        help="smartrun plan: create the planned environments in the shared store",
+    )
+    parser.add_argument(
+        "--wheelhouse",
+        default=None,
+        help="Install only from this wheelhouse directory, no index "
+        "(also the output directory of `smartrun bundle`)",
+    )
+    parser.add_argument(
+        "--install-timeout",
+        type=float,
+        default=None,
+        help="Stop an installer call after this many seconds",
+    )
+    parser.add_argument(
+        "--trace",
+        metavar="FILE",
+        default=None,
+        help="Write phase timings as Chrome trace JSON to FILE and print a summary",
+    )
+    parser.add_argument(
+        "--refresh", action="store_true", help="Resolve again, ignoring cached pins"
+    )
+    parser.add_argument(
+        "--resolution-ttl",
+        type=float,
+        default=None,
+        help="Seconds a cached resolution stays valid (default: 7 days)",
+    )
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="Scan / run workers")
+    parser.add_argument(
+        "--imports",
+        choices=["required", "optional", "all"],
+        default="required",
+        help="Install required imports only (default), also ImportError-guarded "
+        "ones, or also TYPE_CHECKING-only ones",
+    )
     parser.add_argument(
         "--out", help="Output folder for HTML report", type=str, default=None
     )
@@ -202,8 +348,20 @@ def main(argv: Iterable[str] | None = None) -> None:
         version=False,
         help=False,
         timeout=args.timeout,
+        no_cache=args.no_cache,
+        jobs=args.jobs,
+        import_policy=args.imports,
+        shared=args.shared,
+        build=args.build,
+        wheelhouse=args.wheelhouse,
+        install_timeout=args.install_timeout,
+        trace=trace_file(args.trace),
+        refresh=args.refresh,
+        extra_args=tuple(args.more),
+        resolution_ttl=args.resolution_ttl,
     )
-    CLI(opts).dispatch()
+    with tracing(opts.trace):
+        CLI(opts).dispatch()
 
 
 if __name__ == "__main__":
@@ -1,8 +1,145 @@
 import re
+from dataclasses import dataclass, field
 from typing import List, Dict, Union, Optional
 from pathlib import Path
 
 
+# one alternation instead of four separate findall passes
+INLINE_PATTERN = re.compile(
+    r"#\s*(?:smartrun:|smartrun-requires:|requires:|@smartrun\s)\s*(.+)", re.IGNORECASE
+)
+NEAR_IMPORT_PATTERN = re.compile(r"#\s*smartrun:\s*(.+)", re.IGNORECASE)
+BLOCK_MARKER = "smartrun-requirements:"
+COMMENT_BLOCK_PATTERN = re.compile(r"#\s*smartrun-requirements:\s*$", re.IGNORECASE)
+TRIPLE_QUOTES = ('"""', "'''")
+# outside a triple-quoted string: where a comment, a triple-quoted string
+# or a one-line string (matched whole, so its quotes are skipped) starts
+CODE_TOKEN = re.compile(
+    "|".join(["#", *TRIPLE_QUOTES, r'"(?:[^"\\]|\\.)*"?', r"'(?:[^'\\]|\\.)*'?"])
+)
+NEAR_IMPORT_WINDOW = 3
+
+
+@dataclass
+class CommentScanResult:
+    """Everything the single pass over the source collects."""
+
+    inline: List[str] = field(default_factory=list)
+    near_imports: Dict[str, str] = field(default_factory=dict)
+    block: List[str] = field(default_factory=list)
+
+
+def _assign_near_imports(
+    import_lines: List[tuple], comment_lines: List[tuple]
+) -> Dict[str, str]:
+    """
+    Pair each import line with the last smartrun comment at most
+    NEAR_IMPORT_WINDOW lines away; both lists are in line order, so two
+    moving pointers keep this linear.
+    """
+    requirements = {}
+    lo = 0
+    for i, module_name in import_lines:
+        while lo < len(comment_lines) and comment_lines[lo][0] < i - NEAR_IMPORT_WINDOW:
+            lo += 1
+        hi = lo
+        last = None
+        while hi < len(comment_lines) and comment_lines[hi][0] <= i + NEAR_IMPORT_WINDOW:
+            last = comment_lines[hi][1]
+            hi += 1
+        if last is not None:
+            requirements[module_name] = last
+    return requirements
+
+
+def scan_comments(content: str) -> CommentScanResult:
+    """
+    Collect inline, near-import and block requirements in one pass over
+    the lines. Triple-quoted strings are tracked as the lines go by, so a
+    requirements docstring is found without any backtracking regex;
+    quotes in comments and in one-line strings are skipped.
+    """
+    result = CommentScanResult()
+    inline = set()
+    import_lines, comment_lines = [], []
+    in_string = None  # the triple quote that opened the current string
+    collecting_doc = False
+    collecting_comments = False
+    for i, line in enumerate(content.splitlines()):
+        stripped = line.strip()
+        # ── comment block: "# smartrun-requirements:" then "# pkg" lines
+        # (its lines are still comments: inline and near-import ones count too)
+        if collecting_comments:
+            if stripped.startswith("#"):
+                req = stripped.lstrip("#").strip()
+                if req:
+                    result.block.append(req)
+            else:
+                collecting_comments = False
+        # ── triple-quoted strings and requirements docstrings
+        rest = line
+        while True:
+            if in_string is None:
+                m = CODE_TOKEN.search(rest)
+                if m is None or m.group() == "#":
+                    break  # quotes in a comment open nothing
+                if m.group() in TRIPLE_QUOTES:
+                    in_string = m.group()
+                rest = rest[m.end() :]
+                continue
+            end = rest.find(in_string)
+            segment = rest if end < 0 else rest[:end]
+            if not collecting_doc:
+                marker = segment.lower().find(BLOCK_MARKER)
+                if marker >= 0:
+                    collecting_doc = True
+                    segment = segment[marker + len(BLOCK_MARKER) :]
+            if collecting_doc:
+                req = segment.strip()
+                if req and not req.lower().startswith(BLOCK_MARKER):
+                    result.block.append(req)
+            if end < 0:
+                break
+            in_string = None
+            collecting_doc = False
+            rest = rest[end + 3 :]
+        # ── comments
+        if "#" in line:
+            m = INLINE_PATTERN.search(line)
+            if m:
+                deps = re.split(r"[,\s]+", m.group(1))
+                inline.update(dep.strip() for dep in deps if dep.strip())
+            if stripped.startswith("#"):
+                m = NEAR_IMPORT_PATTERN.search(stripped)
+                if m:
+                    comment_lines.append((i, m.group(1).strip()))
+                if COMMENT_BLOCK_PATTERN.search(stripped):
+                    collecting_comments = True
+        if "import" in line and not stripped.startswith("#"):
+            module_name = _extract_module_name(line)
+            if module_name:
+                import_lines.append((i, module_name))
+    result.inline = list(inline)
+    result.near_imports = _assign_near_imports(import_lines, comment_lines)
+    return result
+
+
+IMPORT_NAME_PATTERNS = (
+    re.compile(r"from\s+([a-zA-Z_][a-zA-Z0-9_]*)"),  # from module
+    re.compile(r"import\s+([a-zA-Z_][a-zA-Z0-9_]*)"),  # import module
+)
+
+
+def _extract_module_name(import_line: str) -> Optional[str]:
+    """Extract module name from import statement."""
+    import_line = import_line.strip()
+    for pattern in IMPORT_NAME_PATTERNS:
+        match = pattern.search(import_line)
+        if match:
+            return match.group(1)
+    return None
+
+
 class SmartRunCommentRequirements:
     def __init__(self, source: Union[str, Path], is_content: bool = False):
         """
@@ -13,6 +150,7 @@ class SmartRunCommentRequirements:
         """
         self.source = source
         self.is_content = is_content
+        self.result = scan_comments(self._get_content())
         self.requirements = self._parse_requirements()
 
     @classmethod
@@ -33,101 +171,21 @@ class SmartRunCommentRequirements:
             with open(self.source, "r", encoding="utf-8") as f:
                 return f.read()
 
-    def _parse_requirementsOld(self) -> List[str]:
-        """Parse all smartrun requirements from the content."""
-        content = self._get_content()
-        requirements = []
-        # Multiple patterns for flexibility
-        patterns = [
-            r"#\s*smartrun:\s*(.+)",
-            r"#\s*smartrun-requires:\s*(.+)",
-            r"#\s*requires:\s*(.+)",
-            r"#\s*@smartrun\s+(.+)",
-        ]
-        for pattern in patterns:
-            matches = re.findall(pattern, content, re.IGNORECASE)
-            for match in matches:
-                deps = [dep.strip() for dep in match.split(",") if dep.strip()]
-                requirements.extend(deps)
-        return list(set(requirements))  # Remove duplicates
-
     def _parse_requirements(self) -> List[str]:
         """Parse all smartrun requirements from the content."""
-        content = self._get_content()
-        requirements = []
-        # Multiple patterns for flexibility
-        patterns = [
-            r"#\s*smartrun:\s*(.+)",
-            r"#\s*smartrun-requires:\s*(.+)",
-            r"#\s*requires:\s*(.+)",
-            r"#\s*@smartrun\s+(.+)",
-        ]
-        for pattern in patterns:
-            matches = re.findall(pattern, content, re.IGNORECASE)
-            for match in matches:
-
-                deps = re.split(r"[,\s]+", match)
-                requirements.extend(dep.strip() for dep in deps if dep.strip())
-        return list(set(requirements))  # Remove duplicates
+        return list(self.result.inline)
 
     def get_requirements_near_imports(self) -> Dict[str, str]:
         """Extract requirements that are near import statements."""
-        content = self._get_content()
-        lines = content.splitlines()
-        requirements = {}
-        for i, line in enumerate(lines):
-            # Check if line contains import
-            if "import" in line and not line.strip().startswith("#"):
-                # Look for smartrun comments in surrounding lines (±3 lines)
-                for j in range(max(0, i - 3), min(len(lines), i + 4)):
-                    comment_line = lines[j].strip()
-                    if comment_line.startswith("#"):
-                        match = re.search(
-                            r"#\s*smartrun:\s*(.+)", comment_line, re.IGNORECASE
-                        )
-                        if match:
-                            module_name = self._extract_module_name(line)
-                            if module_name:
-                                requirements[module_name] = match.group(1).strip()
-        return requirements
+        return dict(self.result.near_imports)
 
     def _extract_module_name(self, import_line: str) -> Optional[str]:
         """Extract module name from import statement."""
-        import_line = import_line.strip()
-        # Handle different import patterns
-        patterns = [
-            r"from\s+([a-zA-Z_][a-zA-Z0-9_]*)",  # from module
-            r"import\s+([a-zA-Z_][a-zA-Z0-9_]*)",  # import module
-        ]
-        for pattern in patterns:
-            match = re.search(pattern, import_line)
-            if match:
-                return match.group(1)
-        return None
+        return _extract_module_name(import_line)
 
     def get_block_requirements(self) -> List[str]:
         """Extract requirements from block-style comments or docstrings."""
-        content = self._get_content()
-        requirements = []
-        # Look for block-style requirements in docstrings
-        docstring_pattern = r'"""[\s\S]*?smartrun-requirements:\s*([\s\S]*?)"""'
-        matches = re.findall(docstring_pattern, content, re.IGNORECASE)
-        for match in matches:
-            lines = match.strip().split("\n")
-            for line in lines:
-                line = line.strip()
-                if line and not line.startswith("smartrun-requirements:"):
-                    requirements.append(line)
-        # Look for block-style requirements in comments
-        comment_block_pattern = r"#\s*smartrun-requirements:\s*\n((?:#.*\n)*)"
-        matches = re.findall(comment_block_pattern, content, re.IGNORECASE)
-        for match in matches:
-            lines = match.split("\n")
-            for line in lines:
-                line = line.strip().lstrip("#").strip()
-                if line:
-                    requirements.append(line)
-        return requirements
+        return list(self.result.block)
 
     def get_all_requirements(self) -> Dict[str, List[str]]:
         """Get all requirements categorized by type."""
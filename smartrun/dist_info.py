@@ -0,0 +1,161 @@
+"""
+In-process reader for installed distribution metadata.
+Lists *.dist-info / *.egg-info folders of a site-packages directory and
+reads only the headers that smartrun needs, without importing anything
+from the target environment or starting its interpreter.
+"""
+
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable, Optional, Union
+
+METADATA_SUFFIXES = (".dist-info", ".egg-info")
+_NORMALIZE = re.compile(r"[-_.]+")
+# headers that appear once; asking only for these lets reading stop early
+SINGLE_VALUED = {"Metadata-Version", "Name", "Version", "Summary", "Requires-Python"}
+# metadata files are read on threads from this many distributions up;
+# file reads release the GIL, which pays off on a cold disk cache
+PARALLEL_THRESHOLD = 256
+MAX_READ_WORKERS = 8
+
+
+def canonical_name(name: str) -> str:
+    """PEP 503 normalised project name: 'Flask_SQLAlchemy' -> 'flask-sqlalchemy'."""
+    return _NORMALIZE.sub("-", str(name)).lower()
+
+
+def _metadata_file(path: Path) -> Path:
+    if path.suffix == ".egg-info":
+        return path / "PKG-INFO" if path.is_dir() else path
+    return path / "METADATA"
+
+
+def read_headers(path: Union[str, Path], wanted: Iterable[str] = ("Name", "Version")):
+    """
+    Header values of a METADATA / PKG-INFO file. Reading stops at the blank
+    line before the long description, or as soon as every single-valued
+    header in *wanted* is known.
+    """
+    wanted = set(wanted)
+    stop_early = wanted <= SINGLE_VALUED
+    headers: dict[str, list[str]] = {}
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                if not line.strip():
+                    break
+                if line[0] in " \t" or ":" not in line:
+                    continue  # folded continuation line
+                key, _, value = line.partition(":")
+                if key in wanted:
+                    headers.setdefault(key, []).append(value.strip())
+                    if stop_early and len(headers) == len(wanted):
+                        break
+    except OSError:
+        pass
+    return headers
+
+
+@dataclass(frozen=True)
+class DistInfo:
+    name: str
+    version: str
+    path: Path  # the .dist-info / .egg-info entry
+
+    @property
+    def key(self) -> str:
+        return canonical_name(self.name)
+
+    @property
+    def metadata_path(self) -> Path:
+        return _metadata_file(self.path)
+
+    def headers(self, wanted: Iterable[str]) -> dict[str, list[str]]:
+        return read_headers(self.metadata_path, wanted)
+
+    def record_paths(self) -> list[str]:
+        """Installed file paths listed in RECORD (or installed-files.txt)."""
+        for name in ("RECORD", "installed-files.txt"):
+            try:
+                text = (self.path / name).read_text(encoding="utf-8", errors="replace")
+            except OSError:
+                continue
+            return [line.split(",", 1)[0] for line in text.splitlines() if line]
+        return []
+
+    def installed_size(self) -> int:
+        """Bytes of the installed files, from the size column of RECORD."""
+        try:
+            text = (self.path / "RECORD").read_text(encoding="utf-8", errors="replace")
+        except OSError:
+            return 0
+        size = 0
+        for line in text.splitlines():
+            field = line.rsplit(",", 1)[-1] if line.count(",") >= 2 else ""
+            if field.isdigit():
+                size += int(field)
+        return size
+
+    def top_level(self) -> tuple[str, ...]:
+        """Top-level import names, from top_level.txt or inferred from RECORD."""
+        try:
+            text = (self.path / "top_level.txt").read_text(encoding="utf-8")
+            names = tuple(n.strip().replace("/", ".") for n in text.split() if n.strip())
+            if names:
+                return names
+        except OSError:
+            pass
+        names = []
+        for p in self.record_paths():
+            first = p.replace("\\", "/").split("/", 1)
+            top = first[0]
+            if top.endswith(METADATA_SUFFIXES) or top.startswith(("..", "__pycache__")):
+                continue
+            if len(first) == 1:
+                if not top.endswith((".py", ".so", ".pyd")):
+                    continue
+                top = top.split(".", 1)[0]
+            if top.isidentifier() and top not in names:
+                names.append(top)
+        return tuple(names)
+
+
+def dist_from_path(path: Union[str, Path]) -> Optional[DistInfo]:
+    path = Path(path)
+    headers = read_headers(_metadata_file(path))
+    name = (headers.get("Name") or [None])[0]
+    version = (headers.get("Version") or [None])[0]
+    if not name or not version:
+        return None
+    return DistInfo(name, version, path)
+
+
+@lru_cache(maxsize=64)
+def _iter_dists_cached(site_dir: str, mtime_ns: int) -> tuple:
+    try:
+        with os.scandir(site_dir) as it:
+            entries = [e.path for e in it if e.name.endswith(METADATA_SUFFIXES)]
+    except OSError:
+        return ()
+    entries.sort()
+    cpus = os.cpu_count() or 1
+    if len(entries) < PARALLEL_THRESHOLD or cpus == 1:
+        found = map(dist_from_path, entries)
+    else:
+        with ThreadPoolExecutor(max_workers=min(MAX_READ_WORKERS, cpus * 2)) as pool:
+            found = list(pool.map(dist_from_path, entries, chunksize=32))
+    return tuple(dist for dist in found if dist is not None)
+
+
+def iter_dists(site_dir: Union[str, Path]) -> tuple:
+    """DistInfo of every distribution in *site_dir*, cached per folder mtime."""
+    site_dir = Path(site_dir)
+    try:
+        mtime_ns = site_dir.stat().st_mtime_ns
+    except OSError:
+        return ()
+    return _iter_dists_cached(str(site_dir.resolve()), mtime_ns)
@@ -0,0 +1,318 @@
+"""
+Environment consolidation planner: `smartrun plan <dir>`.
+The requirement sets of every script under a directory (with their
+version specifiers) are merged into as few environments as possible:
+sets go, largest first, into the first planned environment whose
+specifiers stay satisfiable together, otherwise they start a new one.
+
+Install size and time are estimated from the distributions already
+installed here (RECORD sizes of each requirement's dependency closure);
+unknown packages count with DEFAULT_PACKAGE_BYTES. The baseline is one
+environment per script, as `smartrun script.py` creates them.
+"""
+
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable, Optional, Union
+
+from rich import print
+
+from smartrun.dist_info import canonical_name, iter_dists
+from smartrun.options import Options
+from smartrun.package_name import split_package_name
+from smartrun.utils import SMART_FOLDER, create_dir
+
+try:
+    from packaging.requirements import InvalidRequirement, Requirement
+    from packaging.specifiers import InvalidSpecifier, SpecifierSet
+    from packaging.version import InvalidVersion, Version
+
+    HAS_PACKAGING = True
+except ImportError:
+    HAS_PACKAGING = False
+
+PLAN_NAME = "env_plan.json"
+# rough figures for packages that are not installed anywhere we can look
+DEFAULT_PACKAGE_BYTES = 5 * 1024 * 1024
+# rough install cost: a fixed part per distribution plus one per MB
+SECONDS_PER_PACKAGE = 0.5
+SECONDS_PER_MB = 0.05
+
+
+# ─────────────── version specifiers ────────────────
+def parse_requirements(packages: Iterable) -> dict[str, str]:
+    """['numpy>=1.20', 'Rich'] -> {'numpy': '>=1.20', 'rich': ''}"""
+    parsed = {}
+    for package in packages:
+        name, spec = split_package_name(str(package))
+        key = canonical_name(name)
+        parsed[key] = join_specifiers(parsed.get(key), spec)
+    return parsed
+
+
+def join_specifiers(*specs: Optional[str]) -> str:
+    parts = []
+    for spec in specs:
+        for part in (spec or "").split(","):
+            part = part.strip()
+            if part and part not in parts:
+                parts.append(part)
+    return ",".join(sorted(parts))
+
+
+def _candidates(specs) -> set:
+    """The versions the specifiers name, just above them, and 0."""
+    found = {"0"}
+    for spec in specs:
+        version = spec.version.removesuffix(".*")
+        found.update({version, f"{version}.1", f"{version}.0.1"})
+    return found
+
+
+def satisfiable(spec: str) -> bool:
+    """
+    Whether some version can satisfy every specifier of *spec*. Without an
+    index the check tries the versions the specifiers name and neighbours
+    of them; without packaging only conflicting == pins are detected.
+    """
+    if not spec:
+        return True
+    if not HAS_PACKAGING:
+        pins = {p[2:].strip() for p in spec.split(",") if p.startswith("==")}
+        return len(pins) <= 1
+    try:
+        specs = SpecifierSet(spec)
+    except InvalidSpecifier:
+        return False
+    for candidate in _candidates(specs):
+        try:
+            if specs.contains(Version(candidate), prereleases=True):
+                return True
+        except InvalidVersion:
+            continue
+    return False
+
+
+def merge_requirements(a: dict, b: dict) -> Optional[dict]:
+    """a and b in one environment, or None when a package's specifiers conflict."""
+    merged = dict(a)
+    for name, spec in b.items():
+        combined = join_specifiers(merged.get(name), spec)
+        if not satisfiable(combined):
+            return None
+        merged[name] = combined
+    return merged
+
+
+def requirement_list(requirements: dict) -> list[str]:
+    return [f"{name}{spec}" for name, spec in sorted(requirements.items())]
+
+
+# ─────────────── size estimates ────────────────
+class SizeIndex:
+    """Installed sizes and dependencies of the distributions in *site_dirs*."""
+
+    def __init__(self, site_dirs: Iterable[Union[str, Path]]):
+        self.dists = {}
+        for site_dir in site_dirs:
+            for dist in iter_dists(site_dir):
+                self.dists.setdefault(dist.key, dist)
+        self.closure = lru_cache(maxsize=None)(self._closure)
+        self.size_of = lru_cache(maxsize=None)(self._size_of)
+
+    def _size_of(self, key: str) -> int:
+        dist = self.dists.get(key)
+        size = dist.installed_size() if dist else 0
+        return size or DEFAULT_PACKAGE_BYTES
+
+    def _closure(self, key: str) -> frozenset:
+        """*key* and the distributions it requires, as far as they are installed."""
+        found, todo = set(), [key]
+        while todo:
+            key = todo.pop()
+            if key in found:
+                continue
+            found.add(key)
+            dist = self.dists.get(key)
+            if dist is None or not HAS_PACKAGING:
+                continue
+            for line in dist.headers(["Requires-Dist"]).get("Requires-Dist", []):
+                try:
+                    dep = Requirement(line)
+                except InvalidRequirement:
+                    continue
+                if dep.marker and not dep.marker.evaluate({"extra": ""}):
+                    continue
+                todo.append(canonical_name(dep.name))
+        return frozenset(found)
+
+    def estimate(self, requirements: Iterable[str]) -> tuple[int, int, float]:
+        """(distributions, bytes, install seconds) of an env with *requirements*."""
+        keys = set()
+        for name in requirements:
+            keys |= self.closure(canonical_name(name))
+        size = sum(self.size_of(k) for k in keys)
+        seconds = len(keys) * SECONDS_PER_PACKAGE + size / 1e6 * SECONDS_PER_MB
+        return len(keys), size, seconds
+
+
+def default_site_dirs(opts: Options) -> list:
+    """site-packages of the target env (if it exists) and of this interpreter."""
+    from smartrun.module_index import site_packages_dirs, target_env_path
+
+    dirs = []
+    target = target_env_path(opts)
+    if target.exists():
+        dirs.extend(site_packages_dirs(target))
+    dirs.extend(site_packages_dirs(None))
+    return dirs
+
+
+# ─────────────── plan ────────────────
+@dataclass
+class PlannedEnv:
+    requirements: dict  # name -> merged specifier ("" for none)
+    scripts: list = field(default_factory=list)
+    packages: int = 0  # distributions, dependencies included
+    size: int = 0  # bytes
+    seconds: float = 0.0  # estimated install time
+
+    @property
+    def requirement_list(self) -> list[str]:
+        return requirement_list(self.requirements)
+
+
+@dataclass
+class EnvPlan:
+    envs: list = field(default_factory=list)  # list[PlannedEnv]
+    scripts: int = 0
+    baseline_size: int = 0  # one env per script
+    baseline_seconds: float = 0.0
+    errors: dict = field(default_factory=dict)  # path -> scan error
+
+    @property
+    def size(self) -> int:
+        return sum(env.size for env in self.envs)
+
+    @property
+    def seconds(self) -> float:
+        return sum(env.seconds for env in self.envs)
+
+    def to_dict(self) -> dict:
+        return {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "scripts": self.scripts,
+            "baseline": {
+                "envs": self.scripts,
+                "bytes": self.baseline_size,
+                "seconds": round(self.baseline_seconds, 1),
+            },
+            "planned": {
+                "envs": len(self.envs),
+                "bytes": self.size,
+                "seconds": round(self.seconds, 1),
+            },
+            "envs": [
+                {
+                    "requirements": env.requirement_list,
+                    "scripts": env.scripts,
+                    "packages": env.packages,
+                    "bytes": env.size,
+                    "seconds": round(env.seconds, 1),
+                }
+                for env in self.envs
+            ],
+            "errors": self.errors,
+        }
+
+
+def plan_environments(file_requirements: dict, sizes: SizeIndex) -> EnvPlan:
+    """*file_requirements*: script path -> its requirement strings."""
+    sets = {}
+    for path, packages in file_requirements.items():
+        requirements = parse_requirements(packages)
+        sets.setdefault(tuple(sorted(requirements.items())), []).append(path)
+    plan = EnvPlan(scripts=len(file_requirements))
+    for key, paths in sets.items():
+        _, size, seconds = sizes.estimate(name for name, _ in key)
+        plan.baseline_size += size * len(paths)
+        plan.baseline_seconds += seconds * len(paths)
+    # first fit, largest sets first: they constrain the merge the most
+    for key in sorted(sets, key=lambda k: (-len(k), k)):
+        requirements = dict(key)
+        for env in plan.envs:
+            merged = merge_requirements(env.requirements, requirements)
+            if merged is not None:
+                env.requirements = merged
+                env.scripts.extend(sets[key])
+                break
+        else:
+            plan.envs.append(PlannedEnv(requirements, list(sets[key])))
+    for env in plan.envs:
+        env.packages, env.size, env.seconds = sizes.estimate(env.requirements)
+    return plan
+
+
+def plan_directory(root: Union[str, Path], opts: Options, sizes: SizeIndex = None) -> EnvPlan:
+    from smartrun.batch_scan import scan_directory
+
+    batch = scan_directory(root, opts, max_workers=opts.jobs)
+    sizes = sizes or SizeIndex(default_site_dirs(opts))
+    plan = plan_environments({f.path: f.packages for f in batch.files if not f.error}, sizes)
+    plan.errors = {f.path: f.error for f in batch.errors}
+    return plan
+
+
+def build_plan(plan: EnvPlan, opts: Options, store=None) -> list:
+    """
+    Create the planned environments in the shared store; returns their paths.
+    `--shared` runs and run-many find them through EnvStore.find_superset.
+    """
+    from smartrun.env_store import EnvStore
+    from smartrun.run_many import EnvGroup, prepare_env
+
+    store = store or EnvStore()
+    groups = [EnvGroup(env.requirement_list, env.scripts) for env in plan.envs]
+    for group in groups:
+        prepare_env(group, opts, store)
+        if group.error:
+            print(f"[red]{group.error}[/red]")
+    return [group.env_path for group in groups]
+
+
+def _mb(size: int) -> str:
+    return f"{size / 1024 / 1024:,.0f} MB"
+
+
+def print_plan(plan: EnvPlan) -> None:
+    for i, env in enumerate(plan.envs, 1):
+        print(
+            f"[cyan]env {i}[/cyan]: {len(env.scripts)} scripts, {env.packages} packages, "
+            f"~{_mb(env.size)}: {' '.join(env.requirement_list) or '-'}"
+        )
+    for path, error in plan.errors.items():
+        print(f"[red]{path}[/red]: {error}")
+    print(
+        f"per-script envs: {plan.scripts} envs, ~{_mb(plan.baseline_size)}, "
+        f"~{plan.baseline_seconds:.0f}s install"
+    )
+    print(
+        f"[green]planned: {len(plan.envs)} envs, ~{_mb(plan.size)}, "
+        f"~{plan.seconds:.0f}s install[/green] — saves "
+        f"~{_mb(plan.baseline_size - plan.size)}, "
+        f"~{plan.baseline_seconds - plan.seconds:.0f}s"
+    )
+
+
+def write_plan(plan: EnvPlan, folder: Path = None) -> Path:
+    folder = Path(folder) if folder else SMART_FOLDER
+    create_dir(folder)
+    path = folder / PLAN_NAME
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(plan.to_dict(), indent=2), encoding="utf-8")
+    os.replace(tmp, path)
+    return path
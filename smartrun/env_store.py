@@ -0,0 +1,340 @@
+"""
+Content-addressed store of shared environments in ~/.smartrun_envs.
+An environment is keyed by a hash of its normalised requirement set, the
+Python version and the platform, so scripts with the same needs run in
+the same environment instead of installing it again per project. When
+the exact set is not stored, the smallest stored environment that covers
+it is used instead (`smartrun plan --build` stores merged sets).
+
+Layout of the store:
+    <root>/<key>/                   the environment
+    <root>/<key>/smartrun-env.json  manifest; written last, marks it complete
+    <root>/<key>/refs/<id>          one file per script using it
+    <root>/<key>.lock               held while building, referencing or removing
+
+The manifest is published with os.replace, so a reader either sees a
+finished environment or none; a build interrupted halfway is removed and
+redone by the next process that takes the lock.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import sys
+import sysconfig
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Iterable, Optional, Union
+
+from smartrun.dist_info import canonical_name
+from smartrun.package_name import split_package_name
+
+STORE_ENV_VAR = "SMARTRUN_ENVS"  # overrides the store root
+MANIFEST_NAME = "smartrun-env.json"
+REFS_DIR = "refs"
+KEY_LENGTH = 16
+PYTHON_TAG = f"{sys.implementation.name}-{sys.version_info[0]}.{sys.version_info[1]}"
+PLATFORM = sysconfig.get_platform()
+# a lock older than this is taken over even if its owner looks alive
+STALE_LOCK_SECONDS = 3600
+LOCK_POLL_SECONDS = 0.1
+LOCK_TIMEOUT = 1800
+
+# builder(env_path) creates an empty environment
+Builder = Callable[[Path], None]
+# install(env_path, requirements) installs into it; False (or an
+# exception) when the install failed
+Installer = Callable[[Path, list], Optional[bool]]
+
+
+class EnvLockTimeout(TimeoutError): ...
+
+
+class EnvBuildError(RuntimeError): ...
+
+
+def store_root() -> Path:
+    root = os.getenv(STORE_ENV_VAR)
+    return Path(root).expanduser() if root else Path.home() / ".smartrun_envs"
+
+
+def normalize_requirement(requirement) -> str:
+    """'Flask_SQLAlchemy >= 3' -> 'flask-sqlalchemy>=3'"""
+    name, spec = split_package_name(str(requirement))
+    return canonical_name(name) + ("".join(spec.split()) if spec else "")
+
+
+def normalize_requirements(requirements: Iterable) -> list:
+    return sorted({normalize_requirement(r) for r in requirements if str(r).strip()})
+
+
+def env_key(requirements: Iterable, python: str = PYTHON_TAG, platform: str = PLATFORM) -> str:
+    payload = "\n".join([python, platform, *normalize_requirements(requirements)])
+    return hashlib.sha256(payload.encode()).hexdigest()[:KEY_LENGTH]
+
+
+def _pid_alive(pid: int) -> bool:
+    if os.name == "nt":
+        return True  # only the age check applies
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, OSError):
+        return True
+    return True
+
+
+class EnvLock:
+    """Exclusive lock file created with O_EXCL; works across processes."""
+
+    def __init__(self, path: Path, timeout: float = LOCK_TIMEOUT):
+        self.path = Path(path)
+        self.timeout = timeout
+
+    def _stale(self) -> bool:
+        try:
+            pid = int(self.path.read_text() or 0)
+            age = time.time() - self.path.stat().st_mtime
+        except (OSError, ValueError):
+            return False  # released meanwhile, or being written
+        return age > STALE_LOCK_SECONDS or (pid > 0 and not _pid_alive(pid))
+
+    def __enter__(self) -> "EnvLock":
+        deadline = time.monotonic() + self.timeout
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        while True:
+            try:
+                fd = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                if self._stale():
+                    self.path.unlink(missing_ok=True)
+                    continue
+                if time.monotonic() > deadline:
+                    raise EnvLockTimeout(f"Timed out waiting for {self.path}")
+                time.sleep(LOCK_POLL_SECONDS)
+                continue
+            with os.fdopen(fd, "w") as f:
+                f.write(str(os.getpid()))
+            return self
+
+    def __exit__(self, *exc) -> None:
+        self.path.unlink(missing_ok=True)
+
+
+@dataclass
+class StoredEnv:
+    path: Path
+    key: str
+    requirements: list = field(default_factory=list)
+    python: str = ""
+    platform: str = ""
+    refs: list = field(default_factory=list)  # live owners
+
+
+def default_builder(env_path: Path) -> None:
+    from smartrun.runner_helpers import create_venv
+
+    create_venv(env_path)
+
+
+def _owners(owner) -> list:
+    if owner is None:
+        return []
+    if isinstance(owner, (str, Path)):
+        return [owner]
+    return list(owner)
+
+
+class EnvStore:
+    def __init__(self, root: Optional[Path] = None, builder: Builder = default_builder):
+        self.root = Path(root) if root else store_root()
+        self.builder = builder
+
+    # ─────────────── paths ────────────────
+    def path_for(self, key: str) -> Path:
+        return self.root / key
+
+    def lock_for(self, key: str) -> EnvLock:
+        return EnvLock(self.root / f"{key}.lock")
+
+    @staticmethod
+    def is_complete(env_path: Path) -> bool:
+        return (Path(env_path) / MANIFEST_NAME).is_file()
+
+    # ─────────────── lookup / create ────────────────
+    def lookup(self, requirements: Iterable) -> Optional[Path]:
+        """The stored environment for *requirements*, without locking."""
+        env_path = self.path_for(env_key(requirements))
+        return env_path if self.is_complete(env_path) else None
+
+    def find_superset(self, requirements: Iterable) -> Optional[Path]:
+        """
+        The smallest stored environment that covers *requirements*: it was
+        built for every package in them, and the installed versions satisfy
+        each specifier. None when no environment does.
+        """
+        from smartrun.module_index import site_packages_dirs
+        from smartrun.satisfaction import check_satisfied
+
+        requirements = normalize_requirements(requirements)
+        names = {split_package_name(r)[0] for r in requirements}
+        candidates = [
+            env
+            for env in self.envs()
+            if env.python == PYTHON_TAG
+            and env.platform == PLATFORM
+            and names <= {split_package_name(r)[0] for r in env.requirements}
+        ]
+        for env in sorted(candidates, key=lambda e: (len(e.requirements), e.key)):
+            if check_satisfied(requirements, site_packages_dirs(env.path)).all_satisfied:
+                return env.path
+        return None
+
+    def ensure(
+        self,
+        requirements: Iterable,
+        install: Optional[Installer] = None,
+        owner: Union[str, Path, Iterable, None] = None,
+    ) -> Path:
+        """
+        The environment for *requirements*: the stored one, else the
+        smallest stored one covering them (find_superset), else one built
+        under the lock; *owner* (a script path, or several) is
+        recorded as a reference in the same critical section, so gc cannot
+        remove the env before its users hold it. Concurrent callers with
+        the same requirements wait for one build; a failed install raises
+        EnvBuildError and leaves nothing in the store.
+        """
+        requirements = normalize_requirements(requirements)
+        key = env_key(requirements)
+        env_path = self.path_for(key)
+        owners = _owners(owner)
+        superset = None
+        if requirements and not self.is_complete(env_path):
+            superset = self.find_superset(requirements)
+        if superset is not None and self._reference(superset, owners):
+            env_path = superset
+        else:
+            with self.lock_for(key):
+                if not self.is_complete(env_path):
+                    self._build(env_path, key, requirements, install)
+                for name in owners:
+                    self._add_ref(env_path, name)
+        for name in owners:
+            self.release_others(env_path, name)
+        return env_path
+
+    def _build(self, env_path: Path, key: str, requirements: list, install) -> None:
+        if env_path.exists():
+            shutil.rmtree(env_path)  # interrupted build
+        self.builder(env_path)
+        if install is not None and requirements:
+            try:
+                ok = install(env_path, list(requirements)) is not False
+            except Exception:
+                shutil.rmtree(env_path, ignore_errors=True)
+                raise
+            if not ok:
+                shutil.rmtree(env_path, ignore_errors=True)
+                raise EnvBuildError(f"Could not install {', '.join(requirements)}")
+        manifest = {
+            "key": key,
+            "requirements": requirements,
+            "python": PYTHON_TAG,
+            "platform": PLATFORM,
+            "created": datetime.now().isoformat(),
+        }
+        tmp = env_path / f"{MANIFEST_NAME}.tmp"
+        tmp.write_text(json.dumps(manifest, indent=2))
+        os.replace(tmp, env_path / MANIFEST_NAME)
+
+    # ─────────────── reference counting ────────────────
+    @staticmethod
+    def _ref_file(env_path: Path, owner: str) -> Path:
+        owner = str(Path(owner).expanduser().resolve())
+        name = hashlib.sha1(owner.encode()).hexdigest()[:KEY_LENGTH]
+        return Path(env_path) / REFS_DIR / name
+
+    def _add_ref(self, env_path: Path, owner: str) -> None:
+        ref = self._ref_file(env_path, owner)
+        ref.parent.mkdir(exist_ok=True)
+        ref.write_text(str(Path(owner).expanduser().resolve()))
+
+    def _reference(self, env_path: Path, owners: list) -> bool:
+        """Reference an env found without the lock; False when it is gone."""
+        with self.lock_for(Path(env_path).name):
+            if not self.is_complete(env_path):
+                return False  # removed by gc meanwhile
+            for name in owners:
+                self._add_ref(env_path, name)
+        return True
+
+    def acquire(self, env_path: Path, owner: str) -> None:
+        with self.lock_for(Path(env_path).name):
+            self._add_ref(env_path, owner)
+
+    def release(self, env_path: Path, owner: str) -> None:
+        with self.lock_for(Path(env_path).name):
+            self._ref_file(env_path, owner).unlink(missing_ok=True)
+
+    def release_others(self, env_path: Path, owner: str) -> None:
+        """Drop *owner*'s references to other environments (its needs changed)."""
+        for other in self.envs():
+            if other.path != Path(env_path) and self._ref_file(other.path, owner).exists():
+                self.release(other.path, owner)
+
+    @staticmethod
+    def refs(env_path: Path) -> list:
+        """Owners that still exist; references of deleted scripts do not count."""
+        owners = []
+        for ref in sorted((Path(env_path) / REFS_DIR).glob("*")):
+            try:
+                owner = ref.read_text().strip()
+            except OSError:
+                continue
+            if Path(owner).exists():
+                owners.append(owner)
+        return owners
+
+    # ─────────────── listing / cleanup ────────────────
+    def envs(self) -> list:
+        found = []
+        if not self.root.is_dir():
+            return found
+        for env_path in sorted(self.root.iterdir()):
+            try:
+                data = json.loads((env_path / MANIFEST_NAME).read_text())
+            except (OSError, ValueError):
+                continue
+            found.append(
+                StoredEnv(
+                    env_path,
+                    data.get("key", env_path.name),
+                    data.get("requirements", []),
+                    data.get("python", ""),
+                    data.get("platform", ""),
+                    self.refs(env_path),
+                )
+            )
+        return found
+
+    def gc(self, dry_run: bool = False) -> list:
+        """Remove environments without live references; returns their paths."""
+        removed = []
+        for env in self.envs():
+            if env.refs:
+                continue
+            with self.lock_for(env.path.name):
+                # re-checked under the lock: a run may have just acquired it
+                if self.refs(env.path) or not self.is_complete(env.path):
+                    continue
+                if not dry_run:
+                    # unpublish first, so a failed rmtree leaves no "complete" env
+                    (env.path / MANIFEST_NAME).unlink()
+                    shutil.rmtree(env.path, ignore_errors=True)
+                removed.append(env.path)
+        return removed
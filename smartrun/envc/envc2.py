@@ -7,6 +7,8 @@ import sys
 from pathlib import Path
 from typing import Dict, Optional, Union
 
+from smartrun.trace import traced
+
 
 class EnvComplete:
     """
@@ -20,6 +22,7 @@ class EnvComplete:
         self.env: Optional[Dict[str, Union[bool, str, None]]] = None
 
     @staticmethod
+    @traced("EnvComplete.get", "env")
     def get() -> Dict[str, Union[bool, str, None]]:
         """
         Get information about the currently active Python environment.
@@ -0,0 +1,173 @@
+"""
+Single-pass import collector used by the scanners.
+The source is parsed once and every import statement is returned as an
+ImportInfo record, so callers never need to walk the tree themselves.
+"""
+
+import ast
+from dataclasses import dataclass
+from typing import List, Optional
+
+MODULE_SCOPE = "<module>"
+# how much the code depends on an import, strongest first
+REQUIRED = "required"
+OPTIONAL = "optional"  # inside `try:` with an ImportError handler
+TYPE_CHECKING_ONLY = "type-checking"  # under `if TYPE_CHECKING:`
+KINDS = (REQUIRED, OPTIONAL, TYPE_CHECKING_ONLY)
+IMPORT_ERRORS = {"ImportError", "ModuleNotFoundError"}
+
+
+@dataclass(frozen=True)
+class ImportInfo:
+    """One imported module as seen in the source."""
+
+    top: str  # first dotted segment: 'pandas' for 'pandas.core.frame'
+    module: str  # full dotted path ('' for `from . import x`)
+    lineno: int
+    level: int = 0  # relative import level, 0 for absolute imports
+    scope: str = MODULE_SCOPE  # enclosing function / class, dotted
+    names: tuple = ()  # names bound by `from module import a, b`
+    kind: str = REQUIRED  # REQUIRED, OPTIONAL or TYPE_CHECKING_ONLY
+
+    @property
+    def is_relative(self) -> bool:
+        return self.level > 0
+
+
+# statement lists that can hold nested statements (ExceptHandler nodes
+# keep theirs in `body` as well)
+BODY_FIELDS = ("body", "orelse", "finalbody", "handlers")
+SCOPE_NODES = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+TRY_NODES = (ast.Try, ast.TryStar) if hasattr(ast, "TryStar") else (ast.Try,)
+
+
+def strongest_kind(*kinds: Optional[str]) -> str:
+    """required beats optional beats type-checking; None is ignored"""
+    return min((k for k in kinds if k), key=KINDS.index, default=REQUIRED)
+
+
+def weakest_kind(*kinds: str) -> str:
+    return max(kinds, key=KINDS.index)
+
+
+def _names_of(node: Optional[ast.AST]) -> set[str]:
+    """'ImportError' for ImportError, builtins.ImportError and tuples of them"""
+    if node is None:
+        return set()
+    if isinstance(node, ast.Tuple):
+        return set().union(*(_names_of(elt) for elt in node.elts))
+    if isinstance(node, ast.Name):
+        return {node.id}
+    if isinstance(node, ast.Attribute):
+        return {node.attr}
+    return set()
+
+
+def catches_import_error(node: ast.AST) -> bool:
+    return any(_names_of(h.type) & IMPORT_ERRORS for h in node.handlers)
+
+
+def is_type_checking(test: ast.AST) -> bool:
+    """`TYPE_CHECKING` or `typing.TYPE_CHECKING`"""
+    return "TYPE_CHECKING" in _names_of(test)
+
+
+class ImportCollector:
+    """
+    Collect ImportInfo records while tracking the enclosing scope.
+    Imports are statements, so only statement bodies are descended into;
+    expressions are never visited, which keeps the walk far cheaper than
+    ast.walk / ast.NodeVisitor on large files.
+    """
+
+    def __init__(self):
+        self.imports: List[ImportInfo] = []
+        self._scope: List[str] = []
+        self.kind = REQUIRED
+
+    @property
+    def scope(self) -> str:
+        return ".".join(self._scope) if self._scope else MODULE_SCOPE
+
+    def visit(self, tree: ast.AST) -> None:
+        self.visit_body(getattr(tree, "body", ()))
+
+    def visit_body(self, body) -> None:
+        for node in body:
+            if isinstance(node, ast.Import):
+                self.visit_Import(node)
+            elif isinstance(node, ast.ImportFrom):
+                self.visit_ImportFrom(node)
+            elif isinstance(node, SCOPE_NODES):
+                self._scope.append(node.name)
+                self.visit_children(node)
+                self._scope.pop()
+            elif isinstance(node, TRY_NODES) and catches_import_error(node):
+                self.visit_guarded(node.body, OPTIONAL)
+                for name in ("handlers", "orelse", "finalbody"):
+                    self.visit_body(getattr(node, name))
+            elif isinstance(node, ast.If) and is_type_checking(node.test):
+                self.visit_guarded(node.body, TYPE_CHECKING_ONLY)
+                self.visit_body(node.orelse)
+            elif isinstance(node, ast.Match):  # no body of its own, only cases
+                for case in node.cases:
+                    self.visit_body(case.body)
+            elif hasattr(node, "body"):  # compound statement
+                self.visit_children(node)
+
+    def visit_guarded(self, body, kind: str) -> None:
+        outer = self.kind
+        self.kind = weakest_kind(outer, kind)
+        self.visit_body(body)
+        self.kind = outer
+
+    def visit_children(self, node) -> None:
+        for name in BODY_FIELDS:
+            children = getattr(node, name, None)
+            if children:
+                self.visit_body(children)
+
+    def visit_Import(self, node: ast.Import) -> None:
+        for alias in node.names:
+            self.imports.append(
+                ImportInfo(
+                    top=alias.name.split(".")[0],
+                    module=alias.name,
+                    lineno=node.lineno,
+                    scope=self.scope,
+                    kind=self.kind,
+                )
+            )
+
+    def visit_ImportFrom(self, node: ast.ImportFrom) -> None:
+        module = node.module or ""
+        self.imports.append(
+            ImportInfo(
+                top=module.split(".")[0],
+                module=module,
+                lineno=node.lineno,
+                level=node.level or 0,
+                scope=self.scope,
+                names=tuple(alias.name for alias in node.names),
+                kind=self.kind,
+            )
+        )
+
+
+def collect_imports(
+    content: str, tree: Optional[ast.AST] = None, filename: str = "<unknown>"
+) -> List[ImportInfo]:
+    """
+    Parse *content* once and return every import it contains.
+    Args:
+        content: Python source code
+        tree: Already parsed tree of *content* (skips ast.parse)
+        filename: Used in SyntaxError messages only
+    Returns:
+        List of ImportInfo in source order
+    """
+    if tree is None:
+        tree = ast.parse(content, filename=filename)
+    collector = ImportCollector()
+    collector.visit(tree)
+    return collector.imports
@@ -0,0 +1,251 @@
+"""
+Project import graph.
+Starting from a script, follows imports that resolve to files inside the
+project (absolute, relative and package imports) transitively and collects
+the third-party imports of every reachable module, so that they can be
+installed in one batch. Each file is parsed once; large waves of newly
+discovered files are parsed in a process pool.
+"""
+
+import os
+import stat
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Optional, Union
+
+from smartrun.import_collector import ImportInfo, collect_imports, strongest_kind
+from smartrun.module_index import get_local_module_index, is_stdlib_name
+from smartrun.resolution import ResolutionIndex, distribution_kinds, get_resolution_index
+
+# below this many new files per wave, a process pool costs more than it saves
+PARALLEL_THRESHOLD = 64
+
+
+@dataclass
+class ParsedModule:
+    path: Path
+    imports: list = field(default_factory=list)
+    requirements: list = field(default_factory=list)  # smartrun comments
+    digest: Optional[str] = None  # content hash, for the scan cache
+    error: Optional[str] = None
+
+
+def parse_module(
+    path: Union[str, Path], content: str = None, imports: list = None
+) -> ParsedModule:
+    """
+    Read and parse one file; a broken file yields an empty record.
+    *imports* skips parsing when the caller already collected them.
+    """
+    from smartrun.comments import parse_requirements
+    from smartrun.scan_cache import content_hash
+
+    path = Path(path)
+    try:
+        data = path.read_bytes() if content is None else content.encode("utf-8")
+        digest = content_hash(data)
+        content = data.decode("utf-8") if content is None else content
+        if imports is None:
+            imports = collect_imports(content, filename=str(path))
+        requirements = parse_requirements(content, is_content=True)
+    except (OSError, UnicodeDecodeError, SyntaxError, ValueError) as e:
+        return ParsedModule(path, error=str(e))
+    return ParsedModule(path, imports, requirements, digest)
+
+
+@dataclass
+class ImportGraph:
+    root: Path
+    modules: dict = field(default_factory=dict)  # Path -> ParsedModule
+    edges: dict = field(default_factory=dict)  # Path -> set[Path]
+    third_party: set = field(default_factory=set)
+    kinds: dict = field(default_factory=dict)  # third-party dist -> import kind
+    requirements: set = field(default_factory=set)
+    local_names: set = field(default_factory=set)
+
+    @property
+    def files(self) -> list[Path]:
+        return list(self.modules)
+
+    def digests(self, skip: Path = None) -> dict[str, Optional[str]]:
+        """path -> content hash of every module in the graph"""
+        return {
+            str(p): m.digest for p, m in self.modules.items() if skip is None or p != skip
+        }
+
+
+class ImportGraphBuilder:
+    """Breadth-first walk over the local modules reachable from an entry."""
+
+    def __init__(
+        self, root: Union[str, Path], max_workers: int = None, index: ResolutionIndex = None
+    ):
+        self.root = Path(root).resolve()
+        self.max_workers = max_workers
+        self._executor = None
+        self._stat_cache: dict[str, tuple[bool, bool]] = {}
+        self._absolute_cache: dict[tuple, tuple[list[Path], bool]] = {}
+        self.local_index = get_local_module_index(self.root)
+        self._resolver = index
+
+    def _stat(self, path: str) -> tuple[bool, bool]:
+        """(is_file, is_dir), one stat call per path for the whole walk"""
+        found = self._stat_cache.get(path)
+        if found is None:
+            try:
+                st = os.stat(path)
+                found = (stat.S_ISREG(st.st_mode), stat.S_ISDIR(st.st_mode))
+            except OSError:
+                found = (False, False)
+            self._stat_cache[path] = found
+        return found
+
+    def _is_file(self, path: str) -> bool:
+        return self._stat(path)[0]
+
+    def _is_dir(self, path: str) -> bool:
+        return self._stat(path)[1]
+
+    # ─────────────── module resolution ────────────────
+    def _module_files(self, base: Path, parts: list[str]) -> list[Path]:
+        """
+        Files executed when importing *parts* below *base*: every package
+        __init__.py on the way and the final module. Empty if not local.
+        """
+        files = []
+        current = base
+        for i, part in enumerate(parts):
+            current = current / part
+            last = i == len(parts) - 1
+            init = current / "__init__.py"
+            if self._is_file(str(init)):
+                files.append(init)
+                continue
+            if last and self._is_file(str(current) + ".py"):
+                files.append(Path(str(current) + ".py"))
+                return files
+            if self._is_dir(str(current)):
+                continue  # namespace package
+            if not last and self._is_file(str(current) + ".py"):
+                # `import a.b` where a.py is a module: b is an attribute
+                files.append(Path(str(current) + ".py"))
+                return files
+            return []
+        return files
+
+    def is_local_name(self, top: str) -> bool:
+        return top in self.local_index
+
+    def resolve(self, imp: ImportInfo, importer: Path) -> tuple[list[Path], bool]:
+        """Return (local files, is_local) for one import of *importer*."""
+        if imp.is_relative:
+            return self._resolve(imp, importer)
+        # absolute imports resolve the same from every importer
+        key = (imp.module, imp.names)
+        found = self._absolute_cache.get(key)
+        if found is None:
+            found = self._absolute_cache[key] = self._resolve(imp, importer)
+        return found
+
+    def _resolve(self, imp: ImportInfo, importer: Path) -> tuple[list[Path], bool]:
+        if imp.is_relative:
+            base = importer.parent
+            for _ in range(imp.level - 1):
+                base = base.parent
+            parts = imp.module.split(".") if imp.module else []
+        else:
+            if not self.is_local_name(imp.top):
+                return [], False
+            base = self.root
+            parts = imp.module.split(".")
+        files = self._module_files(base, parts) if parts else []
+        # `from pkg import sub` may import the submodule pkg/sub.py
+        pkg_dir = base.joinpath(*parts)
+        for name in imp.names:
+            if name != "*":
+                files.extend(self._module_files(pkg_dir, [name]))
+        return files, True
+
+    # ─────────────── parsing ────────────────
+    def _parse_many(self, paths: list[Path]) -> list[ParsedModule]:
+        if len(paths) < PARALLEL_THRESHOLD or self.max_workers == 1:
+            return [parse_module(p) for p in paths]
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        workers = self.max_workers or os.cpu_count() or 1
+        chunksize = max(1, len(paths) // (workers * 4))
+        return list(self._executor.map(parse_module, paths, chunksize=chunksize))
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def distributions(self, imp) -> dict[str, str]:
+        """Distributions providing a third-party import, with its kind"""
+        if self._resolver is None:
+            self._resolver = get_resolution_index()
+        return distribution_kinds([imp], self._resolver)
+
+    # ─────────────── walk ────────────────
+    def build(
+        self,
+        entry: Union[str, Path],
+        content: str = None,
+        exclude: Iterable[str] = (),
+        imports: list = None,
+    ) -> ImportGraph:
+        """
+        Walk the graph from *entry*. Pass *content* (and *imports* if they are
+        already known) when the entry's source is not the file itself
+        (notebooks). Names in *exclude* are never reported as third-party.
+        """
+        exclude = set(exclude or ())
+        entry = Path(entry).resolve()
+        graph = ImportGraph(self.root)
+        wave = [parse_module(entry, content, imports)]
+        queued = {entry}
+        try:
+            while wave:
+                next_paths = []
+                for parsed in wave:
+                    graph.modules[parsed.path] = parsed
+                    graph.requirements.update(parsed.requirements)
+                    targets = graph.edges.setdefault(parsed.path, set())
+                    for imp in parsed.imports:
+                        files, is_local = self.resolve(imp, parsed.path)
+                        if is_local:
+                            if imp.top:
+                                graph.local_names.add(imp.top)
+                        elif imp.top and not is_stdlib_name(imp.top):
+                            if imp.top not in exclude:
+                                for dist, kind in self.distributions(imp).items():
+                                    graph.third_party.add(dist)
+                                    graph.kinds[dist] = strongest_kind(
+                                        graph.kinds.get(dist), kind
+                                    )
+                        for f in files:
+                            targets.add(f)
+                            if f not in queued:
+                                queued.add(f)
+                                next_paths.append(f)
+                wave = self._parse_many(next_paths)
+        finally:
+            self.close()
+        return graph
+
+
+def build_import_graph(
+    entry: Union[str, Path],
+    content: str = None,
+    root: Union[str, Path] = None,
+    exclude: Iterable[str] = (),
+    max_workers: int = None,
+    imports: list = None,
+    index: ResolutionIndex = None,
+) -> ImportGraph:
+    """Import graph of *entry*, resolving local modules from its folder."""
+    root = Path(entry).parent if root is None else root
+    builder = ImportGraphBuilder(root, max_workers=max_workers, index=index)
+    return builder.build(entry, content=content, exclude=exclude, imports=imports)
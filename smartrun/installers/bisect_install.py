@@ -0,0 +1,70 @@
+"""
+Failure isolation for batch installs.
+When one installer call for a whole batch fails, the batch is split in
+halves and each half is installed together; only halves that fail are
+split again. k broken requirements among n are found in O(k log n)
+installer calls instead of n, and every good subset is installed as a
+batch.
+"""
+
+from dataclasses import dataclass, field
+from typing import Callable, Sequence
+
+# install(batch) -> True when the installer accepted the whole batch
+InstallFn = Callable[[list], bool]
+# what is known about a batch before it is split
+UNKNOWN = "unknown"  # not tried yet
+OBSERVED = "observed"  # tried, failed
+INFERRED = "inferred"  # not tried; fails unless its halves only conflicted
+
+
+@dataclass
+class IsolationResult:
+    installed: list = field(default_factory=list)  # requirements that went in
+    failed: list = field(default_factory=list)  # fail even when installed alone
+    attempts: int = 0  # installer calls made
+
+    @property
+    def ok(self) -> bool:
+        return not self.failed
+
+
+def isolate_failures(
+    install: InstallFn, requirements: Sequence, batch_failed: bool = False
+) -> IsolationResult:
+    """
+    Install *requirements* with as few *install* calls as possible.
+    Pass batch_failed=True when the caller already tried the whole batch.
+    """
+    result = IsolationResult()
+
+    def attempt(batch: list) -> bool:
+        result.attempts += 1
+        ok = bool(install(list(batch)))
+        if ok:
+            result.installed.extend(batch)
+        return ok
+
+    def bisect(batch: list, state: str) -> None:
+        if state == UNKNOWN and attempt(batch):
+            return
+        if len(batch) == 1:
+            # an inferred failure is confirmed before it is reported
+            if state != INFERRED or not attempt(batch):
+                result.failed.extend(batch)
+            return
+        mid = len(batch) // 2
+        left, right = batch[:mid], batch[mid:]
+        if attempt(left):
+            # the batch failed and its left half did not, so the failure is
+            # in the right half; if the halves merely conflicted, its
+            # leaves install fine and nothing is reported
+            bisect(right, INFERRED)
+            return
+        bisect(left, OBSERVED)
+        bisect(right, UNKNOWN)
+
+    requirements = list(requirements)
+    if requirements:
+        bisect(requirements, OBSERVED if batch_failed else UNKNOWN)
+    return result
@@ -4,46 +4,57 @@ Reads a JSON file containing package dependencies and installs them with exact v
 """
 
 import json
-import subprocess
 import sys
 import os
 
+from smartrun.installers.from_json_fast import install_packages_batch
 
-def check_python_version(required_version):
-    """Check if the current Python version matches the required version."""
-    current_version = (
-        f"{sys.version_info.major}.{sys.version_info.minor}.{sys.version_info.micro}"
-    )
-    if current_version != required_version:
-        print(
-            f"Warning: Required Python version is {required_version}, but current version is {current_version}"
-        )
-        response = input("Continue anyway? (y/N): ")
-        if response.lower() != "y":
-            sys.exit(1)
 
+# what to do when a lock was made with another Python; never prompts, so
+# unattended jobs cannot block (set with SMARTRUN_PYTHON_MISMATCH)
+PYTHON_MISMATCH_POLICIES = ("warn", "error", "ignore")
 
-def install(package_spec):
-    subprocess.check_call(
-        [sys.executable, "-m", "pip", "install", package_spec],
-        stdout=subprocess.DEVNULL,
-        stderr=subprocess.PIPE,
-    )
-    print(f"✓ Successfully installed {package_spec}")
 
+def python_mismatch_policy(policy=None):
+    policy = (policy or os.getenv("SMARTRUN_PYTHON_MISMATCH") or "warn").lower()
+    return policy if policy in PYTHON_MISMATCH_POLICIES else "warn"
 
-def install_package(package_name, version):
-    """Install a single package with specific version."""
-    package_spec = f"{package_name}=={version}"
-    try:
-        install(package_spec)
+
+def check_python_version(required_version, policy=None):
+    """
+    Check if the current Python version matches the required version.
+    Returns False when the install should stop: only with the "error"
+    policy and a different major.minor version.
+    """
+    current_version = (
+        f"{sys.version_info.major}.{sys.version_info.minor}.{sys.version_info.micro}"
+    )
+    policy = python_mismatch_policy(policy)
+    if current_version == required_version or policy == "ignore":
         return True
-    except subprocess.CalledProcessError as e:
-        print(f"✗ Failed to install {package_spec}: {e.stderr.decode()}")
+    print(
+        f"Warning: Required Python version is {required_version}, but current version is {current_version}"
+    )
+    same_minor = current_version.split(".")[:2] == str(required_version).split(".")[:2]
+    if policy == "error" and not same_minor:
+        print("Stopping: SMARTRUN_PYTHON_MISMATCH=error")
         return False
+    return True
 
 
-def install_dependencies_from_txt(txt_file_path):
+def install_packages(packages, wheelhouse=None, timeout=None):
+    """
+    Install {name: version} pins into this interpreter with one resolver
+    run (see from_json_fast.install_packages_batch).
+    Returns (successful, failed) counts.
+    """
+    _, successful, failed = install_packages_batch(
+        packages, python=sys.executable, wheelhouse=wheelhouse, timeout=timeout
+    )
+    return successful, failed
+
+
+def install_dependencies_from_txt(txt_file_path, wheelhouse=None, timeout=None):
     """Install dependencies from a pip freeze output text file."""
     if not os.path.exists(txt_file_path):
         print(f"Error: File '{txt_file_path}' not found.")
@@ -79,14 +90,7 @@ def install_dependencies_from_txt(txt_file_path):
         for pkg, ver in packages.items():
             print(f"  - {pkg}: {ver}")
         print("\nStarting installation...")
-        # Install each package
-        successful = 0
-        failed = 0
-        for package_name, version in packages.items():
-            if install_package(package_name, version):
-                successful += 1
-            else:
-                failed += 1
+        successful, failed = install_packages(packages, wheelhouse, timeout)
         # Summary
         print("\nInstallation complete!")
         print(f"Successfully installed: {successful}")
@@ -98,7 +102,9 @@ def install_dependencies_from_txt(txt_file_path):
         sys.exit(1)
 
 
-def install_dependencies_from_json(json_file_path):
+def install_dependencies_from_json(
+    json_file_path, python_mismatch=None, wheelhouse=None, timeout=None
+):
     """Main function to read JSON and install dependencies."""
     # Check if file exists
     if not os.path.exists(json_file_path):
@@ -109,8 +115,8 @@ def install_dependencies_from_json(json_file_path):
         with open(json_file_path, "r", encoding="utf-8") as f:
             data = json.load(f)
         # Check Python version if specified
-        if "python" in data:
-            check_python_version(data["python"])
+        if "python" in data and not check_python_version(data["python"], python_mismatch):
+            sys.exit(1)
         # Get packages to install
         packages = data.get("resolved_packages", {})
         if not packages:
@@ -120,14 +126,7 @@ def install_dependencies_from_json(json_file_path):
         for pkg, ver in packages.items():
             print(f"  - {pkg}: {ver}")
         print("\nStarting installation...")
-        # Install each package
-        successful = 0
-        failed = 0
-        for package_name, version in packages.items():
-            if install_package(package_name, version):
-                successful += 1
-            else:
-                failed += 1
+        successful, failed = install_packages(packages, wheelhouse, timeout)
         # Summary
         print("\nInstallation complete!")
         print(f"Successfully installed: {successful}")
@@ -1,51 +1,113 @@
 #!/usr/bin/env python3
 """
-Fast dependency installer using uv
+Fast dependency installer using uv (pip with parallel wheel prefetch when
+uv is not available)
 """
 import json
-import subprocess
 import sys
 import os
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
 
+from smartrun.installers.bisect_install import isolate_failures
+from smartrun.streaming import install_timeout, print_event, run_streaming
+from smartrun.utils import _ensure_pip, find_uv
+from smartrun.wheelhouse import offline_args
 
-def install_package_uv_batch(packages_dict):
-    """Install all packages at once using uv."""
+# parallel `pip download` processes when prefetching wheels without uv
+PREFETCH_WORKERS = 8
+
+
+def write_requirements(specs):
+    """Temporary requirements file for *specs*; the caller removes it."""
+    with tempfile.NamedTemporaryFile(mode="w", suffix=".txt", delete=False) as f:
+        f.write("\n".join(specs) + "\n")
+        return f.name
+
+
+def pins(packages_dict):
+    return [f"{name}=={version}" for name, version in packages_dict.items()]
+
+
+def run_install(cmd, specs, timeout=None):
+    """Run one installer command over a requirements file of *specs*."""
+    req = write_requirements(specs)
     try:
-        # Create a temporary requirements file
-        with tempfile.NamedTemporaryFile(
-            mode="w", suffix=".txt", delete=False
-        ) as temp_file:
-            for package_name, version in packages_dict.items():
-                temp_file.write(f"{package_name}=={version}\n")
-            temp_file_path = temp_file.name
-        print(f"Installing {len(packages_dict)} packages with uv...")
-        # Use uv to install all packages at once
-        result = subprocess.run(
-            ["uv", "pip", "install", "-r", temp_file_path],
-            capture_output=True,
-            text=True,
+        result = run_streaming(
+            [*cmd, "-r", req], on_event=print_event, timeout=install_timeout(timeout)
         )
-        # Clean up temp file
-        os.unlink(temp_file_path)
-        if result.returncode == 0:
-            print(f"✓ Successfully installed all {len(packages_dict)} packages!")
-            return True, len(packages_dict), 0
+    finally:
+        os.unlink(req)
+    return result.ok
+
+
+def prefetch_wheels(
+    specs, dest, python=sys.executable, max_workers=PREFETCH_WORKERS, timeout=None
+):
+    """
+    Download pinned wheels into *dest* with parallel `pip download` calls
+    (lock files are complete, so --no-deps). Returns the specs that could
+    not be fetched as wheels.
+    """
+
+    def fetch(spec):
+        cmd = [str(python), "-m", "pip", "download", "--no-deps", "-q"]
+        cmd += ["--only-binary=:all:", "-d", str(dest), spec]
+        return run_streaming(cmd, timeout=install_timeout(timeout)).ok
+
+    if not specs:
+        return []
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(specs))) as pool:
+        fetched = list(pool.map(fetch, specs))
+    return [spec for spec, ok in zip(specs, fetched) if not ok]
+
+
+def install_packages_batch(
+    packages_dict, python=None, prefetch=True, wheelhouse=None, timeout=None
+):
+    """
+    Install {name: version} pins with one resolver run: uv when available,
+    otherwise pip, after prefetching the wheels in parallel. With a
+    *wheelhouse* nothing is fetched: both install from it with --no-index.
+    A failing batch is bisected to the pins that fail on their own.
+    *timeout* applies to each installer call (see streaming.install_timeout).
+    Returns (success, successful_count, failed_count).
+    """
+    specs = pins(packages_dict)
+    if not specs:
+        return True, 0, 0
+    uv = find_uv()
+    offline = offline_args(wheelhouse)
+    with tempfile.TemporaryDirectory(prefix="smartrun-wheels-") as wheels:
+        if uv:
+            print(f"Installing {len(specs)} packages with uv...")
+            cmd = [uv, "pip", "install", *offline]
+            cmd += ["--python", str(python)] if python else []
         else:
-            print(f"✗ Failed to install packages: {result.stderr}")
-            return False, 0, len(packages_dict)
-    except FileNotFoundError:
-        print("Error: 'uv' command not found. Please install uv first:")
-        print("  curl -LsSf https://astral.sh/uv/install.sh | sh")
-        print("  # or")
-        print("  pip install uv")
-        sys.exit(1)
-    except Exception as e:
-        print(f"Error during installation: {e}")
-        return False, 0, len(packages_dict)
+            python = python or sys.executable
+            _ensure_pip(python)
+            cmd = [str(python), "-m", "pip", "install", *offline]
+            if prefetch and not offline:
+                print(f"Prefetching {len(specs)} wheels...")
+                missing = prefetch_wheels(specs, wheels, python, timeout=timeout)
+                cmd += ["--find-links", wheels]
+                print(f"Installing {len(specs)} packages with pip...")
+                # everything is local: try without the index first; a lock
+                # that misses a dependency still needs it
+                if not missing and run_install([*cmd, "--no-index"], specs, timeout):
+                    print(f"✓ Successfully installed all {len(specs)} packages!")
+                    return True, len(specs), 0
+            else:
+                print(f"Installing {len(specs)} packages with pip...")
+        result = isolate_failures(lambda batch: run_install(cmd, batch, timeout), specs)
+    for spec in result.failed:
+        print(f"✗ Failed to install {spec}")
+    if result.ok:
+        print(f"✓ Successfully installed all {len(specs)} packages!")
+    return result.ok, len(result.installed), len(result.failed)
 
 
-def install_dependencies_from_txt(txt_file_path):
+def install_dependencies_from_txt(txt_file_path, wheelhouse=None, timeout=None):
     """Install dependencies from text file using uv."""
     if not os.path.exists(txt_file_path):
         print(f"Error: File '{txt_file_path}' not found.")
@@ -53,15 +115,16 @@ def install_dependencies_from_txt(txt_file_path):
     try:
         print(f"Installing packages directly from {txt_file_path} using uv...")
         # Use uv to install directly from requirements file
-        result = subprocess.run(
-            ["uv", "pip", "install", "-r", txt_file_path],
-            capture_output=True,
-            text=True,
+        result = run_streaming(
+            [find_uv() or "uv", "pip", "install", "-r", txt_file_path]
+            + offline_args(wheelhouse),
+            on_event=print_event,
+            timeout=install_timeout(timeout),
         )
-        if result.returncode == 0:
+        if result.ok:
             print("✓ Successfully installed all packages!")
         else:
-            print(f"✗ Installation failed: {result.stderr}")
+            print(f"✗ Installation failed: {result.error_report()}")
             sys.exit(1)
     except FileNotFoundError:
         print("Error: 'uv' command not found. Please install uv first:")
@@ -72,7 +135,7 @@ def install_dependencies_from_txt(txt_file_path):
         sys.exit(1)
 
 
-def install_dependencies_from_json(json_file_path):
+def install_dependencies_from_json(json_file_path, wheelhouse=None, timeout=None):
     """Install dependencies from JSON file using uv."""
     if not os.path.exists(json_file_path):
         print(f"Error: File '{json_file_path}' not found.")
@@ -87,7 +150,9 @@ def install_dependencies_from_json(json_file_path):
         print(f"Found {len(packages)} packages to install:")
         for pkg, ver in packages.items():
             print(f"  - {pkg}: {ver}")
-        success, successful, failed = install_package_uv_batch(packages)
+        success, successful, failed = install_packages_batch(
+            packages, wheelhouse=wheelhouse, timeout=timeout
+        )
         print("\nInstallation complete!")
         print(f"Successfully installed: {successful}")
         print(f"Failed: {failed}")
@@ -13,6 +13,9 @@ from datetime import datetime
 from pathlib import Path
 import platform
 
+from smartrun.streaming import install_timeout, print_event, run_streaming
+from smartrun.wheelhouse import offline_args
+
 
 class SmartRunYAMLHandler:
     """Handle YAML-based environment configuration for smartrun."""
@@ -66,7 +69,13 @@ class SmartRunYAMLHandler:
         return yaml_data
 
     def install_from_yaml(
-        self, yaml_file_path, backend="auto", create_env=False, env_name=None
+        self,
+        yaml_file_path,
+        backend="auto",
+        create_env=False,
+        env_name=None,
+        wheelhouse=None,
+        timeout=None,
     ):
         """Install packages from YAML environment file."""
         yaml_data = self.load_yaml_environment(yaml_file_path)
@@ -84,7 +93,7 @@ class SmartRunYAMLHandler:
             if not self._create_virtual_environment(env_name, yaml_data):
                 return False
         # Install packages
-        return self._install_packages(packages, backend)
+        return self._install_packages(packages, backend, wheelhouse, timeout)
 
     def _create_yaml_structure(self, source_data, include_metadata=True):
         """Create structured YAML data from source."""
@@ -167,8 +176,8 @@ class SmartRunYAMLHandler:
             print(f"✗ Failed to create virtual environment: {e}")
             return False
 
-    def _install_packages(self, packages, backend="auto"):
-        """Install packages using specified backend."""
+    def _install_packages(self, packages, backend="auto", wheelhouse=None, timeout=None):
+        """Install packages using specified backend; offline from *wheelhouse* if given."""
         try:
             # Create temporary requirements file
             with tempfile.NamedTemporaryFile(
@@ -186,14 +195,15 @@ class SmartRunYAMLHandler:
                 cmd = ["uv", "pip", "install", "-r", temp_file_path]
             else:
                 cmd = [sys.executable, "-m", "pip", "install", "-r", temp_file_path]
-            result = subprocess.run(cmd, capture_output=True, text=True)
+            cmd += offline_args(wheelhouse)
+            result = run_streaming(cmd, on_event=print_event, timeout=install_timeout(timeout))
             # Cleanup
             os.unlink(temp_file_path)
-            if result.returncode == 0:
+            if result.ok:
                 print(f"✓ Successfully installed {len(packages)} packages!")
                 return True
             else:
-                print(f"✗ Installation failed: {result.stderr}")
+                print(f"✗ Installation failed: {result.error_report()}")
                 return False
         except Exception as e:
             print(f"Error during installation: {e}")
@@ -0,0 +1,273 @@
+"""
+Offline module classification.
+Answers "is this stdlib?" and "is this importable in the target env?"
+from static name sets, without importing anything or calling find_spec.
+The target environment does not have to be the interpreter running smartrun:
+its site-packages folders are listed directly and indexed once.
+"""
+
+import os
+import site
+import sys
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable, Optional, Union
+
+STDLIB_MODULES = frozenset(sys.stdlib_module_names) | frozenset(
+    sys.builtin_module_names
+)
+# suffixes of importable files directly inside site-packages
+MODULE_SUFFIXES = (".py", ".pyc", ".pyd", ".so")
+# site-packages entries that are metadata, not importable modules
+SKIP_SUFFIXES = (".dist-info", ".egg-info", ".data", ".pth")
+# project folders that never hold the project's own importable modules
+DEFAULT_EXCLUDE_PATTERNS = frozenset(
+    {
+        "__pycache__",
+        ".git",
+        ".venv",
+        "venv",
+        "env",
+        ".pytest_cache",
+        "node_modules",
+        ".idea",
+        ".vscode",
+    }
+)
+
+
+def top_level_name(module_name: str) -> str:
+    return str(module_name).split(".")[0]
+
+
+def is_stdlib_name(module_name: str) -> bool:
+    """True when the top-level segment of *module_name* is a stdlib module."""
+    return top_level_name(module_name) in STDLIB_MODULES
+
+
+def _module_name_of(entry: os.DirEntry) -> Optional[str]:
+    name = entry.name
+    if name.startswith(".") or name == "__pycache__" or name.endswith(SKIP_SUFFIXES):
+        return None
+    if entry.is_dir(follow_symlinks=True):
+        return name if name.isidentifier() else None
+    if name.endswith(MODULE_SUFFIXES):
+        # extension modules look like numpy_core.cpython-311-x86_64-linux-gnu.so
+        stem = name.split(".")[0]
+        return stem if stem.isidentifier() else None
+    return None
+
+
+def _pth_paths(site_dir: Path) -> list[Path]:
+    """Folders added to sys.path by plain-path lines in *.pth files."""
+    paths = []
+    for pth in site_dir.glob("*.pth"):
+        try:
+            lines = pth.read_text(encoding="utf-8").splitlines()
+        except (OSError, UnicodeDecodeError):
+            continue
+        for line in lines:
+            line = line.strip()
+            if not line or line.startswith(("#", "import ", "import\t")):
+                continue
+            p = Path(line) if Path(line).is_absolute() else site_dir / line
+            if p.is_dir():
+                paths.append(p)
+    return paths
+
+
+def _list_top_level(folder: Path) -> frozenset:
+    names = set()
+    try:
+        with os.scandir(folder) as it:
+            for entry in it:
+                name = _module_name_of(entry)
+                if name:
+                    names.add(name)
+    except OSError:
+        pass
+    return frozenset(names)
+
+
+@lru_cache(maxsize=64)
+def _scan_site_dir_cached(site_dir: str, mtime_ns: int) -> frozenset:
+    folder = Path(site_dir)
+    names = set(_list_top_level(folder))
+    for extra in _pth_paths(folder):
+        names.update(_list_top_level(extra))
+    return frozenset(names)
+
+
+def scan_site_dir(site_dir: Union[str, Path]) -> frozenset:
+    """
+    Top-level importable names inside one site-packages folder.
+    The result is cached until the folder's mtime changes, which happens
+    whenever a package is installed or removed.
+    """
+    site_dir = Path(site_dir)
+    try:
+        mtime_ns = site_dir.stat().st_mtime_ns
+    except OSError:
+        return frozenset()
+    return _scan_site_dir_cached(str(site_dir.resolve()), mtime_ns)
+
+
+# venv path (None: running interpreter) -> its site-packages folders
+_SITE_DIRS: dict[Optional[str], tuple] = {}
+
+
+def _find_site_packages_dirs(venv_path: Optional[Path]) -> list[Path]:
+    if venv_path is None:
+        dirs = list(site.getsitepackages()) if hasattr(site, "getsitepackages") else []
+        user_site = site.getusersitepackages() if site.ENABLE_USER_SITE else None
+        if user_site:
+            dirs.append(user_site)
+        return [Path(d) for d in dirs if Path(d).is_dir()]
+    candidates = list(venv_path.glob("lib/python*/site-packages"))
+    candidates += list(venv_path.glob("lib64/python*/site-packages"))
+    candidates.append(venv_path / "Lib" / "site-packages")
+    seen, dirs = set(), []
+    for d in candidates:
+        if d.is_dir() and d.resolve() not in seen:
+            seen.add(d.resolve())
+            dirs.append(d)
+    return dirs
+
+
+def site_packages_dirs(venv_path: Union[str, Path, None] = None) -> list[Path]:
+    """
+    site-packages folders of *venv_path*, or of the running interpreter
+    when *venv_path* is None. Works for POSIX (lib/pythonX.Y) and
+    Windows (Lib) layouts without starting the target interpreter.
+    The layout is looked up once per path; an env that does not exist
+    yet is looked up again on the next call.
+    """
+    key = None if venv_path is None else str(venv_path)
+    found = _SITE_DIRS.get(key)
+    if found is None:
+        found = tuple(
+            _find_site_packages_dirs(None if venv_path is None else Path(venv_path))
+        )
+        if found:
+            _SITE_DIRS[key] = found
+    return list(found)
+
+
+@dataclass(frozen=True)
+class EnvModuleIndex:
+    """Top-level module names importable from a target environment."""
+
+    names: frozenset = field(default_factory=frozenset)
+    site_dirs: tuple = ()
+
+    def __contains__(self, module_name: str) -> bool:
+        return top_level_name(module_name) in self.names
+
+    def is_installed(self, module_name: str) -> bool:
+        return module_name in self
+
+    @classmethod
+    def from_site_dirs(cls, site_dirs: Iterable[Path]) -> "EnvModuleIndex":
+        site_dirs = tuple(Path(d) for d in site_dirs)
+        names = set()
+        for d in site_dirs:
+            names.update(scan_site_dir(d))
+        return cls(frozenset(names), site_dirs)
+
+
+def get_env_module_index(venv_path: Union[str, Path, None] = None) -> EnvModuleIndex:
+    return EnvModuleIndex.from_site_dirs(site_packages_dirs(venv_path))
+
+
+def target_env_path(opts=None) -> Path:
+    """
+    The environment smartrun installs into, and so the one that is
+    scanned against, checked for satisfied requirements and locked: the
+    store env of a --shared run, else the active conda env or virtualenv,
+    else the venv named by *opts* (default .venv), which may not exist yet.
+    """
+    from smartrun.envc.envc2 import EnvComplete
+
+    venv = getattr(opts, "venv", None)
+    venv = Path(venv) if isinstance(venv, (str, Path)) else None
+    if venv is not None and getattr(opts, "use_shared_env", False):
+        return venv
+    env = EnvComplete.get()
+    if env["active"] and env["path"]:
+        return Path(env["path"])
+    return venv or Path(".venv")
+
+
+def target_site_dirs(opts=None) -> list[Path]:
+    """site-packages of the target env; [] while it does not exist"""
+    return site_packages_dirs(target_env_path(opts))
+
+
+def get_target_module_index(opts=None, site_dirs: Iterable = None) -> EnvModuleIndex:
+    """*site_dirs*: a snapshot of target_site_dirs taken earlier"""
+    if site_dirs is None:
+        site_dirs = target_site_dirs(opts)
+    return EnvModuleIndex.from_site_dirs(list(site_dirs))
+
+
+def _is_local_package_dir(folder: Path) -> bool:
+    """A package, or a folder importable as a namespace package."""
+    if (folder / "__init__.py").exists():
+        return True
+    try:
+        with os.scandir(folder) as it:
+            return any(e.name.endswith(".py") and e.is_file() for e in it)
+    except OSError:
+        return False
+
+
+@lru_cache(maxsize=64)
+def _local_names_cached(folder: str, mtime_ns: int, exclude: frozenset) -> frozenset:
+    names = set()
+    try:
+        with os.scandir(folder) as it:
+            for entry in it:
+                if entry.name.startswith(".") or entry.name in exclude:
+                    continue
+                if entry.is_file() and entry.name.endswith(".py"):
+                    stem = entry.name[:-3]
+                    if stem != "__init__":  # Usually not imported directly
+                        names.add(stem)
+                elif entry.is_dir() and _is_local_package_dir(Path(entry.path)):
+                    names.add(entry.name)
+    except PermissionError:
+        print(f"Warning: Permission denied accessing some files in {folder}")
+    return frozenset(names)
+
+
+@dataclass(frozen=True)
+class LocalModuleIndex:
+    """Top-level names importable from a project folder (the script's folder)."""
+
+    root: Path
+    names: frozenset = field(default_factory=frozenset)
+
+    def __contains__(self, module_name: str) -> bool:
+        return top_level_name(module_name) in self.names
+
+    def __iter__(self):
+        return iter(sorted(self.names))
+
+
+def get_local_module_index(
+    root: Union[str, Path], exclude_patterns: Iterable[str] = None
+) -> LocalModuleIndex:
+    """
+    Index of *root*'s own modules, built once per folder and reused until
+    files are added to or removed from it.
+    """
+    root = Path(root).resolve()
+    exclude = frozenset(
+        DEFAULT_EXCLUDE_PATTERNS if exclude_patterns is None else exclude_patterns
+    )
+    try:
+        mtime_ns = root.stat().st_mtime_ns
+    except OSError:
+        return LocalModuleIndex(root)
+    return LocalModuleIndex(root, _local_names_cached(str(root), mtime_ns, exclude))
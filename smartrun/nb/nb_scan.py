@@ -0,0 +1,237 @@
+"""
+Streaming notebook import scanner.
+Reads the `cells` array of an .ipynb file incrementally, keeps only each
+code cell's `source` and skips `outputs` (embedded images, large text
+output) without materialising them. Each cell is cleaned of IPython
+magics and parsed with the same import collector used for .py files.
+"""
+
+import json
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterator, List, Union
+
+from smartrun.import_collector import ImportInfo, collect_imports
+
+CHUNK_SIZE = 1 << 20
+_WS = re.compile(r"[ \t\n\r]*")
+_STRUCTURE = re.compile(r'[^"\[\]{}]*')
+_IMPORT_LINE = re.compile(r"^(import\s+\w|from\s+\w)")
+# cell magics whose body is still Python code
+PYTHON_CELL_MAGICS = {"time", "timeit", "capture", "prun", "debug"}
+_LINE_MAGIC = re.compile(r"^(\s*)(%|!|\w+\s*=\s*[%!])")
+
+
+class NotebookFormatError(ValueError): ...
+
+
+class _JSONStream:
+    """Just enough of a pull parser to walk a notebook without loading it."""
+
+    def __init__(self, f, chunk_size: int = CHUNK_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+
+    def _fill(self) -> bool:
+        data = self.f.read(self.chunk_size)
+        if not data:
+            return False
+        # drop what has been consumed so memory stays bounded by the chunk
+        self.buf = self.buf[self.pos :] + data
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        while True:
+            self.pos = _WS.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                raise NotebookFormatError("unexpected end of notebook")
+
+    def expect(self, ch: str) -> None:
+        if self.peek() != ch:
+            raise NotebookFormatError(f"expected {ch!r} at offset {self.pos}")
+        self.pos += 1
+
+    def value(self):
+        """Decode the next (small) value completely."""
+        self.peek()
+        decoder = json.JSONDecoder()
+        while True:
+            try:
+                obj, end = decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # a number ending at the buffer edge may continue in the next chunk
+            if end >= len(self.buf) and self._fill():
+                continue
+            self.pos = end
+            return obj
+
+    def skip_string(self) -> None:
+        # str.find runs far faster than a regex over multi-megabyte
+        # base64 outputs, so look for the closing quote directly
+        self.expect('"')
+        while True:
+            quote = self.buf.find('"', self.pos)
+            if quote < 0:
+                # keep a trailing backslash run: it may escape the next char
+                keep = len(self.buf) - len(self.buf.rstrip("\\"))
+                self.pos = max(self.pos, len(self.buf) - keep)
+                if not self._fill():
+                    raise NotebookFormatError("unterminated string")
+                continue
+            backslashes = 0
+            i = quote - 1
+            while i >= self.pos and self.buf[i] == "\\":
+                backslashes += 1
+                i -= 1
+            self.pos = quote + 1
+            if backslashes % 2 == 0:
+                return
+
+    def skip_value(self) -> None:
+        """Skip the next value without building it."""
+        ch = self.peek()
+        if ch == '"':
+            return self.skip_string()
+        if ch not in "[{":
+            return self.value()  # number, true, false, null
+        depth = 0
+        while True:
+            self.pos = _STRUCTURE.match(self.buf, self.pos).end()
+            if self.pos >= len(self.buf):
+                if not self._fill():
+                    raise NotebookFormatError("unterminated container")
+                continue
+            ch = self.buf[self.pos]
+            if ch == '"':
+                self.skip_string()
+                continue
+            self.pos += 1
+            depth += 1 if ch in "[{" else -1
+            if depth == 0:
+                return
+
+    def items(self) -> Iterator[str]:
+        """Yield the keys of an object; the caller consumes each value."""
+        self.expect("{")
+        if self.peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            self.expect(":")
+            yield key
+            ch = self.peek()
+            self.pos += 1
+            if ch == "}":
+                return
+            if ch != ",":
+                raise NotebookFormatError(f"expected ',' at offset {self.pos}")
+
+    def elements(self) -> Iterator[None]:
+        """Yield once per array element; the caller consumes each element."""
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield None
+            ch = self.peek()
+            self.pos += 1
+            if ch == "]":
+                return
+            if ch != ",":
+                raise NotebookFormatError(f"expected ',' at offset {self.pos}")
+
+
+def iter_code_cells(ipynb_path: Union[str, Path]) -> Iterator[str]:
+    """Source of every code cell, in order, read in a single streaming pass."""
+    with open(ipynb_path, "r", encoding="utf-8") as f:
+        stream = _JSONStream(f)
+        for key in stream.items():
+            if key != "cells":
+                stream.skip_value()
+                continue
+            for _ in stream.elements():
+                cell_type, source = None, None
+                for cell_key in stream.items():
+                    if cell_key == "cell_type":
+                        cell_type = stream.value()
+                    elif cell_key == "source":
+                        source = stream.value()
+                    else:
+                        stream.skip_value()
+                if cell_type == "code" and source:
+                    yield "".join(source) if isinstance(source, list) else source
+
+
+def strip_magics(source: str) -> str:
+    """
+    Make an IPython cell parseable as Python: line magics, shell escapes and
+    `x = !cmd` become `pass` (indentation kept); non-Python cell magics
+    such as %%bash drop the whole cell.
+    """
+    lines = source.splitlines()
+    if lines and lines[0].lstrip().startswith("%%"):
+        magic = lines[0].lstrip()[2:].split(maxsplit=1)
+        if not magic or magic[0] not in PYTHON_CELL_MAGICS:
+            return ""
+        lines = lines[1:]
+    cleaned = []
+    for line in lines:
+        m = _LINE_MAGIC.match(line)
+        cleaned.append(m.group(1) + "pass" if m else line)
+    return "\n".join(cleaned)
+
+
+def _fallback_imports(source: str) -> List[ImportInfo]:
+    """Line-based import detection for cells that still do not parse."""
+    lines = [
+        line.strip() for line in source.splitlines() if _IMPORT_LINE.match(line.strip())
+    ]
+    imports = []
+    for line in lines:
+        try:
+            imports.extend(collect_imports(line))
+        except SyntaxError:
+            continue
+    return imports
+
+
+@dataclass
+class NotebookImports:
+    code: str = ""  # magic-free source of all code cells
+    imports: List[ImportInfo] = field(default_factory=list)
+
+    def as_source(self) -> str:
+        """Import statements rendered back as source lines."""
+        return "\n".join(render_import(imp) for imp in self.imports)
+
+
+def render_import(imp: ImportInfo) -> str:
+    if imp.names or imp.is_relative:
+        return f"from {'.' * imp.level}{imp.module} import {', '.join(imp.names)}"
+    return f"import {imp.module}"
+
+
+def scan_notebook(ipynb_path: Union[str, Path]) -> NotebookImports:
+    result = NotebookImports()
+    cells = []
+    for source in iter_code_cells(ipynb_path):
+        code = strip_magics(source)
+        try:
+            result.imports.extend(collect_imports(code))
+        except SyntaxError:
+            result.imports.extend(_fallback_imports(code))
+            continue
+        cells.append(code)
+    result.code = "\n".join(cells)
+    return result
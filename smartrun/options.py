@@ -24,6 +24,17 @@ class Options:
     out: Path | None = None  # --out
     extra_args: tuple[str, ...] = ()
     timeout: int = 1200
+    no_cache: bool = False  # --no-cache
+    jobs: int | None = None  # -j / --jobs (smartrun scan)
+    import_policy: str = "required"  # --imports required|optional|all
+    shared: bool = False  # --shared (env from ~/.smartrun_envs)
+    build: bool = False  # --build (smartrun plan)
+    wheelhouse: str | None = None  # --wheelhouse DIR (offline installs)
+    install_timeout: float | None = None  # --install-timeout (seconds per installer call)
+    find_links: str | None = None  # prefetched wheels (set by smartrun.pipeline)
+    trace: str | None = None  # --trace FILE (Chrome trace-event JSON)
+    refresh: bool = False  # --refresh (ignore cached resolutions)
+    resolution_ttl: float | None = None  # --resolution-ttl SECONDS
 
     # -------- convenience helpers -----------------------------------------
     @property
@@ -35,6 +46,10 @@ class Options:
 
         return env_dir_for(self.script)
 
+    @property
+    def use_shared_env(self) -> bool:
+        return self.shared or os.getenv("SMARTRUN_SHARED_ENV") is not None
+
     @property
     def use_uv(self) -> bool:
         return (not self.no_uv) and (os.getenv("SMARTRUN_NO_UV") is None)
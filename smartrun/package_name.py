@@ -1,7 +1,6 @@
 import re
 from typing import Tuple, Optional
 from dataclasses import dataclass
-from smartrun.known_mappings import known_mappings
 
 
 @dataclass
@@ -23,7 +22,9 @@ class PackageName:
         self.resolve()
 
     def resolve(self):
-        self.name = known_mappings.get(self.name, self.name)
+        from smartrun.resolution import static_distribution
+
+        self.name = static_distribution(self.name)
         if self.version:
             self.name_version = self.name + self.version
         else:
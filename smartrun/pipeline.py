@@ -0,0 +1,185 @@
+"""
+Concurrent run pipeline for `smartrun script.py`.
+The stages of a run overlap instead of running one after another:
+
+    scan ───────────────┐
+    env (venv) ─────────┤
+    prefetch (wheels) ──┴─ install ─┬─ run
+                                    └─ lockfile
+
+The environment is created while the imports are scanned, wheels for the
+entry file's requirements are downloaded as soon as they are known (pip
+only; uv downloads in parallel by itself), and the lock file is written
+while the script runs. Blocking stages run on worker threads; the wall
+clock of a cold run is close to its longest stage rather than the sum.
+"""
+
+import asyncio
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Optional
+
+from rich import print
+
+from smartrun import runner
+from smartrun.module_index import target_site_dirs
+from smartrun.options import Options
+from smartrun.trace import traced
+from smartrun.utils import find_uv, is_verbose
+from smartrun.wheelhouse import wheelhouse_dir
+
+
+@dataclass
+class StageTimings:
+    started: float = field(default_factory=time.perf_counter)
+    stages: dict = field(default_factory=dict)  # name -> (start, end), seconds from start
+
+    async def run(self, name: str, fn, *args, **kwargs):
+        """fn(*args) on a worker thread, timed as stage *name*."""
+        start = time.perf_counter() - self.started
+        try:
+            # the span is taken on the worker thread, around the stage itself
+            return await asyncio.to_thread(traced(name, "stage")(fn), *args, **kwargs)
+        finally:
+            self.stages[name] = (start, time.perf_counter() - self.started)
+
+    @property
+    def wall(self) -> float:
+        return max((end for _, end in self.stages.values()), default=0.0)
+
+    @property
+    def serial(self) -> float:
+        """What the stages would have taken one after another."""
+        return sum(end - start for start, end in self.stages.values())
+
+    def summary(self) -> str:
+        parts = [f"{name} {end - start:.2f}s" for name, (start, end) in self.stages.items()]
+        return f"{' | '.join(parts)} — wall {self.wall:.2f}s (serial {self.serial:.2f}s)"
+
+
+@dataclass
+class PipelineResult:
+    packages: list
+    venv_path: Optional[Path]
+    timings: StageTimings
+    prefetched: list = field(default_factory=list)
+    completed: bool = True  # False when the user stopped at the env prompt
+
+
+def should_prefetch(opts: Options) -> bool:
+    """
+    pip only: uv fetches in parallel itself and a wheelhouse needs no
+    fetching. Shared envs are skipped too: which store env a run uses is
+    only known once the scan is complete.
+    """
+    if wheelhouse_dir(opts.wheelhouse) or opts.use_shared_env:
+        return False
+    return not opts.use_uv or find_uv() is None
+
+
+def prefetch_missing(opts: Options, packages: list, dest: Path) -> list:
+    """Download wheels for the requirements the target env lacks; returns them."""
+    from smartrun.wheelhouse import download_requirements
+
+    missing = [str(p) for p in runner.check_satisfied_in_target(opts, packages).missing]
+    if missing and download_requirements(
+        missing, dest, on_event=None, timeout=opts.install_timeout
+    ):
+        return missing
+    return []
+
+
+async def _prefetch(opts, first: asyncio.Future, dest: Path, timings: StageTimings) -> list:
+    packages = await first
+    if not packages:
+        return []
+    return await timings.run("prefetch", prefetch_missing, opts, packages, dest)
+
+
+def _resolve_once(future: asyncio.Future, value) -> None:
+    if not future.done():
+        future.set_result(value)
+
+
+async def run_pipeline(opts: Options, run: bool = True) -> PipelineResult:
+    script_path = Path(opts.script)
+    timings = StageTimings()
+    loop = asyncio.get_running_loop()
+    first_packages = loop.create_future()
+
+    def on_packages(packages):
+        # called on the scan thread
+        loop.call_soon_threadsafe(_resolve_once, first_packages, list(packages))
+
+    # the target env as it is before the env stage may start creating it:
+    # the scan must not see (or record cache stamps of) a half-built .venv
+    site_dirs = target_site_dirs(opts)
+    with tempfile.TemporaryDirectory(prefix="smartrun-prefetch-") as wheels:
+        scan = asyncio.create_task(
+            timings.run(
+                "scan", runner.scan_imports_file, script_path, opts, on_packages, site_dirs
+            )
+        )
+        env = None
+        if not opts.use_shared_env:
+            # the shared store is keyed by the requirements: it waits for the scan
+            env = asyncio.create_task(
+                timings.run("env", runner.create_venv_path_or_get_active, opts)
+            )
+        prefetch = None
+        if should_prefetch(opts):
+            prefetch = asyncio.create_task(_prefetch(opts, first_packages, Path(wheels), timings))
+        try:
+            packages = [str(x) for x in await scan]
+        except BaseException:
+            # the other stages finish before the scan error propagates
+            _resolve_once(first_packages, [])
+            await asyncio.gather(*filter(None, (env, prefetch)), return_exceptions=True)
+            raise
+        _resolve_once(first_packages, [])
+        print(f"[green]Resolved packages:[/green] {', '.join(packages)}")
+        if opts.use_shared_env:
+            venv_path = await timings.run("env", runner.use_shared_env, opts, packages)
+            env_ok = True
+        else:
+            venv_path = await env
+            env_ok = runner.confirm_env(opts, venv_path)
+        prefetched = await prefetch if prefetch is not None else []
+        if not env_ok:
+            return PipelineResult(packages, venv_path, timings, prefetched, completed=False)
+        # a copy: the caller's opts never point at the temporary wheel folder
+        install_opts = replace(opts, find_links=wheels) if prefetched else opts
+        await timings.run("install", runner.install_packages_smart, install_opts, packages)
+    lock = (runner.write_lockfile, str(script_path), venv_path)
+    if run:
+        print("[blue]▶ Running your script...[/blue]")
+        # the env is final once installed: the lock is read while the script runs
+        await asyncio.gather(
+            timings.run("run", runner.run_script_in_venv, opts, venv_path),
+            timings.run("lockfile", *lock),
+        )
+    else:
+        await timings.run("lockfile", *lock)
+    if opts.verbose or is_verbose():
+        print(f"[dim]{timings.summary()}[/dim]")
+    return PipelineResult(packages, venv_path, timings, prefetched)
+
+
+def run_pipeline_sync(opts: Options, run: bool = True) -> PipelineResult:
+    """run_pipeline from synchronous code, also when a loop is already running (Jupyter)."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(run_pipeline(opts, run))
+    result = {}
+
+    def target():
+        result["value"] = asyncio.run(run_pipeline(opts, run))
+
+    thread = threading.Thread(target=target)
+    thread.start()
+    thread.join()
+    return result.get("value")
@@ -0,0 +1,203 @@
+"""
+Import name -> distribution name resolution.
+Sources, in order:
+  1. known_mappings            hand-maintained overrides
+  2. the target environment    distributions installed there, read from
+                               their dist-info (top_level.txt / RECORD)
+  3. data/import_names.txt     offline table bundled with smartrun,
+                               loaded on first use
+Dotted imports are matched on their longest known prefix, so
+`google.cloud.storage` resolves to google-cloud-storage rather than to
+whatever owns `google`.
+"""
+
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable, Optional, Union
+
+from smartrun.dist_info import iter_dists
+from smartrun.import_collector import strongest_kind
+from smartrun.known_mappings import known_mappings
+
+BUNDLED_MAPPINGS = Path(__file__).parent / "data" / "import_names.txt"
+# deepest dotted prefix looked up for namespace packages
+MAX_PREFIX_DEPTH = 4
+
+
+@lru_cache(maxsize=1)
+def bundled_mappings() -> dict[str, str]:
+    mapping = {}
+    try:
+        text = BUNDLED_MAPPINGS.read_text(encoding="utf-8")
+    except OSError:
+        return mapping
+    for line in text.splitlines():
+        parts = line.split()
+        if len(parts) == 2 and not line.startswith("#"):
+            mapping[parts[0]] = parts[1]
+    return mapping
+
+
+def _prefixes(module_name: str) -> list[str]:
+    """'a.b.c' -> ['a.b.c', 'a.b', 'a'] (longest first, depth limited)"""
+    parts = module_name.split(".")[:MAX_PREFIX_DEPTH]
+    return [".".join(parts[:i]) for i in range(len(parts), 0, -1)]
+
+
+def _module_prefixes_of_file(path: str) -> list[str]:
+    """Dotted package prefixes a RECORD path lives under: a/b/c.py -> a.b, a.b.c"""
+    parts = path.replace("\\", "/").split("/")
+    if not parts[-1].endswith((".py", ".so", ".pyd")):
+        return []
+    parts[-1] = parts[-1].split(".", 1)[0]
+    if parts[-1] == "__init__":
+        parts = parts[:-1]
+    parts = parts[:MAX_PREFIX_DEPTH]
+    if not all(p.isidentifier() for p in parts):
+        return []
+    return [".".join(parts[:i]) for i in range(2, len(parts) + 1)]
+
+
+class EnvDistributionIndex:
+    """
+    Which installed distribution provides an import, for one environment.
+    Built from dist-info folders only; namespace tops shared by several
+    distributions (google, azure, ...) are split further using RECORD.
+    """
+
+    def __init__(self, site_dirs: Iterable[Union[str, Path]] = ()):
+        self.site_dirs = tuple(Path(d) for d in site_dirs)
+        self._owners: Optional[dict[str, set]] = None
+        self._deep: dict[str, Optional[str]] = {}
+        self._dists_by_top: dict[str, list] = {}
+
+    def _build(self) -> None:
+        self._owners = {}
+        for site_dir in self.site_dirs:
+            for dist in iter_dists(site_dir):
+                for top in dist.top_level():
+                    self._owners.setdefault(top, set()).add(dist.name)
+                    self._dists_by_top.setdefault(top, []).append(dist)
+
+    def _deep_owner(self, prefix: str) -> Optional[str]:
+        if prefix not in self._deep:
+            top = prefix.split(".")[0]
+            owners = set()
+            for dist in self._dists_by_top.get(top, []):
+                for path in dist.record_paths():
+                    if prefix in _module_prefixes_of_file(path):
+                        owners.add(dist.name)
+                        break
+            self._deep[prefix] = owners.pop() if len(owners) == 1 else None
+        return self._deep[prefix]
+
+    def lookup(self, module_name: str) -> Optional[str]:
+        if self._owners is None:
+            self._build()
+        top = module_name.split(".")[0]
+        owners = self._owners.get(top)
+        if not owners:
+            return None
+        if len(owners) == 1:
+            return next(iter(owners))
+        for prefix in _prefixes(module_name)[:-1]:
+            owner = self._deep_owner(prefix)
+            if owner:
+                return owner
+        return None
+
+
+class ResolutionIndex:
+    def __init__(self, env: EnvDistributionIndex = None):
+        self.env = env if env is not None else EnvDistributionIndex()
+
+    def lookup(self, name: str) -> Optional[str]:
+        """Distribution for exactly *name*, or None when no source knows it."""
+        if name in known_mappings:
+            return known_mappings[name]
+        found = self.env.lookup(name) if "." not in name else None
+        if found:
+            return found
+        return bundled_mappings().get(name)
+
+    def resolve_import(self, module_name: str) -> str:
+        """
+        Distribution to install for an imported module: the longest dotted
+        prefix any source knows, else the top-level name.
+        """
+        top = module_name.split(".")[0]
+        if top in known_mappings:
+            return known_mappings[top]
+        found = self.env.lookup(module_name)
+        if found:
+            return found
+        bundled = bundled_mappings()
+        for prefix in _prefixes(module_name):
+            if prefix in bundled:
+                return bundled[prefix]
+        return top
+
+    def resolve_name(self, name: str) -> str:
+        """Map a requirement name that may be an import name; else keep it."""
+        return self.lookup(name) or name
+
+
+def import_candidates(imp) -> list[str]:
+    """
+    Dotted paths an ImportInfo may need: `from google.cloud import storage`
+    gives google.cloud.storage, `import a.b` gives a.b.
+    """
+    if not imp.names or imp.names == ("*",):
+        return [imp.module]
+    return [f"{imp.module}.{name}" for name in imp.names if name != "*"]
+
+
+def distribution_kinds(imports: Iterable, index: "ResolutionIndex" = None) -> dict:
+    """
+    Distribution name -> how it is imported (required / optional /
+    type-checking), in first-seen order. A distribution imported several
+    ways keeps the strongest kind.
+    """
+    index = index or get_resolution_index()
+    found = {}
+    for imp in imports:
+        for candidate in import_candidates(imp):
+            dist = index.resolve_import(candidate)
+            found[dist] = strongest_kind(found.get(dist), imp.kind)
+    return found
+
+
+def distributions_for(imports: Iterable, index: "ResolutionIndex" = None) -> list[str]:
+    """Distribution names for ImportInfo records, deduplicated, in order."""
+    return list(distribution_kinds(imports, index))
+
+
+@lru_cache(maxsize=16)
+def _index_for(site_dirs: tuple, stamps: tuple) -> ResolutionIndex:
+    return ResolutionIndex(EnvDistributionIndex(site_dirs))
+
+
+def get_resolution_index(opts=None, site_dirs: Iterable = None) -> ResolutionIndex:
+    """
+    Index for the environment smartrun installs into (see target_env_path),
+    or for *site_dirs*, a snapshot of its site-packages taken earlier.
+    """
+    from smartrun.module_index import target_site_dirs
+
+    site_dirs = tuple(target_site_dirs(opts) if site_dirs is None else site_dirs)
+    stamps = []
+    for d in site_dirs:
+        try:
+            stamps.append(d.stat().st_mtime_ns)
+        except OSError:
+            stamps.append(None)
+    return _index_for(site_dirs, tuple(stamps))
+
+
+def static_distribution(name: str) -> str:
+    """
+    known_mappings and the bundled table only: no environment is read, so
+    this is cheap enough for every PackageName. Scans resolve through a
+    ResolutionIndex built once for the target environment.
+    """
+    return known_mappings.get(name) or bundled_mappings().get(name, name)
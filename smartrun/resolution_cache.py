@@ -0,0 +1,182 @@
+"""
+On-disk cache of resolved pin sets under .smartrun/resolution_cache.
+An entry is addressed by the sorted requirements, the target Python
+version, the platform tag and the index configuration. It stores the full
+set of pins the installer resolved them to, read back from the installed
+metadata (Requires-Dist closure). A later run with the same key installs
+those pins with --no-deps and no resolver run; --refresh or an entry older
+than the TTL resolves again.
+"""
+
+import json
+import os
+import sys
+import sysconfig
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Optional, Union
+
+from smartrun.dist_info import canonical_name, iter_dists
+from smartrun.options import Options
+from smartrun.scan_cache import content_hash
+from smartrun.utils import SMART_FOLDER, create_dir, is_verbose
+
+try:
+    from packaging.requirements import InvalidRequirement, Requirement
+
+    HAS_PACKAGING = True
+except ImportError:
+    HAS_PACKAGING = False
+
+CACHE_FOLDER = SMART_FOLDER / "resolution_cache"
+TTL_ENV_VAR = "SMARTRUN_RESOLUTION_TTL"  # seconds
+DEFAULT_TTL = 7 * 24 * 3600
+# settings that change what the resolver can see
+INDEX_ENV_VARS = (
+    "PIP_INDEX_URL",
+    "PIP_EXTRA_INDEX_URL",
+    "PIP_FIND_LINKS",
+    "PIP_NO_INDEX",
+    "UV_INDEX",
+    "UV_INDEX_URL",
+    "UV_DEFAULT_INDEX",
+    "UV_EXTRA_INDEX_URL",
+    "UV_FIND_LINKS",
+    "UV_NO_INDEX",
+)
+# requirement features whose closure cannot be read back reliably
+UNCACHEABLE = ("@", "://", ";")
+
+
+def resolution_ttl(opts: Options) -> float:
+    if opts.resolution_ttl is not None:
+        return float(opts.resolution_ttl)
+    try:
+        return float(os.getenv(TTL_ENV_VAR) or DEFAULT_TTL)
+    except ValueError:
+        return DEFAULT_TTL
+
+
+def index_config(opts: Options) -> str:
+    parts = [f"{name}={os.environ[name]}" for name in INDEX_ENV_VARS if os.getenv(name)]
+    if opts.wheelhouse:
+        parts.append(f"wheelhouse={Path(opts.wheelhouse).resolve()}")
+    return "\n".join(parts)
+
+
+def env_python_tag(env_path: Optional[Path]) -> str:
+    """major.minor of the env's interpreter (pyvenv.cfg), else of this one."""
+    try:
+        for line in (Path(env_path) / "pyvenv.cfg").read_text().splitlines():
+            key, _, value = line.partition("=")
+            if key.strip() in ("version_info", "version"):
+                return ".".join(value.strip().split(".")[:2])
+    except (OSError, TypeError):
+        pass
+    return f"{sys.version_info[0]}.{sys.version_info[1]}"
+
+
+def is_cacheable(packages: Iterable) -> bool:
+    return HAS_PACKAGING and not any(
+        c in str(p) for p in packages for c in UNCACHEABLE
+    )
+
+
+def requirement_closure(
+    packages: Iterable, site_dirs: Iterable[Union[str, Path]]
+) -> Optional[dict[str, str]]:
+    """
+    {name: version} of *packages* and everything they require, as
+    installed in *site_dirs*; None when part of it is not installed.
+    """
+    if not HAS_PACKAGING:
+        return None
+    dists = {}
+    for site_dir in site_dirs:
+        for dist in iter_dists(site_dir):
+            dists.setdefault(dist.key, dist)
+    pins, seen = {}, set()
+    try:
+        todo = [Requirement(str(p)) for p in packages]
+        while todo:
+            req = todo.pop()
+            key = (canonical_name(req.name), frozenset(req.extras))
+            if key in seen:
+                continue
+            seen.add(key)
+            dist = dists.get(key[0])
+            if dist is None:
+                return None
+            pins[dist.name] = dist.version
+            for line in dist.headers(["Requires-Dist"]).get("Requires-Dist", []):
+                dep = Requirement(line)
+                extras = req.extras or {""}
+                if dep.marker and not any(dep.marker.evaluate({"extra": e}) for e in extras):
+                    continue
+                todo.append(dep)
+    except InvalidRequirement:
+        return None
+    return dict(sorted(pins.items(), key=lambda kv: canonical_name(kv[0])))
+
+
+@dataclass
+class ResolutionEntry:
+    key: str
+    requirements: list
+    pins: dict = field(default_factory=dict)  # name -> version
+    created: float = 0.0
+    python: str = ""
+    platform: str = ""
+
+
+class ResolutionCache:
+    """Resolved pins for one requirement set in one target environment"""
+
+    def __init__(self, packages: Iterable, opts: Options, env_path=None, folder=None):
+        from smartrun.env_store import normalize_requirements
+
+        self.opts = opts
+        self.folder = Path(folder) if folder else CACHE_FOLDER
+        self.requirements = normalize_requirements(packages)
+        self.python = env_python_tag(env_path)
+        self.platform = sysconfig.get_platform()
+        self.key = content_hash(
+            "\0".join(
+                [*self.requirements, self.python, self.platform, index_config(opts)]
+            )
+        )
+
+    @property
+    def entry_path(self) -> Path:
+        return self.folder / f"{self.key}.json"
+
+    def load(self, now: float = None) -> Optional[ResolutionEntry]:
+        """Cached pins, or None when missing, expired or --refresh was given"""
+        if self.opts.refresh:
+            return None
+        try:
+            with open(self.entry_path, "r", encoding="utf-8") as f:
+                entry = ResolutionEntry(**json.load(f))
+        except (OSError, ValueError, TypeError):
+            return None
+        age = (now or time.time()) - entry.created
+        if entry.key != self.key or not entry.pins or age > resolution_ttl(self.opts):
+            return None
+        if is_verbose():
+            print(f"resolution cache hit: {len(entry.pins)} pins")
+        return entry
+
+    def store(self, pins: dict) -> None:
+        entry = ResolutionEntry(
+            self.key, self.requirements, dict(pins), time.time(), self.python, self.platform
+        )
+        try:
+            create_dir(self.folder)
+            tmp = self.entry_path.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(entry.__dict__, f, indent=1)
+            os.replace(tmp, self.entry_path)
+        except OSError as e:
+            if is_verbose():
+                print(f"resolution cache not written: {e}")
@@ -0,0 +1,285 @@
+"""
+`smartrun run-many a.py b.py nb.ipynb ...`: run a batch of scripts.
+Every file is scanned first (in a process pool, see batch_scan). Files
+with compatible requirement sets share one environment from the shared
+store (env_store), and each environment is prepared once. The scripts
+then run as child processes, at most --jobs at a time. Each script's
+output is captured and printed as one block when it finishes. A summary
+of exit codes and timings follows, and is also written to
+.smartrun/run_many.json. Lockfiles are named by script path, so scripts
+with the same name in different folders keep their own.
+"""
+
+import glob
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field, replace
+from pathlib import Path
+from typing import Iterable, Optional, Union
+
+from rich import print
+from rich.markup import escape
+
+from smartrun.batch_scan import SCAN_SUFFIXES, FileScan, iter_scan_targets, scan_paths
+from smartrun.env_store import EnvStore, normalize_requirements
+from smartrun.options import Options
+from smartrun.utils import SMART_FOLDER, create_dir, get_bin_path, write_lockfile
+
+REPORT_NAME = "run_many.json"
+NOTEBOOK_FOLDER = SMART_FOLDER / "run_many"  # executed notebooks
+# what a notebook needs in its environment to be executed there
+NOTEBOOK_REQUIREMENTS = ("nbconvert", "ipykernel")
+
+
+@dataclass
+class ScriptRun:
+    path: str
+    env: Optional[str] = None
+    returncode: Optional[int] = None
+    seconds: float = 0.0
+    output: str = ""
+    error: Optional[str] = None  # scan, env or timeout failure
+
+    @property
+    def ok(self) -> bool:
+        return self.returncode == 0 and self.error is None
+
+
+@dataclass
+class EnvGroup:
+    requirements: list
+    scripts: list = field(default_factory=list)  # paths
+    env_path: Optional[Path] = None
+    error: Optional[str] = None
+
+
+@dataclass
+class RunManyResult:
+    runs: list = field(default_factory=list)  # list[ScriptRun], in input order
+    groups: list = field(default_factory=list)  # list[EnvGroup]
+    phases: dict = field(default_factory=dict)  # phase -> seconds
+
+    @property
+    def ok(self) -> bool:
+        return all(r.ok for r in self.runs)
+
+    @property
+    def failed(self) -> list:
+        return [r for r in self.runs if not r.ok]
+
+    def to_dict(self) -> dict:
+        return {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "phases": {k: round(v, 3) for k, v in self.phases.items()},
+            "groups": [
+                {
+                    "env": str(g.env_path) if g.env_path else None,
+                    "requirements": g.requirements,
+                    "scripts": g.scripts,
+                    "error": g.error,
+                }
+                for g in self.groups
+            ],
+            "runs": [
+                {k: v for k, v in asdict(r).items() if k != "output"} for r in self.runs
+            ],
+        }
+
+
+def _read_file_list(path: Path) -> list:
+    lines = path.read_text(encoding="utf-8").splitlines()
+    return [line.strip() for line in lines if line.strip() and not line.startswith("#")]
+
+
+def expand_targets(args: Iterable[str]) -> list[Path]:
+    """
+    Scripts named by *args*: paths, directories, glob patterns and file
+    lists (@list or a .txt file, one path or pattern per line).
+    """
+    found = []
+    for arg in args:
+        arg = str(arg)
+        if arg.startswith("@") or arg.endswith(".txt"):
+            found.extend(expand_targets(_read_file_list(Path(arg.lstrip("@")))))
+        elif glob.has_magic(arg):
+            found.extend(Path(p) for p in sorted(glob.glob(arg, recursive=True)))
+        elif Path(arg).is_dir():
+            found.extend(iter_scan_targets(arg))
+        else:
+            found.append(Path(arg))
+    unique = {}
+    for path in found:
+        if path.suffix in SCAN_SUFFIXES or not path.exists():
+            unique.setdefault(os.path.normpath(path), path)
+    return list(unique.values())
+
+
+def script_requirements(scan: FileScan) -> frozenset:
+    requirements = list(scan.packages)
+    if scan.path.endswith(".ipynb"):
+        requirements.extend(NOTEBOOK_REQUIREMENTS)
+    return frozenset(normalize_requirements(requirements))
+
+
+def group_by_requirements(scans: list) -> list[EnvGroup]:
+    """
+    One group per distinct requirement set; a set contained in a larger
+    one joins that group instead of getting its own environment.
+    """
+    sets = {}
+    for scan in scans:
+        if not scan.error:
+            sets.setdefault(script_requirements(scan), []).append(scan.path)
+    groups, keys = [], []
+    for key in sorted(sets, key=lambda s: (-len(s), sorted(s))):
+        for group, group_key in zip(groups, keys):
+            if key <= group_key:
+                group.scripts.extend(sets[key])
+                break
+        else:
+            groups.append(EnvGroup(sorted(key), list(sets[key])))
+            keys.append(key)
+    return groups
+
+
+def prepare_env(group: EnvGroup, opts: Options, store: EnvStore) -> EnvGroup:
+    from smartrun.runner import install_packages_smart, install_succeeded
+
+    def install(env_path: Path, requirements: list) -> bool:
+        # shared: the store env is the target even when conda is active
+        env_opts = replace(opts, venv=str(env_path), shared=True)
+        return install_succeeded(install_packages_smart(env_opts, requirements))
+
+    try:
+        # the scripts are referenced under the build lock: gc cannot take the env
+        group.env_path = store.ensure(group.requirements, install, owner=group.scripts)
+    except Exception as e:
+        group.error = f"{type(e).__name__}: {e}"
+    return group
+
+
+def script_command(path: Union[str, Path], env_path: Path) -> list:
+    python = str(get_bin_path(env_path, "python"))
+    if str(path).endswith(".ipynb"):
+        return [
+            python,
+            "-m",
+            "nbconvert",
+            "--to",
+            "notebook",
+            "--execute",
+            "--output-dir",
+            str(NOTEBOOK_FOLDER),
+            str(path),
+        ]
+    return [python, str(path)]
+
+
+def run_one(path: str, env_path: Path, timeout: Optional[float] = None) -> ScriptRun:
+    """Run *path* with the env's python; output is captured, not streamed."""
+    run = ScriptRun(path, str(env_path))
+    start = time.perf_counter()
+    try:
+        process = subprocess.run(
+            script_command(path, env_path),
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            errors="replace",
+            timeout=timeout,
+        )
+        run.returncode = process.returncode
+        run.output = process.stdout
+    except subprocess.TimeoutExpired as e:
+        output = e.output or ""
+        run.output = output.decode(errors="replace") if isinstance(output, bytes) else output
+        run.error = f"timed out after {timeout}s"
+    except OSError as e:
+        run.error = f"{type(e).__name__}: {e}"
+    run.seconds = time.perf_counter() - start
+    return run
+
+
+def print_run(run: ScriptRun) -> None:
+    status = f"exit {run.returncode}" if run.error is None else run.error
+    color = "green" if run.ok else "red"
+    print(f"[bold {color}]── {escape(run.path)}[/bold {color}] ({status}, {run.seconds:.2f}s)")
+    if run.output:
+        sys.stdout.write(run.output if run.output.endswith("\n") else run.output + "\n")
+        sys.stdout.flush()
+
+
+def print_summary(result: RunManyResult) -> None:
+    for run in result.runs:
+        mark = "[green]ok  [/green]" if run.ok else "[red]FAIL[/red]"
+        code = "-" if run.returncode is None else run.returncode
+        print(f"{mark} {run.seconds:7.2f}s  exit {code:>3}  {escape(run.path)}")
+    phases = " | ".join(f"{name} {seconds:.2f}s" for name, seconds in result.phases.items())
+    print(
+        f"[green]{len(result.runs) - len(result.failed)}/{len(result.runs)} succeeded[/green] "
+        f"in {len(result.groups)} environments — {phases}"
+    )
+
+
+def write_report(result: RunManyResult, folder: Path = None) -> Path:
+    folder = Path(folder) if folder else SMART_FOLDER
+    create_dir(folder)
+    path = folder / REPORT_NAME
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(result.to_dict(), indent=2), encoding="utf-8")
+    os.replace(tmp, path)
+    return path
+
+
+def run_many(
+    targets: list, opts: Options, jobs: int = None, store: EnvStore = None
+) -> RunManyResult:
+    jobs = jobs or os.cpu_count() or 1
+    store = store or EnvStore()
+    result = RunManyResult()
+    runs = {str(p): ScriptRun(str(p)) for p in targets}
+
+    start = time.perf_counter()
+    scans = scan_paths([Path(p) for p in targets], opts, max_workers=jobs)
+    for scan in scans:
+        if scan.error:
+            runs[scan.path].error = scan.error
+    result.groups = group_by_requirements(scans)
+    result.phases["scan"] = time.perf_counter() - start
+    print(
+        f"[green]{len(scans)} files[/green] scanned, "
+        f"{len(result.groups)} environments to prepare"
+    )
+
+    start = time.perf_counter()
+    # different groups are different store keys: they build in parallel
+    with ThreadPoolExecutor(max_workers=min(jobs, len(result.groups) or 1)) as pool:
+        list(pool.map(lambda g: prepare_env(g, opts, store), result.groups))
+    result.phases["envs"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        futures = {}
+        for group in result.groups:
+            for script in group.scripts:
+                if group.error:
+                    runs[script].error = group.error
+                    continue
+                futures[pool.submit(run_one, script, group.env_path, opts.timeout)] = group
+        for future in as_completed(futures):
+            run = future.result()
+            runs[run.path] = run
+            print_run(run)
+            # one batch can hold a/main.py and b/main.py: name locks by path
+            write_lockfile(run.path, futures[future].env_path, by_path=True)
+    result.phases["run"] = time.perf_counter() - start
+
+    result.runs = list(runs.values())
+    print_summary(result)
+    print(f"report: {write_report(result)}")
+    return result
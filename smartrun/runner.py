@@ -11,31 +11,129 @@ from smartrun.nb.nb_run import NBOptions, run_and_save_notebook, convert
 from smartrun.envc.envc2 import EnvComplete
 from smartrun.runner_helpers import create_venv_path_or_get_active, check_env_before
 from smartrun.subprocess_ import SubprocessSmart
-from smartrun.utils import SMART_FOLDER, is_verbose
+from smartrun.satisfaction import check_satisfied_in_target
+from smartrun.installers.bisect_install import IsolationResult, isolate_failures
+from smartrun.utils import SMART_FOLDER, find_uv, is_verbose
+from smartrun.wheelhouse import install_source_args
+from smartrun.trace import span, traced
 
 
-def install_packages_smart_w_pip(opts: Options, packages: list, verbose=False):
+def install_packages_smart_w_pip(
+    opts: Options, packages: list, verbose=False
+) -> IsolationResult:
     verbose = is_verbose(verbose) or opts.verbose
     process = SubprocessSmart(opts)
-    result = process.run(["-m", "pip", "install", *packages], verbose=verbose)
-    if result:
-        return
-    for package in packages:
-        result = process.run(["-m", "pip", "install", package], verbose=verbose)
+    # environments are created without pip; seed it now that it is needed
+    _ensure_pip(process.python_path)
+    offline = install_source_args(opts)
+
+    def pip_install(batch: list) -> bool:
+        return process.run(["-m", "pip", "install", *offline, *batch], verbose=verbose)
+
+    # one pip call for the batch; a failed batch is split in halves rather
+    # than retried one package per pip process
+    result = isolate_failures(pip_install, packages)
+    report_isolation(result)
+    return result
+
+
+def report_isolation(result: IsolationResult) -> None:
+    if result.failed:
+        print(
+            f"[bold red]Could not install:[/bold red] {', '.join(map(str, result.failed))}"
+        )
+    if is_verbose():
+        print(f"Installed: {', '.join(map(str, result.installed))}")
+        print(f"{result.attempts} installer calls")
 
 
+@traced("install_packages_smart", "install")
 def install_packages_smart(opts: Options, packages: list, verbose=False):
     verbose = is_verbose(verbose) or opts.verbose
-    packages = [str(x) for x in packages]
+    # read the target env's dist-info first: a warm run starts no installer
+    check = check_satisfied_in_target(opts, packages)
+    if check.all_satisfied:
+        if packages:
+            print(f"[green]Requirements already satisfied[/green] ({len(packages)})")
+        return
+    if verbose and check.satisfied:
+        print("Already satisfied:", ", ".join(map(str, check.satisfied)))
+    requirements = [str(x) for x in packages]
+    packages = [str(x) for x in check.missing]
+    # the same requirement set was resolved before: install its pins as they are
+    cache = resolution_cache_for(opts, requirements)
+    entry = cache.load() if cache else None
+    if entry is not None:
+        if install_pins(opts, entry.pins, verbose=verbose):
+            return
+        print("[yellow]Cached resolution did not install, resolving again[/yellow]")
+    result = install_resolving(opts, packages, verbose=verbose)
+    if cache and getattr(result, "ok", result):
+        remember_resolution(opts, cache, requirements)
+    return None if result is True else result
+
+
+def install_succeeded(result) -> bool:
+    """Whether an install_packages_smart result means everything went in"""
+    return result is None or bool(getattr(result, "ok", result))
+
+
+def install_resolving(opts: Options, packages: list, verbose=False):
+    """uv, else pip; True when uv installed everything, else the pip IsolationResult"""
+    offline = install_source_args(opts)
     process = SubprocessSmart(opts)
     if opts.no_uv:
         return install_packages_smart_w_pip(opts, packages, verbose=verbose)
-    result = process.run(["-m", "uv", "pip", "install", *packages], verbose=verbose)
+    uv = find_uv()
+    if uv:
+        # the uv binary installs into the target by path; it needs no pip there
+        cmd = [uv, "pip", "install", "--python", process.python_path, *offline, *packages]
+        result = process.run_command(cmd, verbose=verbose)
+    else:
+        cmd = ["-m", "uv", "pip", "install", *offline, *packages]
+        result = process.run(cmd, verbose=verbose)
     if result:
-        return
+        return True
     return install_packages_smart_w_pip(opts, packages, verbose=verbose)
 
 
+def resolution_cache_for(opts: Options, requirements: list):
+    from smartrun.module_index import target_env_path
+    from smartrun.resolution_cache import ResolutionCache, is_cacheable
+
+    if not is_cacheable(requirements):
+        return None
+    return ResolutionCache(requirements, opts, env_path=target_env_path(opts))
+
+
+def remember_resolution(opts: Options, cache, requirements: list) -> None:
+    """Store the pins the installer resolved *requirements* to"""
+    from smartrun.module_index import site_packages_dirs, target_env_path
+    from smartrun.resolution_cache import requirement_closure
+
+    pins = requirement_closure(requirements, site_packages_dirs(target_env_path(opts)))
+    if pins:
+        cache.store(pins)
+
+
+def install_pins(opts: Options, pins: dict, verbose=False) -> bool:
+    """Install a complete pin set with --no-deps: no resolver run"""
+    specs = [f"{name}=={version}" for name, version in pins.items()]
+    missing = [str(p) for p in check_satisfied_in_target(opts, specs).missing]
+    if not missing:
+        return True
+    print(f"[green]Installing {len(missing)} cached pins[/green]")
+    source = install_source_args(opts)
+    process = SubprocessSmart(opts)
+    uv = None if opts.no_uv else find_uv()
+    if uv:
+        cmd = [uv, "pip", "install", "--python", process.python_path, "--no-deps"]
+        return bool(process.run_command([*cmd, *source, *missing], verbose=verbose))
+    _ensure_pip(process.python_path)
+    cmd = ["-m", "pip", "install", "--no-deps", *source, *missing]
+    return bool(process.run(cmd, verbose=verbose))
+
+
 def install_packages_smartrun_smartfiles(
     opts: Options, packages: tuple = tuple(), verbose=False
 ):
@@ -71,13 +169,14 @@ def install_packages_smartrun_smartfiles(
 def run_notebook_in_venv(opts: Options):
     script_path = Path(opts.script)
     nb_opts = NBOptions(script_path)
-    if opts.html:
-        return convert(nb_opts, opts)
-    return run_and_save_notebook(nb_opts, opts)
+    with span("script", "run", script=script_path):
+        if opts.html:
+            return convert(nb_opts, opts)
+        return run_and_save_notebook(nb_opts, opts)
 
 
-def run_script_in_venv(opts: Options):
-    venv_path = create_venv_path_or_get_active(opts)
+def run_script_in_venv(opts: Options, venv_path: Path = None):
+    venv_path = venv_path or create_venv_path_or_get_active(opts)
     script_path = Path(opts.script)
     if script_path.suffix == ".ipynb":
         return run_notebook_in_venv(opts)
@@ -87,7 +186,8 @@ def run_script_in_venv(opts: Options):
             f"[bold red]ERROR: Python executable not found in venv: {python_path}[/bold red]"
         )
         return
-    subprocess.run([str(python_path), script_path])
+    with span("script", "run", script=script_path):
+        subprocess.run([str(python_path), script_path])
 
 
 def check_script_file(script_path: Path):
@@ -100,38 +200,53 @@ def check_script_file(script_path: Path):
     return True
 
 
+def use_shared_env(opts: Options, packages: list) -> Path:
+    """
+    Point *opts* at the store environment for *packages*, building it once
+    per requirement set (see env_store.EnvStore).
+    """
+    from smartrun.env_store import EnvBuildError, EnvStore
+
+    def install(env_path: Path, requirements: list) -> bool:
+        opts.venv = str(env_path)
+        return install_succeeded(install_packages_smart(opts, requirements))
+
+    try:
+        env_path = EnvStore().ensure(packages, install, owner=str(opts.script))
+    except EnvBuildError as e:
+        print(f"[bold red]Shared environment not created:[/bold red] {e}")
+        raise SystemExit(1)
+    opts.venv = str(env_path)
+    opts.venv_path = env_path
+    print(f"[green]Shared environment:[/green] {env_path}")
+    return env_path
+
+
+def confirm_env(opts: Options, venv_path: Path) -> bool:
+    """False when no environment is active and the user does not want to go on."""
+    if check_env_before(opts, venv_path):
+        return True
+    from smartrun.utils import get_input, in_ci
+
+    # In CI environments, automatically proceed without prompting
+    if in_ci():
+        print("[yellow]WARNING: No environment active, continuing in CI mode[/yellow]")
+        return True
+    msg = """It looks like environment is not active.
+              If you want to continue with python base environment or if any environment is active type yes"""
+    print(msg)
+    ans = get_input("")
+    return str(ans).lower() in {"yes", "y"}
+
+
 def run_script(opts: Options, run: bool = True):
+    """
+    Scan, prepare the environment, install, run and lock; the stages overlap
+    where they can (see smartrun.pipeline).
+    """
     script_path = Path(opts.script)
     if not check_script_file(script_path):
         return
-    packages = scan_imports_file(script_path, opts=opts)
-    packages = [str(x) for x in packages]
-    print(f"[green]Detected imports:[/green] {', '.join(packages)}")
-    print(f"[green]Resolved packages:[/green] {', '.join(packages)}")
-    # ============================= Create envir ==================
-    venv_path = create_venv_path_or_get_active(opts)
-    # ============================= Check envir  ==================
-    env_check = check_env_before(opts)
-    if not env_check:
-        from smartrun.utils import get_input, in_ci
-
-        # In CI environments, automatically proceed without prompting
-        if in_ci():
-            print("[yellow]WARNING: No environment active, continuing in CI mode[/yellow]")
-        else:
-            msg = """It looks like environment is not active.
-              If you want to continue with python base environment or if any environment is active type yes"""
-            print(msg)
-            ans = get_input("")
-            if not str(ans).lower() in {"yes", "y"}:
-                return
-    # Some environment is active now
-    # ============================= Install Packages ==================
-    # install_packages(venv_path, packages)
-    install_packages_smart(opts, packages)
-    # ============================= Run Script ==================
-    if run:
-        print("[blue]▶ Running your script...[/blue]")
-        run_script_in_venv(opts)
-    # ============================= Lock File ==================
-    write_lockfile(str(script_path), venv_path)
+    from smartrun.pipeline import run_pipeline_sync
+
+    return run_pipeline_sync(opts, run=run)
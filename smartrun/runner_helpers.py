@@ -1,4 +1,5 @@
 import os
+import sys
 import venv
 import subprocess
 from pathlib import Path
@@ -6,7 +7,7 @@ from rich import print
 import shutil
 
 # smartrun
-from smartrun.utils import get_bin_path, is_verbose
+from smartrun.utils import find_uv, is_verbose
 from smartrun.options import Options
 from smartrun.envc.envc2 import EnvComplete
 
@@ -46,9 +47,9 @@ def get_activate_cmd(venv_path: Path) -> str:
     return activate_cmd
 
 
-def check_env_before(opts: Options) -> bool:
+def check_env_before(opts: Options, venv_path: Path = None) -> bool:
     # ============================= Check Environment ==================
-    venv_path = create_venv_path_or_get_active(opts)
+    venv_path = venv_path or create_venv_path_or_get_active(opts)
     _ = check_env_active(opts)
     other_active = check_some_other_active(opts)
     any_active = is_any_env_active(opts)
@@ -99,33 +100,31 @@ def is_any_env_active(opts: Options) -> bool:
     return env.is_any_env_active()
 
 
-def create_venv(venv_path: Path) -> None:
+def create_venv_uv(venv_path: Path) -> bool:
+    """`uv venv` for this interpreter; no pip is seeded."""
+    uv = find_uv()
+    if uv is None:
+        return False
+    cmd = [uv, "venv", "--quiet", "--python", sys.executable, str(venv_path)]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0 and is_verbose():
+        print(f"[yellow]uv venv failed, using venv:[/yellow] {result.stderr.strip()}")
+    return result.returncode == 0
+
+
+def create_venv(venv_path: Path, use_uv: bool = None, with_pip: bool = False) -> None:
+    """
+    Create *venv_path* with `uv venv` when uv is available, else with the
+    venv module. pip is not installed up front (ensurepip takes seconds);
+    utils._ensure_pip seeds it when the pip fallback is actually used.
+    """
     print(f"[bold yellow]Creating virtual environment at:[/bold yellow] {venv_path}")
-    builder = venv.EnvBuilder(with_pip=True)
+    if use_uv is None:
+        use_uv = os.getenv("SMARTRUN_NO_UV") is None
+    if use_uv and not with_pip and create_venv_uv(venv_path):
+        return
+    builder = venv.EnvBuilder(with_pip=with_pip)
     builder.create(venv_path)
-    return
-    python_path = get_bin_path(venv_path, "python")
-    pip_path = get_bin_path(venv_path, "pip")
-    # 💥 If pip doesn't exist, fix it manually
-    if not pip_path.exists():
-        print("[red]WARNING: pip not found! Trying to fix using ensurepip...[/red]")
-        subprocess.run([str(python_path), "-m", "ensurepip", "--upgrade"], check=True)
-        subprocess.run(
-            [
-                str(python_path),
-                "-m",
-                "pip",
-                "install",
-                "--upgrade",
-                "pip",
-                "setuptools",
-            ],
-            check=True,
-        )
-        if not pip_path.exists():
-            raise RuntimeError(
-                "❌ Failed to install pip inside the virtual environment."
-            )
 
 
 def create_venv_path_pure(opts: Options) -> Path:
@@ -133,7 +132,7 @@ def create_venv_path_pure(opts: Options) -> Path:
     venv_path = Path(venv)
     opts.venv_path = venv_path
     if not venv_path.exists():
-        create_venv(venv_path)
+        create_venv(venv_path, use_uv=opts.use_uv)
     return venv_path
 
 
@@ -0,0 +1,81 @@
+"""
+In-process "already satisfied" check.
+Compares requirements against the *.dist-info metadata of the environment
+smartrun installs into, so a warm run can skip the installer subprocess
+entirely. Anything the check cannot decide (extras, markers, URLs, an
+unparsable specifier) counts as missing and goes to the installer.
+"""
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Optional, Union
+
+from smartrun.dist_info import canonical_name, iter_dists
+from smartrun.package_name import PackageName
+
+try:
+    from packaging.specifiers import InvalidSpecifier, SpecifierSet
+    from packaging.version import InvalidVersion, Version
+
+    HAS_PACKAGING = True
+except ImportError:
+    HAS_PACKAGING = False
+
+# requirement features only the installer can judge
+UNDECIDABLE = ("[", ";", "@", "://")
+
+
+def installed_versions(site_dirs: Iterable[Union[str, Path]]) -> dict[str, str]:
+    """canonical name -> version; the first site dir wins, as on sys.path"""
+    versions = {}
+    for site_dir in site_dirs:
+        for dist in iter_dists(site_dir):
+            versions.setdefault(dist.key, dist.version)
+    return versions
+
+
+def version_satisfies(version: str, spec: Optional[str]) -> bool:
+    if not spec:
+        return True
+    if HAS_PACKAGING:
+        try:
+            return SpecifierSet(spec).contains(Version(version), prereleases=True)
+        except (InvalidSpecifier, InvalidVersion):
+            return False
+    # without packaging only plain pins can be decided
+    spec = spec.strip()
+    if spec.startswith("==") and not any(c in spec for c in ",*"):
+        return version == spec[2:].strip()
+    return False
+
+
+@dataclass
+class Satisfaction:
+    satisfied: list = field(default_factory=list)  # PackageName
+    missing: list = field(default_factory=list)  # PackageName
+
+    @property
+    def all_satisfied(self) -> bool:
+        return not self.missing
+
+
+def check_satisfied(packages: Iterable, site_dirs: Iterable[Union[str, Path]]) -> Satisfaction:
+    versions = installed_versions(site_dirs)
+    result = Satisfaction()
+    for p in packages:
+        p = p if isinstance(p, PackageName) else PackageName(str(p))
+        version = versions.get(canonical_name(p.name))
+        ok = (
+            version is not None
+            and not any(c in p.name_version for c in UNDECIDABLE)
+            and version_satisfies(version, p.version)
+        )
+        (result.satisfied if ok else result.missing).append(p)
+    return result
+
+
+def check_satisfied_in_target(opts, packages: Iterable) -> Satisfaction:
+    """check_satisfied against the env that SubprocessSmart installs into"""
+    from smartrun.module_index import site_packages_dirs, target_env_path
+
+    return check_satisfied(packages, site_packages_dirs(target_env_path(opts)))
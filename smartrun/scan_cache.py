@@ -0,0 +1,158 @@
+"""
+On-disk cache of scan results under .smartrun/scan_cache.
+An entry is addressed by the script's content hash, the smartrun and
+interpreter versions, the scan options and the path of the script
+folder. It stores the resolved package list together with everything the
+scan depended on: the content hashes of the local source files it read,
+a digest of the local module names in the script folder (a module added
+or removed there changes what is local) and the mtimes of the target
+site-packages (installed-module conflicts). The folder's mtime itself is
+not stamped: the .venv, lock files and .smartrun state a run writes next
+to the script do not invalidate the entry.
+An entry whose dependencies changed is ignored and rewritten.
+"""
+
+import hashlib
+import json
+import os
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional, Union
+
+from smartrun.options import Options
+from smartrun.utils import SMART_FOLDER, create_dir, is_verbose
+
+CACHE_FOLDER = SMART_FOLDER / "scan_cache"
+
+
+def content_hash(data: Union[bytes, str]) -> str:
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def file_hash(path: Union[str, Path]) -> Optional[str]:
+    try:
+        return content_hash(Path(path).read_bytes())
+    except OSError:
+        return None
+
+
+def _mtime_ns(path: Union[str, Path]) -> Optional[int]:
+    try:
+        return Path(path).stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+def _smartrun_version() -> str:
+    from smartrun import __version__
+
+    return __version__
+
+
+def dependency_stamps(opts: Options, site_dirs: list = None) -> dict[str, Optional[int]]:
+    """mtimes that change when packages are installed into or removed from the target"""
+    from smartrun.module_index import target_site_dirs
+
+    site_dirs = target_site_dirs(opts) if site_dirs is None else site_dirs
+    return {str(Path(p).resolve()): _mtime_ns(p) for p in site_dirs}
+
+
+def local_modules_digest(folder: Union[str, Path]) -> str:
+    """changes when a local module or package is added to or removed from *folder*"""
+    from smartrun.module_index import get_local_module_index
+
+    return content_hash("\0".join(get_local_module_index(folder)))
+
+
+@dataclass
+class ScanCacheEntry:
+    key: str
+    packages: list[str]
+    children: dict = field(default_factory=dict)  # path -> content hash
+    stamps: dict = field(default_factory=dict)  # path -> mtime_ns
+    skipped: dict = field(default_factory=dict)  # dist -> import kind not installed
+    local_modules: str = ""  # local_modules_digest of the script folder
+
+    def is_fresh(self, stamps: dict, local_modules: str) -> bool:
+        if stamps != self.stamps or local_modules != self.local_modules:
+            return False
+        return all(file_hash(p) == h for p, h in self.children.items())
+
+
+class ScanCache:
+    """Read and write scan results for one script"""
+
+    def __init__(
+        self, file_path: Union[str, Path], opts: Options, folder=None, site_dirs: list = None
+    ):
+        self.file_path = Path(file_path)
+        self.opts = opts
+        self.site_dirs = site_dirs  # target site-packages, as snapshotted by the caller
+        self.folder = Path(folder) if folder else CACHE_FOLDER
+        self.data = self.file_path.read_bytes()
+        self.key = self.make_key()
+        self._stamps = None
+        self._local_modules = None
+
+    def make_key(self) -> str:
+        parts = [
+            content_hash(self.data),
+            _smartrun_version(),
+            sys.version,
+            str(self.file_path.parent.resolve()),
+            str(self.opts.exc or ""),
+            str(self.opts.inc or ""),
+            str(self.opts.import_policy),
+        ]
+        return content_hash("\0".join(parts))
+
+    @property
+    def entry_path(self) -> Path:
+        return self.folder / f"{self.key}.json"
+
+    @property
+    def stamps(self) -> dict:
+        if self._stamps is None:
+            self._stamps = dependency_stamps(self.opts, self.site_dirs)
+        return self._stamps
+
+    @property
+    def local_modules(self) -> str:
+        if self._local_modules is None:
+            self._local_modules = local_modules_digest(self.file_path.parent)
+        return self._local_modules
+
+    def load(self) -> Optional[ScanCacheEntry]:
+        """Cached scan result, or None when missing or stale"""
+        try:
+            with open(self.entry_path, "r", encoding="utf-8") as f:
+                entry = ScanCacheEntry(**json.load(f))
+        except (OSError, ValueError, TypeError):
+            return None
+        if entry.key != self.key or not entry.is_fresh(self.stamps, self.local_modules):
+            return None
+        if is_verbose():
+            print(f"scan cache hit: {self.file_path}")
+        return entry
+
+    def store(self, packages: list, children: dict = None, skipped: dict = None) -> None:
+        entry = ScanCacheEntry(
+            key=self.key,
+            packages=[str(x) for x in packages],
+            children={str(Path(p).resolve()): h for p, h in (children or {}).items()},
+            stamps=self.stamps,
+            skipped=dict(skipped or {}),
+            local_modules=self.local_modules,
+        )
+        try:
+            create_dir(self.folder)
+            tmp = self.entry_path.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(entry.__dict__, f)
+            os.replace(tmp, self.entry_path)
+        except OSError as e:
+            if is_verbose():
+                print(f"scan cache not written: {e}")
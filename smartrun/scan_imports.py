@@ -1,15 +1,39 @@
-import ast
 from rich import print
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
-from smartrun.utils import is_stdlib, extract_imports_from_ipynb
-from smartrun.known_mappings import known_mappings
+from smartrun.import_collector import (
+    KINDS,
+    OPTIONAL,
+    REQUIRED,
+    TYPE_CHECKING_ONLY,
+    ImportInfo,
+    collect_imports,
+)
+from smartrun.import_graph import ImportGraph, build_import_graph
+from smartrun.utils import is_stdlib
+from smartrun.nb.nb_scan import scan_notebook
+from smartrun.resolution import ResolutionIndex, distribution_kinds, get_resolution_index
 from smartrun.options import Options
+from smartrun.trace import span
 from smartrun.utils import SMART_FOLDER, create_dir, get_problematic_module_names
+from smartrun.module_index import (
+    LocalModuleIndex,
+    get_local_module_index,
+    get_target_module_index,
+    target_site_dirs,
+)
 from typing import Iterable
 
 PackageSet = set[str]
-from .package_name import PackageName
+from .package_name import PackageName, split_package_name
+
+# --imports policy -> import kinds that get installed
+IMPORT_POLICIES = {
+    "required": (REQUIRED,),
+    "optional": (REQUIRED, OPTIONAL),
+    "all": KINDS,
+}
+DEFAULT_IMPORT_POLICY = "required"
 
 
 @dataclass
@@ -19,9 +43,35 @@ class Scan:
     inc: str = None
     path: str = None
     packages: set = None
+    imports: list = None
+    children: dict = None  # child file path -> content hash
+    policy: str = DEFAULT_IMPORT_POLICY
+    skipped: dict = None  # dist -> import kind the policy leaves out
+    index: ResolutionIndex = None  # import -> distribution, for the target env
+
+    def collect(self) -> list[ImportInfo]:
+        """Parse the content once and cache the import records"""
+        if self.imports is None:
+            self.imports = collect_imports(self.content)
+        return self.imports
+
+    def top_level_names(self) -> PackageSet:
+        """Absolute imports only; `from . import x` never names a package"""
+        return {imp.top for imp in self.collect() if imp.top and not imp.is_relative}
+
+    def local_names(self) -> LocalModuleIndex:
+        """The project's own modules, next to the scanned file"""
+        if self.path is None:
+            return LocalModuleIndex(Path("."))
+        return get_local_module_index(self.path)
+
+    def resolution_index(self) -> ResolutionIndex:
+        if self.index is None:
+            self.index = get_resolution_index()
+        return self.index
 
     @staticmethod
-    def resolve(packages: PackageSet) -> list[PackageName]:
+    def resolve(packages: PackageSet, index: ResolutionIndex = None) -> list[PackageName]:
         def create_package_name(s: str):
             if s is None:
                 return None
@@ -29,11 +79,13 @@ class Scan:
                 return None
             if isinstance(s, PackageName):
                 return s
+            if index is not None:
+                name, version = split_package_name(s.strip())
+                return PackageName(index.resolve_name(name) + (version or ""))
             return PackageName(s.strip())
 
-        return [create_package_name(x) for x in packages if create_package_name(x)]
-        # packages = [x.strip() for x in packages if x.strip()]
-        # return [known_mappings.get(imp, imp) for imp in packages]
+        resolved = [create_package_name(x) for x in packages]
+        return list(dict.fromkeys(p for p in resolved if p))
 
     def read(self, file_name: Path):
         if not file_name.exists() or file_name.is_dir():
@@ -47,14 +99,19 @@ class Scan:
             self.path = Path(".")
         if not self.exc:
             return tuple()
+        from smartrun.scan_cache import file_hash
+
+        self.children = self.children or {}
         ps = list()
         for f in self.exc:
             file_name = Path(self.path) / (f + ".py")
             content = self.read(file_name)
-            s: Scan = Scan(content)  # , exc=self.exc)
+            self.children[str(file_name)] = file_hash(file_name)
+            s: Scan = Scan(content, policy=self.policy, index=self.index)
             packages_comments = s.get_from_comments()
             ps.extend(packages_comments)
             ps.extend(s())
+            self.skipped.update(s.skipped)
         return set(ps)
 
     def get_from_comments(self):
@@ -76,15 +133,7 @@ class Scan:
         return [x.strip() for x in s]
 
     def correct_exc(self, exc: list) -> list:
-        tree = ast.parse(self.content)
-        some_packages = set()
-        for node in ast.walk(tree):
-            if isinstance(node, ast.Import):
-                for alias in node.names:
-                    some_packages.add(alias.name.split(".")[0])
-            elif isinstance(node, ast.ImportFrom):
-                if node.module:
-                    some_packages.add(node.module.split(".")[0])
+        some_packages = self.top_level_names()
         correct_exc = set()
         for item in exc:
             if item in some_packages:
@@ -95,22 +144,45 @@ class Scan:
         self.exc: list[str] = self.str_to_list(self.exc)
         self.exc = self.correct_exc(self.exc)
         self.inc: list[str] = self.str_to_list(self.inc)
-        tree = ast.parse(self.content)
-        self.packages = set()
-        for node in ast.walk(tree):
-            if isinstance(node, ast.Import):
-                for alias in node.names:
-                    self.add(alias.name.split(".")[0])
-            elif isinstance(node, ast.ImportFrom):
-                if node.module:
-                    self.add(node.module.split(".")[0])
-        packages: list[str] = [imp for imp in self.packages if not is_stdlib(imp)]
+        local = self.local_names()
+        third_party = [
+            imp
+            for imp in self.collect()
+            if imp.top
+            and not imp.is_relative
+            and imp.top not in self.exc
+            and not is_stdlib(imp.top)
+            and imp.top not in local
+        ]
+        # import names -> distributions (google.cloud.storage -> google-cloud-storage)
+        kinds = distribution_kinds(third_party, self.resolution_index())
+        allowed = IMPORT_POLICIES[self.policy]
+        self.packages = {dist for dist, kind in kinds.items() if kind in allowed}
+        self.skipped = {dist: kind for dist, kind in kinds.items() if kind not in allowed}
+        packages: list[str] = list(self.packages)
         ps: list[str] = self.add_from_children()
         comments_packages = self.get_from_comments()
         packages: PackageSet = set(
             list(ps) + list(packages) + list(self.inc) + list(comments_packages)
         )
-        return self.resolve(packages)
+        resolved = self.resolve(packages, self.index)
+        self.skipped = drop_installed(self.skipped, resolved)
+        return resolved
+
+
+def drop_installed(skipped: dict, packages: list) -> dict:
+    """Skipped entries that are not installed anyway for another reason"""
+    names = {p.name for p in packages}
+    return {d: k for d, k in skipped.items() if PackageName(d).name not in names}
+
+
+@dataclass
+class FileRequirements:
+    """Scan result of one script or notebook"""
+
+    packages: list  # PackageName, to install
+    skipped: dict = field(default_factory=dict)  # dist -> kind left out by policy
+    cached: bool = False
 
 
 def compile_requirements(packages, file_name, opts) -> None:
@@ -135,11 +207,22 @@ def create_requirements_file(file_name, content):
         print(f"{file_name} was created!")
 
 
-def create_core_requirements(packages: list, opts: Options):
+SKIPPED_HEADERS = {
+    OPTIONAL: "# optional imports (guarded by ImportError), install with --imports optional",
+    TYPE_CHECKING_ONLY: "# imports used under TYPE_CHECKING only, install with --imports all",
+}
+
+
+def create_core_requirements(packages: list, opts: Options, skipped: dict = None):
     packages = [str(x) for x in packages]
     file_name = "packages.in"
     logo = [f"# packages that are retrieved from files {opts.script}"]
-    content = "\n".join(logo + packages)
+    lines = logo + packages
+    for kind, header in SKIPPED_HEADERS.items():
+        names = sorted(d for d, k in (skipped or {}).items() if k == kind)
+        if names:
+            lines += ["", header] + [f"# {name}" for name in names]
+    content = "\n".join(lines)
     create_requirements_file(file_name, content)
     # compile_requirements(packages, file_name, opts)
 
@@ -152,10 +235,51 @@ def create_extra_requirements(packages: list, opts: Options):
     create_requirements_file(file_name, content)
 
 
-def scan_imports_file(file_path: str, opts: Options) -> PackageSet:
+def scan_imports_file(
+    file_path: str, opts: Options, on_packages=None, site_dirs: list = None
+) -> PackageSet:
+    with span("scan_imports_file", "scan", file=file_path):
+        result = scan_file_packages(
+            file_path, opts, on_packages=on_packages, site_dirs=site_dirs
+        )
+        # Create requirements file
+        create_core_requirements(result.packages, opts, result.skipped)
+    return result.packages
+
+
+def scan_file_packages(
+    file_path: str,
+    opts: Options,
+    graph_workers: int = None,
+    on_packages=None,
+    site_dirs: list = None,
+) -> FileRequirements:
+    """
+    Requirements of one script or notebook under opts.import_policy.
+    Nothing is written to .smartrun except the scan cache entry.
+    on_packages(packages) is called with the entry file's own requirements
+    as soon as they are known, before local modules are followed.
+    *site_dirs* is the target env's site-packages as the caller saw them
+    (target_site_dirs); pass it when the env may change during the scan.
+    """
+    from smartrun.scan_cache import ScanCache
+
     file_path = Path(file_path)
+    if site_dirs is None:
+        site_dirs = target_site_dirs(opts)
+    cache = None if opts.no_cache else ScanCache(file_path, opts, site_dirs=site_dirs)
+    cached = cache.load() if cache else None
+    if cached is not None:
+        packages = Scan.resolve(cached.packages)
+        if on_packages is not None:
+            on_packages(packages)
+        return FileRequirements(packages, cached.skipped, True)
+    # one distribution index per scan, for the env opts point at
+    index = get_resolution_index(opts, site_dirs)
     # Get problematic module names and build exclusion list
-    problematic_modules = get_problematic_module_names(opts)
+    problematic_modules = get_problematic_module_names(
+        file_path, env_index=get_target_module_index(opts, site_dirs)
+    )
     problematic_names = (
         [module["name"] for module in problematic_modules]
         if problematic_modules
@@ -168,20 +292,69 @@ def scan_imports_file(file_path: str, opts: Options) -> PackageSet:
     exclusions.extend(problematic_names)
     except_these = ",".join(exclusions) if exclusions else ""
     # Scan based on file type
+    s = make_scan(
+        file_path, exc=except_these, inc=opts.inc, policy=opts.import_policy, index=index
+    )
+    packages = s()
+    if on_packages is not None:
+        on_packages(packages)
+    # the entry is already parsed; the graph only reads the modules it imports
+    graph = build_import_graph(
+        file_path,
+        content=s.content,
+        imports=s.imports,
+        exclude=exclusions,
+        max_workers=graph_workers,
+        index=index,
+    )
+    allowed = IMPORT_POLICIES[opts.import_policy]
+    packages = merge_graph_packages(packages, graph, allowed, index)
+    skipped = dict(s.skipped)
+    for dist, kind in graph.kinds.items():
+        if kind not in allowed:
+            skipped.setdefault(dist, kind)
+    skipped = drop_installed(skipped, packages)
+    if cache:
+        children = dict(s.children or {})
+        children.update(graph.digests(skip=file_path.resolve()))
+        cache.store(packages, children, skipped)
+    return FileRequirements(packages, skipped)
+
+
+def merge_graph_packages(
+    packages: list,
+    graph: ImportGraph,
+    allowed: tuple = (REQUIRED,),
+    index: ResolutionIndex = None,
+) -> list[PackageName]:
+    """Drop names that are project modules, add what local modules import"""
+    local = {p.name for p in Scan.resolve(graph.local_names, index)}
+    packages = [p for p in packages if p.name not in local]
+    third_party = {dist for dist, kind in graph.kinds.items() if kind in allowed}
+    extra = Scan.resolve(third_party | graph.requirements, index)
+    return list(dict.fromkeys(packages + extra))
+
+
+def make_scan(
+    file_path: str, exc=None, inc=None, policy=DEFAULT_IMPORT_POLICY, index=None
+) -> Scan:
+    file_path = Path(file_path)
     if file_path.suffix == ".ipynb":
-        packages = scan_imports_notebook(file_path, exc=except_these, inc=opts.inc)
-    else:
-        with open(file_path, "r", encoding="utf-8") as f:
-            s = Scan(f.read(), exc=except_these, path=file_path.parent, inc=opts.inc)
-            packages = s()
-    # Create requirements file
-    create_core_requirements(packages, opts)
-    return packages
+        nb = scan_notebook(file_path)
+        return Scan(
+            nb.code,
+            exc=exc,
+            path=file_path.parent,
+            inc=inc,
+            imports=nb.imports,
+            policy=policy,
+            index=index,
+        )
+    with open(file_path, "r", encoding="utf-8") as f:
+        content = f.read()
+    return Scan(content, exc=exc, path=file_path.parent, inc=inc, policy=policy, index=index)
 
 
 def scan_imports_notebook(file_path: str, exc=None, path=None, inc=None) -> PackageSet:
-    file_path = Path(file_path)
-    path = file_path.parent
-    content = extract_imports_from_ipynb(file_path)
-    s = Scan(content, exc=exc, path=path, inc=inc)
+    s = make_scan(file_path, exc=exc, inc=inc)
     return s()
@@ -0,0 +1,234 @@
+"""
+Streaming subprocess runner for uv / pip.
+Output is read line by line while the installer runs instead of being
+buffered with capture_output: lines are parsed into progress events as
+they arrive, only the last few hundred are kept (for error reports), and
+the child can be stopped on a timeout, a cancel event or Ctrl-C.
+"""
+
+import os
+import queue
+import re
+import subprocess
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+from smartrun.trace import span
+
+TAIL_LINES = 200  # lines kept per stream for error reports
+EVENT_LIMIT = 500  # progress events kept per run, the latest
+KILL_GRACE_SECONDS = 5  # between terminate() and kill()
+POLL_SECONDS = 0.1
+INSTALL_TIMEOUT_ENV_VAR = "SMARTRUN_INSTALL_TIMEOUT"
+
+# event kinds, in the order an install goes through them
+RESOLVED = "resolved"
+COLLECTING = "collecting"
+DOWNLOADING = "downloading"
+BUILDING = "building"
+INSTALLING = "installing"
+INSTALLED = "installed"
+ERROR = "error"
+
+# (kind, pattern); group "name" is the package when the line names one
+PROGRESS_PATTERNS = [
+    # pip
+    (COLLECTING, re.compile(r"^Collecting (?P<name>[^\s(]+)")),
+    (DOWNLOADING, re.compile(r"^\s*Downloading (?P<name>\S+)")),
+    (BUILDING, re.compile(r"^\s*Building wheel for (?P<name>\S+)")),
+    (INSTALLING, re.compile(r"^Installing collected packages: (?P<name>.+)")),
+    (INSTALLED, re.compile(r"^Successfully installed (?P<name>.+)")),
+    (ERROR, re.compile(r"^ERROR: (?P<name>.*)")),
+    # uv
+    (RESOLVED, re.compile(r"^Resolved (?P<name>\d+) packages?")),
+    (BUILDING, re.compile(r"^\s*Built (?P<name>\S+)")),
+    (INSTALLING, re.compile(r"^Prepared (?P<name>\d+) packages?")),
+    (INSTALLED, re.compile(r"^ \+ (?P<name>\S+)")),
+    (ERROR, re.compile(r"^(?:error|×): (?P<name>.*)")),
+]
+
+
+@dataclass
+class ProgressEvent:
+    kind: str
+    name: str  # package, package list or count, as printed by the installer
+    line: str
+    stream: str = "stdout"
+
+
+def parse_progress(line: str, stream: str = "stdout") -> Optional[ProgressEvent]:
+    for kind, pattern in PROGRESS_PATTERNS:
+        match = pattern.match(line)
+        if match:
+            return ProgressEvent(kind, match.group("name").strip(), line, stream)
+    return None
+
+
+@dataclass
+class StreamResult:
+    cmd: list
+    returncode: Optional[int]
+    tail: list = field(default_factory=list)  # (stream, line), last TAIL_LINES of each
+    events: list = field(default_factory=list)  # ProgressEvent, the last EVENT_LIMIT
+    seconds: float = 0.0
+    timed_out: bool = False
+    cancelled: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.returncode == 0 and not (self.timed_out or self.cancelled)
+
+    @property
+    def output(self) -> str:
+        return "\n".join(line for _, line in self.tail)
+
+    def stream_text(self, stream: str) -> str:
+        return "\n".join(line for s, line in self.tail if s == stream)
+
+    def error_report(self) -> str:
+        if self.timed_out:
+            reason = f"timed out after {self.seconds:.0f}s"
+        elif self.cancelled:
+            reason = "cancelled"
+        else:
+            reason = f"exit code {self.returncode}"
+        errors = [e.line for e in self.events if e.kind == ERROR]
+        return "\n".join([f"{' '.join(map(str, self.cmd))}: {reason}", *(errors or [self.output])])
+
+    def completed(self) -> subprocess.CompletedProcess:
+        """CompletedProcess view, for callers written against subprocess.run."""
+        rc = self.returncode if self.returncode is not None else -1
+        return subprocess.CompletedProcess(
+            self.cmd, rc, self.stream_text("stdout"), self.stream_text("stderr")
+        )
+
+
+def install_timeout(value: Optional[float] = None) -> Optional[float]:
+    """--install-timeout when given, else SMARTRUN_INSTALL_TIMEOUT, else None."""
+    if value is not None:
+        return value
+    try:
+        return float(os.getenv(INSTALL_TIMEOUT_ENV_VAR) or 0) or None
+    except ValueError:
+        return None
+
+
+def _pump(pipe, stream: str, lines: queue.Queue) -> None:
+    try:
+        for line in iter(pipe.readline, ""):
+            lines.put((stream, line.rstrip("\r\n")))
+    finally:
+        pipe.close()
+        lines.put((stream, None))
+
+
+def _stop(process: subprocess.Popen) -> None:
+    process.terminate()
+    try:
+        process.wait(KILL_GRACE_SECONDS)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def run_streaming(
+    cmd: list,
+    on_line: Optional[Callable[[str, str], None]] = None,
+    on_event: Optional[Callable[[ProgressEvent], None]] = None,
+    timeout: Optional[float] = None,
+    cancel: Optional[threading.Event] = None,
+    tail_lines: int = TAIL_LINES,
+    **popen_kwargs,
+) -> StreamResult:
+    """
+    Run *cmd*, calling on_line(stream, line) for every output line and
+    on_event(event) for the ones that report progress. Memory stays
+    bounded by *tail_lines* and EVENT_LIMIT whatever the installer prints.
+    """
+    cmd = [str(c) for c in cmd]
+    with span("subprocess", "subprocess", cmd=" ".join(cmd)):
+        return _run_streaming(cmd, on_line, on_event, timeout, cancel, tail_lines, popen_kwargs)
+
+
+def _run_streaming(cmd, on_line, on_event, timeout, cancel, tail_lines, popen_kwargs):
+    result = StreamResult(cmd, None)
+    # one tail per stream: chatty stdout cannot push the stderr error out
+    tails = {"stdout": deque(maxlen=tail_lines), "stderr": deque(maxlen=tail_lines)}
+    events = deque(maxlen=EVENT_LIMIT)
+    seq = 0
+    start = time.monotonic()
+    # a missing executable raises FileNotFoundError, as with subprocess.run
+    process = subprocess.Popen(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        stdin=subprocess.DEVNULL,
+        text=True,
+        errors="replace",
+        bufsize=1,
+        **popen_kwargs,
+    )
+    lines = queue.Queue()
+    readers = [
+        threading.Thread(target=_pump, args=(process.stdout, "stdout", lines), daemon=True),
+        threading.Thread(target=_pump, args=(process.stderr, "stderr", lines), daemon=True),
+    ]
+    for reader in readers:
+        reader.start()
+    open_streams = len(readers)
+    try:
+        while open_streams:
+            if cancel is not None and cancel.is_set():
+                result.cancelled = True
+                break
+            if timeout is not None and time.monotonic() - start > timeout:
+                result.timed_out = True
+                break
+            try:
+                stream, line = lines.get(timeout=POLL_SECONDS)
+            except queue.Empty:
+                continue
+            if line is None:
+                open_streams -= 1
+                continue
+            seq += 1
+            tails[stream].append((seq, stream, line))
+            if on_line is not None:
+                on_line(stream, line)
+            event = parse_progress(line, stream)
+            if event is not None:
+                events.append(event)
+                if on_event is not None:
+                    on_event(event)
+    except KeyboardInterrupt:
+        _stop(process)
+        raise
+    if result.cancelled or result.timed_out:
+        _stop(process)
+    result.returncode = process.wait()
+    result.tail = [(s, line) for _, s, line in sorted([*tails["stdout"], *tails["stderr"]])]
+    result.events = list(events)
+    result.seconds = time.monotonic() - start
+    return result
+
+
+def print_event(event: ProgressEvent) -> None:
+    """One short line per progress step; what non-verbose runs show."""
+    from rich import print
+    from rich.markup import escape
+
+    line = escape(event.line.strip())
+    if event.kind == ERROR:
+        print(f"  [red]{line}[/red]")
+    elif event.kind in (INSTALLED, RESOLVED, INSTALLING):
+        print(f"  [green]{line}[/green]")
+    else:
+        print(f"  [dim]{line}[/dim]")
+
+
+def print_line(stream: str, line: str) -> None:
+    """Every line as it arrives; what verbose runs show."""
+    print(f"[{'+' if stream == 'stdout' else '.'}] {line}", flush=True)
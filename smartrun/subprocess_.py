@@ -1,5 +1,5 @@
 from pathlib import Path
-import subprocess
+import threading
 
 # smartrun
 from .options import Options
@@ -10,6 +10,8 @@ from .runner_helpers import (
 from .utils import _ensure_pip
 from .envc.envc2 import EnvComplete
 from .utils import in_ci
+from .trace import span
+from .streaming import StreamResult, install_timeout, print_event, print_line, run_streaming
 
 
 class NoActiveVirtualEnvironment(BaseException): ...
@@ -26,8 +28,9 @@ class PyPip(object):
 
 
 def create_pypip_with_opts(opts: Options):
-    venv = ".venv" if not isinstance(opts.venv, str) else opts.venv
-    venv_path = Path(venv)
+    from .module_index import target_env_path
+
+    venv_path = target_env_path(opts)
     python_path = get_bin_path(venv_path, "python")
     pip_path = get_bin_path(venv_path, "pip")
     return PyPip(python_path, pip_path)
@@ -36,8 +39,10 @@ def create_pypip_with_opts(opts: Options):
 class SubprocessSmart:
     """SubprocessSmart"""
 
-    def __init__(self, opts: Options):
+    def __init__(self, opts: Options, cancel: threading.Event = None):
         self.opts = opts
+        self.cancel = cancel  # set it to stop the running installer
+        self.last_result: StreamResult = None
         p: PyPip = self.get()
         self.python_path = p.python_path
         # _ensure_pip(self.python_path)
@@ -46,29 +51,31 @@ class SubprocessSmart:
         return create_pypip_with_opts(self.opts)
 
     def run(self, params: list, verbose=False, return_output=False):
+        cmd = [str(self.python_path), *params]
+        return self.run_command(cmd, verbose=verbose, return_output=return_output)
+
+    def run_command(self, cmd: list, verbose=False, return_output=False):
         from .utils import is_verbose
 
         verbose = is_verbose(verbose)
         if self.opts.verbose:
             verbose = True
-        params = [str(x) for x in params]
-        cmd = [str(self.python_path), *params]
+        cmd = [str(x) for x in cmd]
         if verbose:
             print("Subprocess will run:", " ".join(cmd))
-        try:
-            result = subprocess.run(
+        # output is streamed: every line when verbose, progress steps otherwise
+        with span("SubprocessSmart.run", "install", cmd=" ".join(cmd)):
+            result = run_streaming(
                 cmd,
-                capture_output=True,
-                text=True,
-                check=True,
+                on_line=print_line if verbose else None,
+                on_event=None if verbose else print_event,
+                timeout=install_timeout(self.opts.install_timeout),
+                cancel=self.cancel,
             )
-            if verbose:
-                print("[+]", result.stdout.strip())
-                print("[.]", result.stderr.strip())
-            return result if return_output else True
-        except subprocess.CalledProcessError as exc:
-            if verbose:
-                print("❌ Subprocess failed:")
-                print("STDOUT:", exc.stdout)
-                print("STDERR:", exc.stderr)
-            return False
+        self.last_result = result
+        if result.ok:
+            return result.completed() if return_output else True
+        if verbose or result.timed_out:
+            print("❌ Subprocess failed:")
+            print(result.error_report())
+        return False
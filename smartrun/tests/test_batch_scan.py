@@ -0,0 +1,65 @@
+import json
+import pytest
+import smartrun.batch_scan as batch_scan
+from smartrun.batch_scan import iter_scan_targets, scan_directory, write_manifest
+from smartrun.cli import main
+from smartrun.options import Options
+
+
+@pytest.fixture
+def tree(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    root = tmp_path / "research"
+    (root / "a").mkdir(parents=True)
+    (root / "b").mkdir()
+    (root / ".venv" / "lib").mkdir(parents=True)
+    (root / "__pycache__").mkdir()
+    (root / "a" / "one.py").write_text("import numpy\nimport skimage\n")
+    (root / "a" / "tools.py").write_text("import rich\n")
+    (root / "a" / "two.py").write_text("import tools\nimport numpy\n")
+    (root / "b" / "three.py").write_text("import pandas\nimport os\n")
+    (root / "b" / "broken.py").write_text("def f(:\n")
+    (root / ".venv" / "lib" / "hidden.py").write_text("import nope\n")
+    (root / "__pycache__" / "x.py").write_text("import nope\n")
+    return root
+
+
+def by_name(batch):
+    return {f.path.split("/")[-1]: f for f in batch.files}
+
+
+def test_targets_skip_envs_and_caches(tree):
+    names = [p.name for p in iter_scan_targets(tree)]
+    assert names == ["one.py", "tools.py", "two.py", "broken.py", "three.py"]
+
+
+def test_scan_directory_per_file_and_union(tree):
+    batch = scan_directory(tree, Options(tree))
+    files = by_name(batch)
+    assert files["one.py"].packages == ["numpy", "scikit-image"]
+    assert files["two.py"].packages == ["numpy", "rich"]
+    assert files["three.py"].packages == ["pandas"]
+    assert files["broken.py"].error.startswith("SyntaxError")
+    assert batch.union == ["numpy", "pandas", "rich", "scikit-image"]
+    assert batch.counts["numpy"] == 2
+    # second run reuses the scan cache
+    again = scan_directory(tree, Options(tree))
+    assert by_name(again)["one.py"].cached
+    assert again.union == batch.union
+
+
+def test_process_pool_matches_serial(tree, monkeypatch):
+    serial = scan_directory(tree, Options(tree, no_cache=True))
+    monkeypatch.setattr(batch_scan, "PARALLEL_THRESHOLD", 1)
+    pooled = scan_directory(tree, Options(tree, no_cache=True), max_workers=2)
+    assert pooled.to_dict()["files"] == serial.to_dict()["files"]
+
+
+def test_manifest_and_cli(tree, tmp_path):
+    path = write_manifest(scan_directory(tree, Options(tree)), tmp_path / "out")
+    data = json.loads(path.read_text())
+    assert data["union"] == ["numpy", "pandas", "rich", "scikit-image"]
+    main(["scan", str(tree)])
+    manifest = tmp_path / ".smartrun" / "scan_manifest.json"
+    assert json.loads(manifest.read_text())["counts"]["numpy"] == 2
+    assert not (tmp_path / ".smartrun" / "packages.in").exists()
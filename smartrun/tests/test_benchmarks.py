@@ -0,0 +1,33 @@
+import json
+
+import pytest
+
+scan_suite = pytest.importorskip("benchmarks.scan_suite")
+
+
+def test_compare_flags_regressions():
+    results = {
+        "a": {"median": 1.3},
+        "b": {"median": 0.5},
+        "c": {"median": 1.0},
+        "d": {"median": 1.0},
+    }
+    baseline = {"a": {"median": 1.0}, "b": {"median": 1.0}, "c": {"median": 0.9}}
+    status = {row[0]: row[-1] for row in scan_suite.compare(results, baseline, 0.25)}
+    assert status == {"a": "regression", "b": "faster", "c": "ok", "d": "new"}
+
+
+def test_quick_run_and_baseline(tmp_path):
+    out = tmp_path / "now.json"
+    argv = ["--quick", "--repeat", "1", "--filter", "Comment", "--json", str(out)]
+    assert scan_suite.main(argv) == 0
+    data = json.loads(out.read_text())
+    assert set(data["results"]) == {
+        "SmartRunCommentRequirements/huge",
+        "SmartRunCommentRequirements/docstrings",
+    }
+    for result in data["results"].values():
+        result["median"] /= 100  # a baseline far faster than this run
+    slow = tmp_path / "baseline.json"
+    slow.write_text(json.dumps(data))
+    assert scan_suite.main([*argv[:-2], "--baseline", str(slow)]) == 1
@@ -0,0 +1,56 @@
+import math
+import smartrun.runner as runner
+from smartrun.installers.bisect_install import isolate_failures
+from smartrun.options import Options
+
+
+def fake_installer(bad=(), conflicts=()):
+    calls = []
+
+    def install(batch):
+        calls.append(list(batch))
+        if any(p in bad for p in batch):
+            return False
+        return not any(a in batch and b in batch for a, b in conflicts)
+
+    return install, calls
+
+
+def test_all_good_is_one_call():
+    install, calls = fake_installer()
+    result = isolate_failures(install, ["a", "b", "c"])
+    assert result.ok and result.installed == ["a", "b", "c"]
+    assert calls == [["a", "b", "c"]]
+
+
+def test_finds_broken_pins_in_log_calls():
+    packages = [f"p{i}" for i in range(60)]
+    install, calls = fake_installer(bad={"p41"})
+    result = isolate_failures(install, packages)
+    assert result.failed == ["p41"]
+    assert sorted(result.installed) == sorted(set(packages) - {"p41"})
+    assert result.attempts == len(calls) <= 2 * math.ceil(math.log2(60)) + 1
+    install, calls = fake_installer(bad={"p3", "p17", "p58"})
+    result = isolate_failures(install, packages)
+    assert sorted(result.failed) == ["p17", "p3", "p58"]
+    assert len(calls) <= 3 * 2 * math.ceil(math.log2(60)) + 1
+
+
+def test_conflicting_halves_are_not_reported():
+    install, calls = fake_installer(conflicts={("a", "d")})
+    result = isolate_failures(install, ["a", "b", "c", "d"])
+    assert result.ok
+    assert sorted(result.installed) == ["a", "b", "c", "d"]
+
+
+def test_pip_fallback_bisects(monkeypatch):
+    install, calls = fake_installer(bad={"--broken"})
+
+    def run(self, params, **kw):
+        return install(params[3:])
+
+    monkeypatch.setattr(runner.SubprocessSmart, "run", run)
+    packages = [f"p{i}" for i in range(15)] + ["--broken"]
+    result = runner.install_packages_smart_w_pip(Options("x.py"), packages)
+    assert result.failed == ["--broken"]
+    assert len(calls) < len(packages)
@@ -0,0 +1,110 @@
+from smartrun import comments
+from smartrun.comments import SmartRunCommentRequirements, parse_requirements
+
+
+def example_content():
+    t = '''"""
+Module doc
+smartrun-requirements:
+    pandas>=2
+    numpy
+"""
+import os
+# smartrun: rich>=13
+import rich
+x = 1  # requires: a, b c
+# @smartrun httpx
+# smartrun-requires: yaml
+import yaml
+
+# smartrun-requirements:
+# torch
+# scipy==1.0
+y = 2
+
+
+def f():
+    """plain doc"""
+    return "# smartrun-requirements: is not followed by comment lines here"
+'''
+    return t
+
+
+def docstring_heavy_content(n: int) -> str:
+    return "".join(
+        f'def f{i}():\n    """Docstring {i}.\n    More text."""\n    import os\n    return {i}\n'
+        for i in range(n)
+    )
+
+
+def test_inline_requirements():
+    reqs = parse_requirements(example_content(), is_content=True)
+    assert sorted(reqs) == ["a", "b", "c", "httpx", "rich>=13", "yaml"]
+
+
+def test_near_imports_and_blocks():
+    parser = SmartRunCommentRequirements.from_content(example_content())
+    assert parser.get_requirements_near_imports() == {"os": "rich>=13", "rich": "rich>=13"}
+    assert parser.get_block_requirements() == [
+        "pandas>=2",
+        "numpy",
+        "torch",
+        "scipy==1.0",
+    ]
+
+
+def test_near_imports_window():
+    content = "import a\n#smartrun: a==1\n\n\n\nimport b\n# SMARTRUN: b<2\n"
+    parser = SmartRunCommentRequirements.from_content(content)
+    assert parser.get_requirements_near_imports() == {"a": "a==1", "b": "b<2"}
+
+
+class CountingPattern:
+    def __init__(self, pattern):
+        self.pattern = pattern
+        self.calls = 0
+
+    def search(self, *args):
+        self.calls += 1
+        return self.pattern.search(*args)
+
+
+def test_docstring_heavy_file_is_one_pass(monkeypatch):
+    """
+    The old lazy docstring regex backtracked (~24 s at n=3000); every line
+    is now looked at a bounded number of times. Timings live in
+    benchmarks/scan_suite.py (SmartRunCommentRequirements/docstrings).
+    """
+    counter = CountingPattern(comments.CODE_TOKEN)
+    monkeypatch.setattr(comments, "CODE_TOKEN", counter)
+    n = 20_000
+    content = docstring_heavy_content(n) + '"""\nsmartrun-requirements:\npandas\n"""\n'
+    parser = SmartRunCommentRequirements.from_content(content)
+    assert parser.get_block_requirements() == ["pandas"]
+    lines = len(content.splitlines())
+    assert counter.calls <= 2 * lines
+
+
+def test_quotes_in_comments_and_strings_open_nothing():
+    content = (
+        '# mentions """ here\n'
+        "x = 'a \"\"\" b'  # and ''' here\n"
+        'y = "it\'s"\n'
+        '"""\n'
+        "smartrun-requirements:\n"
+        "pandas\n"
+        '"""\n'
+        "# smartrun: rich\n"
+    )
+    parser = SmartRunCommentRequirements.from_content(content)
+    assert parser.get_block_requirements() == ["pandas"]
+    assert parse_requirements(content, is_content=True) == ["rich"]
+
+
+def test_comment_block_lines_are_still_comments():
+    # the results the line-by-line regex parser gave for this input
+    content = "# smartrun-requirements:\n# requests\n# smartrun: rich\nimport os\n"
+    parser = SmartRunCommentRequirements.from_content(content)
+    assert parse_requirements(content, is_content=True) == ["rich"]
+    assert parser.get_requirements_near_imports() == {"os": "rich"}
+    assert parser.get_block_requirements() == ["requests", "smartrun: rich"]
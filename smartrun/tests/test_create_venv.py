@@ -0,0 +1,60 @@
+import subprocess
+import smartrun.runner as runner
+import smartrun.runner_helpers as runner_helpers
+import smartrun.utils as utils
+from smartrun.options import Options
+from smartrun.utils import get_bin_path
+
+
+def test_venv_is_created_without_pip(tmp_path, monkeypatch):
+    monkeypatch.setattr(runner_helpers, "find_uv", lambda: None)
+    env = tmp_path / "env"
+    runner_helpers.create_venv(env)
+    python = get_bin_path(env, "python")
+    assert python.exists()
+    assert not utils.has_pip(python)
+
+
+def test_uv_venv_is_preferred(tmp_path, monkeypatch):
+    calls = []
+
+    def run(cmd, **kw):
+        calls.append(cmd)
+        return subprocess.CompletedProcess(cmd, 0, "", "")
+
+    monkeypatch.setattr(runner_helpers, "find_uv", lambda: "/bin/uv")
+    monkeypatch.setattr(runner_helpers.subprocess, "run", run)
+    runner_helpers.create_venv(tmp_path / "env")
+    assert calls and calls[0][:2] == ["/bin/uv", "venv"]
+    assert "--seed" not in calls[0]
+    calls.clear()
+    runner_helpers.create_venv(tmp_path / "env2", use_uv=False)
+    assert not calls and (tmp_path / "env2").exists()
+
+
+def test_uv_installs_by_path(monkeypatch):
+    calls = []
+    monkeypatch.setattr(runner, "find_uv", lambda: "/bin/uv")
+    monkeypatch.setattr(
+        runner.SubprocessSmart, "run_command", lambda self, cmd, **kw: calls.append(cmd) or True
+    )
+    monkeypatch.setattr(runner, "_ensure_pip", lambda p: calls.append("pip seeded"))
+    runner.install_packages_smart(Options("x.py"), ["not-installed-pkg-xyz"])
+    assert calls[0][:4] == ["/bin/uv", "pip", "install", "--python"]
+    assert "pip seeded" not in calls
+
+
+def test_ensure_pip_only_bootstraps_when_missing(monkeypatch):
+    calls, seeded = [], []
+
+    def run(cmd, **kw):
+        calls.append(cmd[1:3])
+        if cmd[2] == "ensurepip":
+            seeded.append(True)
+        return subprocess.CompletedProcess(cmd, 0 if seeded else 1)
+
+    monkeypatch.setattr(utils.subprocess, "run", run)
+    assert utils._ensure_pip("python")
+    assert calls == [["-m", "pip"], ["-m", "ensurepip"], ["-m", "pip"]]
+    calls.clear()
+    assert utils._ensure_pip("python") and calls == [["-m", "pip"]]
@@ -0,0 +1,114 @@
+import json
+
+import pytest
+from smartrun.cli import main
+from smartrun.env_plan import (
+    DEFAULT_PACKAGE_BYTES,
+    SizeIndex,
+    merge_requirements,
+    parse_requirements,
+    plan_environments,
+    satisfiable,
+)
+
+pytest.importorskip("packaging")
+
+
+def make_site(root, dists):
+    site = root / "site-packages"
+    for name, (version, size, requires) in dists.items():
+        info = site / f"{name}-{version}.dist-info"
+        info.mkdir(parents=True)
+        lines = ["Metadata-Version: 2.1", f"Name: {name}", f"Version: {version}"]
+        lines += [f"Requires-Dist: {r}" for r in requires]
+        info.joinpath("METADATA").write_text("\n".join(lines) + "\n\nbody\n")
+        info.joinpath("RECORD").write_text(
+            f"{name}/__init__.py,sha256=x,{size}\n{name}-{version}.dist-info/RECORD,,\n"
+        )
+    return site
+
+
+def test_satisfiable():
+    assert satisfiable("")
+    assert satisfiable(">=1.20,<2")
+    assert satisfiable("<1")
+    assert satisfiable("==1.*,>=1.4")
+    assert satisfiable("~=2.1,!=2.1")
+    assert not satisfiable("<1.20,>=2")
+    assert not satisfiable("==1.0,==1.1")
+    assert not satisfiable("!=1.5,==1.5")
+
+
+def test_merge_requirements():
+    a = parse_requirements(["numpy>=1.20", "Rich"])
+    assert a == {"numpy": ">=1.20", "rich": ""}
+    assert merge_requirements(a, parse_requirements(["numpy<2", "pandas"])) == {
+        "numpy": "<2,>=1.20",
+        "rich": "",
+        "pandas": "",
+    }
+    assert merge_requirements(a, parse_requirements(["numpy<1.20"])) is None
+
+
+def test_size_index(tmp_path):
+    site = make_site(
+        tmp_path,
+        {
+            "pandas": ("2.2.0", 3000, ["numpy>=1.22", 'pytest; extra == "test"']),
+            "numpy": ("1.26.4", 2000, []),
+        },
+    )
+    sizes = SizeIndex([site])
+    assert sizes.estimate(["pandas"])[:2] == (2, 5000)
+    assert sizes.estimate(["pandas", "numpy"])[:2] == (2, 5000)
+    assert sizes.estimate(["scipy"])[:2] == (1, DEFAULT_PACKAGE_BYTES)
+
+
+def test_plan_merges_compatible_sets(tmp_path):
+    sizes = SizeIndex([make_site(tmp_path, {"numpy": ("1.26.4", 2000, [])})])
+    plan = plan_environments(
+        {
+            "a.py": ["numpy>=1.20", "pandas"],
+            "b.py": ["numpy<2"],
+            "c.py": ["numpy<1.20"],
+            "d.py": ["rich"],
+            "e.py": [],
+        },
+        sizes,
+    )
+    assert [(env.requirement_list, sorted(env.scripts)) for env in plan.envs] == [
+        (["numpy<2,>=1.20", "pandas", "rich"], ["a.py", "b.py", "d.py", "e.py"]),
+        (["numpy<1.20"], ["c.py"]),
+    ]
+    assert len(plan.envs) == 2 and plan.scripts == 5
+    assert plan.size < plan.baseline_size
+    assert plan.seconds < plan.baseline_seconds
+
+
+def test_cli_plan(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "jobs").mkdir()
+    (tmp_path / "jobs" / "a.py").write_text("import rich\n")
+    (tmp_path / "jobs" / "b.py").write_text("import rich\nimport numpy\n")
+    main(["plan", "jobs"])
+    plan = json.loads((tmp_path / ".smartrun" / "env_plan.json").read_text())
+    assert plan["planned"]["envs"] == 1 and plan["baseline"]["envs"] == 2
+    assert plan["envs"][0]["requirements"] == ["numpy", "rich"]
+
+
+def test_build_plan(tmp_path, monkeypatch):
+    import smartrun.runner as runner
+    from smartrun.env_plan import build_plan
+    from smartrun.env_store import EnvStore
+    from smartrun.options import Options
+
+    monkeypatch.chdir(tmp_path)
+    installs = []
+    monkeypatch.setattr(runner, "install_packages_smart", lambda opts, reqs: installs.append(reqs))
+    plan = plan_environments(
+        {"a.py": ["rich"], "b.py": ["numpy==1.0"], "c.py": ["numpy==2.0"]}, SizeIndex([])
+    )
+    store = EnvStore(tmp_path / "envs", builder=lambda path: path.mkdir(parents=True))
+    paths = build_plan(plan, Options("plan"), store=store)
+    assert len(paths) == 2 and len(store.envs()) == 2
+    assert sorted(installs) == [["numpy==1.0", "rich"], ["numpy==2.0"]]
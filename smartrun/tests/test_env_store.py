@@ -0,0 +1,146 @@
+import threading
+import smartrun.runner as runner
+import smartrun.runner_helpers as runner_helpers
+import pytest
+from smartrun.env_store import EnvBuildError, EnvLock, EnvStore, env_key
+from smartrun.options import Options
+
+
+def fake_builder(built):
+    def build(env_path):
+        built.append(env_path)
+        env_path.mkdir(parents=True)
+
+    return build
+
+
+def test_key_ignores_order_case_and_spelling():
+    assert env_key(["Pandas", "rich>=13"]) == env_key(["rich >= 13", "pandas", "pandas"])
+    assert env_key(["pandas"]) != env_key(["pandas==2.2"])
+    assert env_key(["pandas"], python="cpython-3.10") != env_key(["pandas"])
+
+
+def test_same_requirements_share_one_env(tmp_path):
+    built, installs = [], []
+    store = EnvStore(tmp_path, builder=fake_builder(built))
+    a = store.ensure(["numpy", "pandas"], lambda p, reqs: installs.append(reqs))
+    b = store.ensure(["pandas", "NumPy"], lambda p, reqs: installs.append(reqs))
+    assert a == b == store.lookup(["numpy", "pandas"])
+    assert len(built) == 1 and installs == [["numpy", "pandas"]]
+    assert store.lookup(["rich"]) is None
+
+
+def test_concurrent_ensure_builds_once(tmp_path):
+    built = []
+    store = EnvStore(tmp_path, builder=fake_builder(built))
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(store.ensure(["rich"])))
+        for _ in range(8)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(set(results)) == 1 and len(built) == 1
+    assert not list(tmp_path.glob("*.lock"))
+
+
+def test_interrupted_build_is_redone(tmp_path):
+    built = []
+    store = EnvStore(tmp_path, builder=fake_builder(built))
+    half = store.path_for(env_key(["rich"]))
+    half.mkdir(parents=True)  # no manifest: a build that died
+    assert store.lookup(["rich"]) is None
+    assert store.ensure(["rich"]) == half and built == [half]
+
+
+def test_failed_install_is_not_published(tmp_path):
+    built = []
+    store = EnvStore(tmp_path, builder=fake_builder(built))
+    with pytest.raises(EnvBuildError):
+        store.ensure(["rich"], lambda p, reqs: False)
+    assert store.lookup(["rich"]) is None
+    assert not store.path_for(env_key(["rich"])).exists()
+    # the next run builds it again instead of reusing the broken env
+    assert store.ensure(["rich"], lambda p, reqs: True) and len(built) == 2
+
+
+def test_shared_run_stops_when_install_fails(tmp_path, monkeypatch):
+    monkeypatch.setenv("SMARTRUN_ENVS", str(tmp_path / "store"))
+    monkeypatch.setattr(runner_helpers, "create_venv", lambda p: p.mkdir(parents=True))
+    failed = runner.IsolationResult(failed=["rich"])
+    monkeypatch.setattr(runner, "install_packages_smart", lambda opts, reqs: failed)
+    script = tmp_path / "job.py"
+    script.touch()
+    with pytest.raises(SystemExit):
+        runner.use_shared_env(Options(script, shared=True), ["rich"])
+    assert EnvStore().envs() == []
+
+
+def test_stale_lock_is_taken_over(tmp_path):
+    lock = tmp_path / "x.lock"
+    lock.write_text("999999999")  # no such process
+    with EnvLock(lock, timeout=1):
+        assert lock.read_text() != "999999999"
+    assert not lock.exists()
+
+
+def fake_install(env_path, requirements):
+    site = env_path / "lib" / "python3.99" / "site-packages"
+    for requirement in requirements:
+        name, _, version = requirement.partition("==")
+        info = site / f"{name}-{version or '1.0'}.dist-info"
+        info.mkdir(parents=True)
+        info.joinpath("METADATA").write_text(f"Name: {name}\nVersion: {version or '1.0'}\n")
+
+
+def test_subset_uses_smallest_covering_env(tmp_path):
+    pytest.importorskip("packaging")
+    built = []
+    store = EnvStore(tmp_path / "store", builder=fake_builder(built))
+    # merged sets, as plan --build stores them
+    merged = store.ensure(["numpy==2.0", "rich"], fake_install)
+    big = store.ensure(["numpy==2.0", "pandas", "rich"], fake_install)
+    script = tmp_path / "job.py"
+    script.touch()
+    assert store.ensure(["NumPy>=1.26"], fake_install, owner=script) == merged
+    assert store.refs(merged) == [str(script.resolve())]
+    assert store.ensure(["pandas"], fake_install) == big
+    assert len(built) == 2
+    # the stored numpy does not satisfy this one: a new env is built
+    assert store.ensure(["numpy<2"], fake_install) not in (big, merged)
+    assert len(built) == 3
+
+
+def test_refcounts_and_gc(tmp_path):
+    store = EnvStore(tmp_path / "store", builder=fake_builder([]))
+    s1, s2 = tmp_path / "a.py", tmp_path / "b.py"
+    s1.touch(), s2.touch()
+    shared = store.ensure(["pandas"], owner=s1)
+    assert store.ensure(["pandas"], owner=s2) == shared
+    assert len(store.refs(shared)) == 2
+    # a.py now needs something else: its old reference is dropped
+    other = store.ensure(["polars"], owner=s1)
+    assert store.refs(shared) == [str(s2.resolve())]
+    s2.unlink()  # deleted scripts do not keep an env alive
+    assert store.gc() == [shared]
+    assert not shared.exists() and other.exists()
+    assert [e.path for e in store.envs()] == [other]
+
+
+def test_run_uses_shared_env(tmp_path, monkeypatch):
+    monkeypatch.setenv("SMARTRUN_ENVS", str(tmp_path / "store"))
+    monkeypatch.setattr(runner_helpers, "create_venv", lambda p: p.mkdir(parents=True))
+    installs = []
+    monkeypatch.setattr(
+        runner, "install_packages_smart", lambda opts, reqs: installs.append(opts.venv)
+    )
+    script = tmp_path / "job.py"
+    script.touch()
+    opts = Options(script, shared=True)
+    env_path = runner.use_shared_env(opts, ["rich"])
+    assert opts.venv == str(env_path) and installs == [str(env_path)]
+    assert env_path.parent == tmp_path / "store"
+    runner.use_shared_env(Options(script, shared=True), ["rich"])
+    assert len(installs) == 1
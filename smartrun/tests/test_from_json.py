@@ -0,0 +1,83 @@
+import builtins
+import json
+import pytest
+import smartrun.installers.from_json_fast as fast
+from smartrun.streaming import StreamResult
+from smartrun.installers.from_json import (
+    check_python_version,
+    install_dependencies_from_json,
+)
+
+
+class FakeRun:
+    def __init__(self, fail=()):
+        self.calls = []
+        self.timeouts = []
+        self.fail = set(fail)
+
+    def __call__(self, cmd, **kw):
+        cmd = [str(c) for c in cmd]
+        if "-r" in cmd:
+            with open(cmd[cmd.index("-r") + 1]) as f:
+                cmd = cmd + ["<"] + f.read().split()
+        self.calls.append(cmd)
+        self.timeouts.append(kw.get("timeout"))
+        failed = any(spec in cmd for spec in self.fail)
+        return StreamResult(cmd, 1 if failed else 0)
+
+
+@pytest.fixture
+def no_prompt(monkeypatch):
+    def refuse(*args):
+        raise AssertionError("installer must not prompt")
+
+    monkeypatch.setattr(builtins, "input", refuse)
+
+
+def write_lock(tmp_path, n=150, python="3.0.0"):
+    packages = {f"pkg{i}": f"1.{i}" for i in range(n)}
+    path = tmp_path / "lock.json"
+    path.write_text(json.dumps({"python": python, "resolved_packages": packages}))
+    return path
+
+
+def test_lock_installs_with_one_resolver_run(tmp_path, monkeypatch, no_prompt):
+    run = FakeRun()
+    monkeypatch.setattr(fast, "find_uv", lambda: None)
+    monkeypatch.setattr(fast, "_ensure_pip", lambda python: True)
+    monkeypatch.setattr(fast, "run_streaming", run)
+    install_dependencies_from_json(write_lock(tmp_path))
+    downloads = [c for c in run.calls if "download" in c]
+    installs = [c for c in run.calls if "install" in c]
+    assert len(downloads) == 150
+    assert len(installs) == 1 and "--no-index" in installs[0]
+    assert installs[0].count("<") == 1 and "pkg149==1.149" in installs[0]
+
+
+def test_uv_batch_and_bisect_failures(tmp_path, monkeypatch, no_prompt):
+    run = FakeRun(fail={"pkg7==1.7"})
+    monkeypatch.setattr(fast, "find_uv", lambda: "uv")
+    monkeypatch.setattr(fast, "run_streaming", run)
+    with pytest.raises(SystemExit):
+        install_dependencies_from_json(write_lock(tmp_path, n=20))
+    assert all(c[:3] == ["uv", "pip", "install"] for c in run.calls)
+    assert len(run.calls) < 20
+
+
+def test_python_mismatch_policy(monkeypatch, no_prompt):
+    assert check_python_version("2.7.18")
+    assert check_python_version("2.7.18", "ignore")
+    assert not check_python_version("2.7.18", "error")
+    monkeypatch.setenv("SMARTRUN_PYTHON_MISMATCH", "error")
+    assert not check_python_version("2.7.18")
+
+
+def test_cli_install_timeout_reaches_installer(tmp_path, monkeypatch, no_prompt):
+    from smartrun.cli import main
+
+    run = FakeRun()
+    monkeypatch.setenv("SMARTRUN_INSTALL_TIMEOUT", "900")
+    monkeypatch.setattr(fast, "find_uv", lambda: "uv")
+    monkeypatch.setattr(fast, "run_streaming", run)
+    main(["install", str(write_lock(tmp_path, n=3)), "--install-timeout", "7"])
+    assert run.calls and set(run.timeouts) == {7}
@@ -0,0 +1,122 @@
+from smartrun.import_collector import (
+    MODULE_SCOPE,
+    OPTIONAL,
+    REQUIRED,
+    TYPE_CHECKING_ONLY,
+    collect_imports,
+)
+from smartrun.scan_imports import Scan
+
+
+def example_content():
+    t = """
+import os
+import google.cloud.storage as gcs
+from . import helpers
+from ..models.base import Model
+
+
+class Report:
+    def build(self):
+        import pandas as pd
+        return pd
+
+
+def main():
+    from sklearn import linear_model
+"""
+    return t
+
+
+def test_collect_imports_records():
+    imports = collect_imports(example_content())
+    by_module = {imp.module: imp for imp in imports}
+    assert by_module["os"].scope == MODULE_SCOPE
+    assert by_module["google.cloud.storage"].top == "google"
+    assert by_module["google.cloud.storage"].lineno == 3
+    assert by_module[""].level == 1
+    assert by_module[""].names == ("helpers",)
+    assert by_module["models.base"].level == 2
+    assert by_module["models.base"].is_relative
+    assert by_module["pandas"].scope == "Report.build"
+    assert by_module["sklearn"].scope == "main"
+
+
+def test_scan_parses_once(monkeypatch):
+    import smartrun.scan_imports as scan_imports
+
+    calls = []
+
+    def counting_collect(content, *args, **kw):
+        calls.append(content)
+        return collect_imports(content, *args, **kw)
+
+    monkeypatch.setattr(scan_imports, "collect_imports", counting_collect)
+    content = "import numpy\nimport pandas"
+    s = Scan(content, exc="pandas")
+    a = s()
+    assert calls.count(content) == 1
+    assert [str(x) for x in a] == ["numpy"]
+
+
+def guarded_content():
+    return """
+from typing import TYPE_CHECKING
+import numpy
+
+try:
+    import ujson as json
+except ImportError:
+    import json
+
+try:
+    import orjson
+except (ValueError, ModuleNotFoundError):
+    pass
+
+try:
+    import requests
+except Exception:
+    requests = None
+
+if TYPE_CHECKING:
+    import pandas
+    try:
+        import polars
+    except ImportError:
+        pass
+else:
+    import rich
+
+if typing.TYPE_CHECKING:
+    from boto3 import Session
+"""
+
+
+def test_import_kinds():
+    kinds = {imp.module: imp.kind for imp in collect_imports(guarded_content())}
+    assert kinds == {
+        "typing": REQUIRED,
+        "numpy": REQUIRED,
+        "ujson": OPTIONAL,
+        "json": REQUIRED,
+        "orjson": OPTIONAL,
+        "requests": REQUIRED,
+        "pandas": TYPE_CHECKING_ONLY,
+        "polars": TYPE_CHECKING_ONLY,
+        "rich": REQUIRED,
+        "boto3": TYPE_CHECKING_ONLY,
+    }
+
+
+def test_imports_inside_match():
+    content = """
+match command:
+    case "plot":
+        import matplotlib
+    case _:
+        def fallback():
+            import pandas
+"""
+    imports = {imp.module: imp.scope for imp in collect_imports(content)}
+    assert imports == {"matplotlib": MODULE_SCOPE, "pandas": "fallback"}
@@ -0,0 +1,59 @@
+import pytest
+import smartrun.import_graph as import_graph
+from smartrun.import_graph import build_import_graph
+from smartrun.options import Options
+from smartrun.package_name import PackageName
+from smartrun.scan_imports import scan_imports_file
+
+
+@pytest.fixture
+def project(tmp_path):
+    (tmp_path / "helpers.py").write_text("import plotting\nimport os\n")
+    (tmp_path / "plotting.py").write_text("import seaborn\n")
+    pkg = tmp_path / "models"
+    pkg.mkdir()
+    (pkg / "__init__.py").write_text("from .base import Model\n")
+    (pkg / "base.py").write_text("from . import layers\n# smartrun: torch>=2.0\n")
+    (pkg / "layers.py").write_text("import scipy.sparse\nfrom ..helpers import x\n")
+    script = tmp_path / "main.py"
+    script.write_text("import helpers\nfrom models import Model\nimport numpy\n")
+    return script
+
+
+def test_graph_follows_local_imports_transitively(project):
+    graph = build_import_graph(project)
+    names = {p.name for p in graph.files}
+    assert names == {
+        "main.py",
+        "helpers.py",
+        "plotting.py",
+        "__init__.py",
+        "base.py",
+        "layers.py",
+    }
+    assert graph.third_party == {"seaborn", "scipy", "numpy"}
+    assert graph.requirements == {"torch>=2.0"}
+    assert {"helpers", "models"} <= graph.local_names
+
+
+def test_graph_parses_in_process_pool(project, monkeypatch):
+    monkeypatch.setattr(import_graph, "PARALLEL_THRESHOLD", 1)
+    graph = build_import_graph(project, max_workers=2)
+    assert graph.third_party == {"seaborn", "scipy", "numpy"}
+
+
+def test_graph_deduplicates_cycles(tmp_path):
+    (tmp_path / "a.py").write_text("import b\nimport requests\n")
+    (tmp_path / "b.py").write_text("import a\n")
+    graph = build_import_graph(tmp_path / "a.py")
+    assert len(graph.files) == 2
+    assert graph.third_party == {"requests"}
+
+
+def test_scan_imports_file_uses_graph(project, monkeypatch):
+    monkeypatch.chdir(project.parent)
+    packages = scan_imports_file(project, Options(project, no_cache=True))
+    assert PackageName("seaborn") in packages
+    assert PackageName("torch>=2.0") in packages
+    assert PackageName("helpers") not in packages
+    assert PackageName("models") not in packages
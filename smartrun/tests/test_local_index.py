@@ -0,0 +1,50 @@
+import subprocess
+import sys
+import urllib.request
+import zipfile
+
+import pytest
+
+local_index = pytest.importorskip("benchmarks.local_index")
+e2e = pytest.importorskip("benchmarks.e2e")
+
+
+def test_bench_packages_chain():
+    packages = local_index.bench_packages(5, chain=2, size_kb=1)
+    requires = [p.requires for p in packages][:3]
+    assert requires == [["bench-pkg-1>=1.0"], ["bench-pkg-2>=1.0"], []]
+    bench = e2e.Bench(None, "", packages)
+    assert bench.requirements == ["bench-pkg-0", "bench-pkg-3", "bench-pkg-4"]
+    assert bench.pins["bench-pkg-4"] == "1.1.0"
+
+
+def test_wheel_is_installable_layout(tmp_path):
+    package = local_index.BenchPackage("bench-pkg-0", requires=["bench-pkg-1>=1.0"], size_kb=1)
+    wheel = local_index.build_wheel(tmp_path, package, "1.1.0")
+    assert wheel.name == "bench_pkg_0-1.1.0-py3-none-any.whl"
+    with zipfile.ZipFile(wheel) as z:
+        record = z.read("bench_pkg_0-1.1.0.dist-info/RECORD").decode()
+        metadata = z.read("bench_pkg_0-1.1.0.dist-info/METADATA").decode()
+    assert "bench_pkg_0/payload.bin,sha256=" in record
+    assert "Requires-Dist: bench-pkg-1>=1.0" in metadata
+
+
+def test_served_index_works_with_pip(tmp_path):
+    packages = local_index.bench_packages(2, size_kb=1)
+    root = local_index.build_index(tmp_path / "index", packages)
+    with local_index.serve(root) as url:
+        page = urllib.request.urlopen(url + "bench-pkg-0/").read().decode()
+        assert "bench_pkg_0-1.0.0-py3-none-any.whl#sha256=" in page
+        cmd = [sys.executable, "-m", "pip", "download", "--no-deps", "-q", "-d"]
+        cmd += [str(tmp_path / "dl"), "--index-url", url, "bench-pkg-0"]
+        cmd += ["--disable-pip-version-check", "--no-cache-dir"]
+        assert subprocess.run(cmd, capture_output=True).returncode == 0
+    downloaded = [p.name for p in (tmp_path / "dl").iterdir()]
+    assert downloaded == ["bench_pkg_0-1.1.0-py3-none-any.whl"]
+
+
+def test_percentiles():
+    stats = e2e.percentiles([float(x) for x in range(1, 11)])
+    assert stats["p50"] == 5.5 and stats["min"] == 1 and stats["max"] == 10 and stats["n"] == 10
+    assert 9 <= stats["p90"] <= 10
+    assert e2e.percentiles([2.0])["p90"] == 2.0
@@ -0,0 +1,73 @@
+from pathlib import Path
+from smartrun.module_index import (
+    EnvModuleIndex,
+    get_env_module_index,
+    get_local_module_index,
+    site_packages_dirs,
+)
+from smartrun.utils import get_problematic_module_names, is_stdlib
+
+
+def make_fake_venv(root: Path) -> Path:
+    site_dir = root / "lib" / "python3.99" / "site-packages"
+    (site_dir / "fakepkg").mkdir(parents=True)
+    (site_dir / "fakepkg" / "__init__.py").write_text("")
+    (site_dir / "fakepkg-1.0.dist-info").mkdir()
+    (site_dir / "single_mod.py").write_text("")
+    (site_dir / "fast_ext.cpython-399-x86_64-linux-gnu.so").write_text("")
+    (site_dir / "__pycache__").mkdir()
+    return root
+
+
+def test_is_stdlib_dotted_without_import():
+    assert is_stdlib("os.path")
+    assert is_stdlib("xml.etree.ElementTree")
+    assert not is_stdlib("numpy.linalg")
+    assert not is_stdlib("smartrun")
+
+
+def test_env_module_index_for_other_venv(tmp_path):
+    venv = make_fake_venv(tmp_path / "venv")
+    assert len(site_packages_dirs(venv)) == 1
+    index = get_env_module_index(venv)
+    assert "fakepkg" in index
+    assert "fakepkg.sub" in index
+    assert index.is_installed("single_mod")
+    assert index.is_installed("fast_ext")
+    assert not index.is_installed("__pycache__")
+    assert not index.is_installed("numpy")
+
+
+def test_index_refreshes_after_install(tmp_path):
+    venv = make_fake_venv(tmp_path / "venv")
+    site_dir = site_packages_dirs(venv)[0]
+    assert "newpkg" not in get_env_module_index(venv)
+    (site_dir / "newpkg").mkdir()
+    assert "newpkg" in get_env_module_index(venv)
+
+
+def test_problematic_names_use_given_index(tmp_path):
+    (tmp_path / "fakepkg.py").write_text("")
+    (tmp_path / "json.py").write_text("")
+    (tmp_path / "mine.py").write_text("")
+    index = EnvModuleIndex(frozenset({"fakepkg"}))
+    found = get_problematic_module_names(tmp_path, env_index=index)
+    conflicts = {m["name"]: m["conflicts_with"] for m in found}
+    assert conflicts == {"fakepkg": ["installed"], "json": ["stdlib"]}
+
+
+def test_local_module_index(tmp_path):
+    (tmp_path / "utils.py").write_text("")
+    (tmp_path / "__init__.py").write_text("")
+    (tmp_path / "pkg").mkdir()
+    (tmp_path / "pkg" / "__init__.py").write_text("")
+    (tmp_path / "nspkg").mkdir()
+    (tmp_path / "nspkg" / "mod.py").write_text("")
+    (tmp_path / "data").mkdir()
+    (tmp_path / "venv").mkdir()
+    (tmp_path / "venv" / "x.py").write_text("")
+    index = get_local_module_index(tmp_path)
+    assert set(index) == {"utils", "pkg", "nspkg"}
+    assert "pkg.sub" in index
+    assert get_local_module_index(tmp_path) is not index
+    assert get_local_module_index(tmp_path).names is index.names
@@ -0,0 +1,73 @@
+import json
+import pytest
+import smartrun.nb.nb_scan as nb_scan
+from smartrun.nb.nb_scan import iter_code_cells, scan_notebook, strip_magics
+from smartrun.utils import extract_imports_from_ipynb
+
+
+def make_notebook(path, big_output_size=200_000):
+    cells = [
+        {"cell_type": "markdown", "metadata": {}, "source": ["import notapackage\n"]},
+        {
+            "cell_type": "code",
+            "execution_count": 12345,
+            "metadata": {"tags": ["x"]},
+            "outputs": [
+                {
+                    "data": {"image/png": "A" * big_output_size, "text/plain": 'say "hi" \\'},
+                    "output_type": "display_data",
+                }
+            ],
+            "source": ["%matplotlib inline\n", "import pandas as pd\n", "!pip install x\n"],
+        },
+        {
+            "cell_type": "code",
+            "execution_count": None,
+            "metadata": {},
+            "outputs": [],
+            "source": "def f():\n    try:\n        import ujson\n    except ImportError:\n        pass\n",
+        },
+        {
+            "cell_type": "code",
+            "metadata": {},
+            "outputs": [],
+            "source": ["%%bash\n", "import not_python\n"],
+        },
+        {
+            "cell_type": "code",
+            "metadata": {},
+            "outputs": [],
+            "source": ["%%time\n", "files = !ls\n", "from sklearn import svm\n"],
+        },
+        {"cell_type": "code", "metadata": {}, "outputs": [], "source": ["obj?\n", "import rich\n"]},
+    ]
+    nb = {"metadata": {"kernelspec": {"name": "python3"}}, "nbformat": 4, "cells": cells}
+    path.write_text(json.dumps(nb, indent=1), encoding="utf-8")
+    return path
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1 << 20])
+def test_stream_matches_json_load(tmp_path, monkeypatch, chunk_size):
+    monkeypatch.setattr(nb_scan, "CHUNK_SIZE", chunk_size)
+    path = make_notebook(tmp_path / "nb.ipynb", big_output_size=5_000)
+    cells = json.loads(path.read_text(encoding="utf-8"))["cells"]
+    expected = [
+        "".join(c["source"]) if isinstance(c["source"], list) else c["source"]
+        for c in cells
+        if c["cell_type"] == "code"
+    ]
+    assert list(iter_code_cells(path)) == expected
+
+
+def test_scan_notebook_imports(tmp_path):
+    path = make_notebook(tmp_path / "nb.ipynb")
+    result = scan_notebook(path)
+    tops = [imp.top for imp in result.imports]
+    assert tops == ["pandas", "ujson", "sklearn", "rich"]
+    assert "not_python" not in result.code
+    assert "import ujson" in extract_imports_from_ipynb(path)
+
+
+def test_strip_magics_keeps_indentation():
+    source = "if True:\n    %time f()\n    import numpy\n"
+    assert strip_magics(source) == "if True:\n    pass\n    import numpy"
@@ -0,0 +1,99 @@
+import time
+import pytest
+import smartrun.pipeline as pipeline
+import smartrun.runner as runner
+from smartrun.options import Options
+
+STAGE = 0.3
+
+
+@pytest.fixture
+def slow_stages(monkeypatch):
+    """Each stage sleeps STAGE seconds and records when it ran."""
+    log = {}
+
+    def stage(name, result=None):
+        def fn(*args, **kw):
+            log[name] = [time.perf_counter(), None]
+            time.sleep(STAGE)
+            log[name][1] = time.perf_counter()
+            return result(*args) if callable(result) else result
+
+        return fn
+
+    def scan(path, opts, on_packages=None, site_dirs=None):
+        log["site_dirs"] = site_dirs
+        on_packages(["fastimg"])  # the entry file's imports are known first
+        stage("scan")()
+        return ["fastimg", "tinyplot"]
+
+    def install(opts, packages):
+        log["find_links"] = opts.find_links
+        stage("install")()
+
+    monkeypatch.setattr(runner, "scan_imports_file", scan)
+    monkeypatch.setattr(runner, "create_venv_path_or_get_active", stage("env", ".venv"))
+    monkeypatch.setattr(pipeline, "prefetch_missing", stage("prefetch", lambda o, p, d: p))
+    monkeypatch.setattr(pipeline, "find_uv", lambda: None)
+    monkeypatch.setattr(runner, "confirm_env", lambda opts, venv: True)
+    monkeypatch.setattr(runner, "install_packages_smart", install)
+    monkeypatch.setattr(runner, "run_script_in_venv", stage("run"))
+    monkeypatch.setattr(runner, "write_lockfile", stage("lockfile"))
+    return log
+
+
+def overlaps(log, a, b):
+    return log[a][0] < log[b][1] and log[b][0] < log[a][1]
+
+
+def test_stages_overlap(tmp_path, slow_stages):
+    script = tmp_path / "job.py"
+    script.write_text("import fastimg\n")
+    result = runner.run_script(Options(script, no_uv=True))
+    log = slow_stages
+    assert overlaps(log, "scan", "env") and overlaps(log, "scan", "prefetch")
+    assert overlaps(log, "run", "lockfile")
+    assert log["install"][0] >= max(log["scan"][1], log["env"][1], log["prefetch"][1])
+    # 6 stages of STAGE seconds, 3 at a time then install, then 2 at a time
+    assert result.timings.wall < 4 * STAGE < result.timings.serial
+    assert result.prefetched == ["fastimg"] and log["find_links"]
+    assert result.packages == ["fastimg", "tinyplot"]
+
+
+def test_scan_sees_env_as_it_was_before_creation(tmp_path, monkeypatch, slow_stages):
+    monkeypatch.chdir(tmp_path)
+    script = tmp_path / "job.py"
+    script.write_text("import fastimg\n")
+    opts = Options(script, no_uv=True, venv=str(tmp_path / "new-env"))
+    site = tmp_path / "new-env" / "lib" / "python3.99" / "site-packages"
+
+    def create(opts):
+        site.mkdir(parents=True)  # the env appears while the scan runs
+        return tmp_path / "new-env"
+
+    monkeypatch.setattr(runner, "create_venv_path_or_get_active", create)
+    runner.run_script(opts)
+    assert slow_stages["site_dirs"] == []
+    # install got a copy pointing at the prefetched wheels; opts is untouched
+    assert slow_stages["find_links"] and opts.find_links is None
+
+
+def test_no_prefetch_with_uv_or_wheelhouse(tmp_path, monkeypatch, slow_stages):
+    script = tmp_path / "job.py"
+    script.write_text("import fastimg\n")
+    monkeypatch.setattr(pipeline, "find_uv", lambda: "/bin/uv")
+    result = runner.run_script(Options(script))
+    assert "prefetch" not in result.timings.stages and not slow_stages["find_links"]
+    assert not pipeline.should_prefetch(Options(script, no_uv=True, wheelhouse=str(tmp_path)))
+
+
+def test_scan_error_propagates(tmp_path, monkeypatch, slow_stages):
+    def broken(path, opts, on_packages=None, site_dirs=None):
+        raise SyntaxError("bad script")
+
+    monkeypatch.setattr(runner, "scan_imports_file", broken)
+    script = tmp_path / "job.py"
+    script.write_text("")
+    with pytest.raises(SyntaxError):
+        runner.run_script(Options(script, no_uv=True))
+    assert slow_stages["env"][1] is not None  # finished, not abandoned
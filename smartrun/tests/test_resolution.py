@@ -0,0 +1,112 @@
+from smartrun.dist_info import iter_dists, read_headers
+from smartrun.import_collector import collect_imports
+from smartrun.package_name import PackageName
+from smartrun.resolution import (
+    EnvDistributionIndex,
+    ResolutionIndex,
+    distributions_for,
+)
+from smartrun.scan_imports import Scan
+
+
+def make_dist(site, name, version, top_level=None, files=()):
+    info = site / f"{name.replace('-', '_')}-{version}.dist-info"
+    info.mkdir(parents=True)
+    info.joinpath("METADATA").write_text(
+        f"Metadata-Version: 2.1\nName: {name}\nVersion: {version}\n\nLong text\n"
+    )
+    if top_level is not None:
+        info.joinpath("top_level.txt").write_text("\n".join(top_level) + "\n")
+    record = [f"{f},sha256=x,1" for f in files]
+    record.append(f"{info.name}/METADATA,,")
+    info.joinpath("RECORD").write_text("\n".join(record) + "\n")
+    return info
+
+
+def offline_index():
+    return ResolutionIndex(EnvDistributionIndex())
+
+
+def resolve(source, index=None):
+    return distributions_for(collect_imports(source), index or offline_index())
+
+
+def test_bundled_names_and_longest_prefix():
+    assert resolve("import skimage.io") == ["scikit-image"]
+    assert resolve("import dateutil.parser") == ["python-dateutil"]
+    assert resolve("from google.cloud import storage") == ["google-cloud-storage"]
+    assert resolve("import google.cloud.bigquery as bq") == ["google-cloud-bigquery"]
+    assert resolve("import cv2\nimport somethingunknown") == [
+        "opencv-python",
+        "somethingunknown",
+    ]
+
+
+def test_read_headers_stops_at_body(tmp_path):
+    info = make_dist(tmp_path, "demo-pkg", "1.2")
+    headers = read_headers(info / "METADATA", ("Name", "Version", "Summary"))
+    assert headers == {"Name": ["demo-pkg"], "Version": ["1.2"]}
+    assert [(d.name, d.version) for d in iter_dists(tmp_path)] == [("demo-pkg", "1.2")]
+
+
+def test_target_env_dist_info(tmp_path):
+    site = tmp_path / "site-packages"
+    make_dist(site, "fast-image", "1.0", top_level=["fastimg"])
+    # no top_level.txt: inferred from RECORD
+    make_dist(site, "fancy-utils", "2.0", files=["fancyutils/__init__.py", "single.py"])
+    index = ResolutionIndex(EnvDistributionIndex([site]))
+    assert resolve("from fastimg import Image", index) == ["fast-image"]
+    assert resolve("import fancyutils\nimport single", index) == ["fancy-utils"]
+
+
+def test_namespace_package_split_by_record(tmp_path):
+    site = tmp_path / "site-packages"
+    make_dist(site, "acme-core", "1", top_level=["acme"], files=["acme/core/__init__.py"])
+    make_dist(site, "acme-extra", "1", top_level=["acme"], files=["acme/extra/x.py"])
+    index = ResolutionIndex(EnvDistributionIndex([site]))
+    assert resolve("import acme.core", index) == ["acme-core"]
+    assert resolve("from acme.extra import x", index) == ["acme-extra"]
+
+
+def test_package_name_keeps_distribution_names():
+    assert PackageName("sklearn>=1.3").name_version == "scikit-learn>=1.3"
+    assert PackageName("zope.interface").name == "zope.interface"
+    assert PackageName("google-cloud-storage").name == "google-cloud-storage"
+
+
+def test_scan_resolves_to_distributions():
+    s = Scan("import skimage\nfrom google.cloud import storage\nimport os\n")
+    names = sorted(p.name for p in s())
+    assert names == ["google-cloud-storage", "scikit-image"]
+
+
+def test_package_name_reads_no_environment(monkeypatch):
+    import smartrun.resolution as resolution
+
+    def fail(opts=None):
+        raise AssertionError("PackageName must not build an environment index")
+
+    monkeypatch.setattr(resolution, "get_resolution_index", fail)
+    assert PackageName("yaml").name == "PyYAML"
+
+
+def test_scan_builds_one_index_for_opts_venv(tmp_path, monkeypatch):
+    import smartrun.envc.envc2 as envc2
+    import smartrun.scan_imports as scan_imports
+    from smartrun.options import Options
+
+    monkeypatch.setattr(envc2.EnvComplete, "get", staticmethod(lambda: {"active": False}))
+    env = tmp_path / "env"
+    make_dist(env / "lib" / "python3.99" / "site-packages", "fast-image", "1.0", top_level=["fastimg"])
+    script = tmp_path / "job.py"
+    script.write_text("import fastimg\n# smartrun: fastimg\n")
+    built = []
+    real = scan_imports.get_resolution_index
+    monkeypatch.setattr(
+        scan_imports,
+        "get_resolution_index",
+        lambda opts=None, site_dirs=None: built.append(opts) or real(opts, site_dirs),
+    )
+    opts = Options(script, venv=str(env), no_cache=True)
+    packages = scan_imports.scan_file_packages(script, opts).packages
+    assert [p.name for p in packages] == ["fast-image"] and built == [opts]
@@ -0,0 +1,117 @@
+import json
+
+import pytest
+import smartrun.runner as runner
+from smartrun.options import Options
+from smartrun.resolution_cache import (
+    ResolutionCache,
+    is_cacheable,
+    requirement_closure,
+)
+
+pytest.importorskip("packaging")
+
+
+def make_site(root, dists):
+    site = root / "lib" / "python3.11" / "site-packages"
+    for name, (version, requires) in dists.items():
+        info = site / f"{name}-{version}.dist-info"
+        info.mkdir(parents=True)
+        lines = ["Metadata-Version: 2.1", f"Name: {name}", f"Version: {version}"]
+        lines += [f"Requires-Dist: {r}" for r in requires]
+        info.joinpath("METADATA").write_text("\n".join(lines) + "\n\nbody\n")
+    return site
+
+
+@pytest.fixture
+def cwd(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("CONDA_DEFAULT_ENV", raising=False)
+    for name in ("PIP_INDEX_URL", "SMARTRUN_RESOLUTION_TTL", "SMARTRUN_WHEELHOUSE"):
+        monkeypatch.delenv(name, raising=False)
+    return tmp_path
+
+
+def test_key_is_stable_and_covers_index(cwd, monkeypatch):
+    opts = Options("x.py")
+    a = ResolutionCache(["requests", "Rich>=13"], opts)
+    assert a.key == ResolutionCache(["rich>=13", "requests"], opts).key
+    assert a.key != ResolutionCache(["requests"], opts).key
+    monkeypatch.setenv("PIP_INDEX_URL", "https://mirror.example/simple")
+    assert a.key != ResolutionCache(["requests", "rich>=13"], opts).key
+
+
+def test_key_covers_env_python(cwd):
+    env = cwd / "env"
+    env.mkdir()
+    env.joinpath("pyvenv.cfg").write_text("home = /usr/bin\nversion_info = 3.9.18.final.0\n")
+    cache = ResolutionCache(["requests"], Options("x.py"), env_path=env)
+    assert cache.python == "3.9"
+    assert cache.key != ResolutionCache(["requests"], Options("x.py")).key
+
+
+def test_store_load_ttl_and_refresh(cwd):
+    cache = ResolutionCache(["requests"], Options("x.py", resolution_ttl=60))
+    assert cache.load() is None
+    cache.store({"requests": "2.32.3", "idna": "3.7"})
+    entry = cache.load()
+    assert entry.pins == {"requests": "2.32.3", "idna": "3.7"}
+    assert json.loads(cache.entry_path.read_text())["requirements"] == ["requests"]
+    assert cache.load(now=entry.created + 61) is None
+    assert ResolutionCache(["requests"], Options("x.py", refresh=True)).load() is None
+
+
+def test_uncacheable_requirements():
+    assert is_cacheable(["requests>=2", "rich"])
+    assert not is_cacheable(["pkg @ https://example.com/pkg.whl"])
+    assert not is_cacheable(["pywin32; sys_platform == 'win32'"])
+
+
+def test_requirement_closure(tmp_path):
+    site = make_site(
+        tmp_path,
+        {
+            "requests": ("2.32.3", ["idna>=2", 'PySocks!=1.5.7; extra == "socks"']),
+            "idna": ("3.7", []),
+            "PySocks": ("1.7.1", []),
+        },
+    )
+    assert requirement_closure(["Requests"], [site]) == {"idna": "3.7", "requests": "2.32.3"}
+    assert requirement_closure(["requests[socks]"], [site]) == {
+        "idna": "3.7",
+        "PySocks": "1.7.1",
+        "requests": "2.32.3",
+    }
+    assert requirement_closure(["rich"], [site]) is None
+
+
+def test_install_uses_cached_pins(cwd, monkeypatch):
+    opts = Options("x.py")
+    make_site(cwd / ".venv", {})
+    cache = ResolutionCache(["requests"], opts, env_path=cwd / ".venv")
+    cache.store({"requests": "2.32.3", "idna": "3.7"})
+    calls = []
+    monkeypatch.setattr(runner, "find_uv", lambda: "uv")
+    monkeypatch.setattr(
+        runner.SubprocessSmart, "run_command", lambda self, cmd, **kw: calls.append(cmd) or True
+    )
+    runner.install_packages_smart(opts, ["requests"])
+    assert len(calls) == 1
+    assert "--no-deps" in calls[0]
+    assert calls[0][-2:] == ["requests==2.32.3", "idna==3.7"]
+
+
+def test_resolved_install_is_cached(cwd, monkeypatch):
+    opts = Options("x.py")
+    venv = cwd / ".venv"
+    venv.mkdir()
+
+    def install(self, cmd, **kw):
+        make_site(venv, {"requests": ("2.32.3", ["idna"]), "idna": ("3.7", [])})
+        return True
+
+    monkeypatch.setattr(runner, "find_uv", lambda: "uv")
+    monkeypatch.setattr(runner.SubprocessSmart, "run_command", install)
+    runner.install_packages_smart(opts, ["requests"])
+    entry = ResolutionCache(["requests"], opts, env_path=venv).load()
+    assert entry.pins == {"idna": "3.7", "requests": "2.32.3"}
@@ -0,0 +1,97 @@
+import json
+
+import pytest
+import smartrun.runner as runner
+from smartrun.batch_scan import FileScan
+from smartrun.cli import main
+from smartrun.env_store import EnvStore
+from smartrun.options import Options
+from smartrun.run_many import expand_targets, group_by_requirements, run_many
+
+
+@pytest.fixture
+def scripts(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("SMARTRUN_ENVS", str(tmp_path / "envs"))
+    monkeypatch.delenv("CONDA_DEFAULT_ENV", raising=False)
+    (tmp_path / "jobs").mkdir()
+    (tmp_path / "jobs" / "a.py").write_text("import os\nprint('a says hi')\n")
+    (tmp_path / "jobs" / "b.py").write_text("import sys\nprint('b fails')\nsys.exit(3)\n")
+    (tmp_path / "jobs" / "notes.md").write_text("not a script\n")
+    (tmp_path / "c.py").write_text("import json\n")
+    return tmp_path
+
+
+def test_expand_targets(scripts):
+    (scripts / "list.txt").write_text("# nightly\njobs/a.py\nc.py\n")
+    assert [p.name for p in expand_targets(["jobs/*.py"])] == ["a.py", "b.py"]
+    assert [p.name for p in expand_targets(["jobs"])] == ["a.py", "b.py"]
+    assert [p.name for p in expand_targets(["@list.txt", "jobs/a.py"])] == ["a.py", "c.py"]
+    assert [p.name for p in expand_targets(["missing.py"])] == ["missing.py"]
+
+
+def test_group_by_requirements():
+    scans = [
+        FileScan("a.py", ["numpy"]),
+        FileScan("b.py", ["numpy", "pandas"]),
+        FileScan("c.py", ["Rich"]),
+        FileScan("d.py", ["rich"]),
+        FileScan("nb.ipynb", ["numpy"]),
+        FileScan("bad.py", error="SyntaxError: x"),
+    ]
+    groups = group_by_requirements(scans)
+    assert [(g.requirements, g.scripts) for g in groups] == [
+        (["ipykernel", "nbconvert", "numpy"], ["nb.ipynb", "a.py"]),
+        (["numpy", "pandas"], ["b.py"]),
+        (["rich"], ["c.py", "d.py"]),
+    ]
+
+
+def test_run_many_one_env_per_group(scripts, capsys):
+    store = EnvStore(scripts / "envs")
+    targets = expand_targets(["jobs", "c.py"])
+    result = run_many(targets, Options("run-many"), jobs=2, store=store)
+    assert len(result.groups) == 1
+    assert len(store.envs()) == 1
+    codes = {r.path.split("/")[-1]: r.returncode for r in result.runs}
+    assert codes == {"a.py": 0, "b.py": 3, "c.py": 0}
+    assert not result.ok and [r.path for r in result.failed] == ["jobs/b.py"]
+    out = capsys.readouterr().out
+    assert "a says hi" in out and "b fails" in out
+    report = json.loads((scripts / ".smartrun" / "run_many.json").read_text())
+    assert set(report["phases"]) == {"scan", "envs", "run"}
+    assert [r["returncode"] for r in report["runs"]] == [0, 3, 0]
+
+
+def test_each_env_installed_once(scripts, monkeypatch):
+    (scripts / "x.py").write_text("import rich\n")
+    (scripts / "y.py").write_text("import rich\nimport numpy\n")
+    installs = []
+    monkeypatch.setattr(
+        runner, "install_packages_smart", lambda opts, reqs: installs.append((opts.venv, reqs))
+    )
+    result = run_many(expand_targets(["x.py", "y.py"]), Options("run-many"), jobs=2)
+    assert len(installs) == 1 and installs[0][1] == ["numpy", "rich"]
+    assert {r.env for r in result.runs} == {installs[0][0]}
+
+
+def test_cli_exit_code(scripts):
+    main(["run-many", "jobs/a.py", "c.py"])
+    with pytest.raises(SystemExit):
+        main(["run-many", "jobs/*.py"])
+
+
+def test_same_name_scripts_keep_their_own_lockfile(scripts, monkeypatch):
+    import smartrun.utils as utils
+
+    for folder in ("a", "b"):
+        (scripts / folder).mkdir()
+        (scripts / folder / "main.py").write_text("import os\n")
+    monkeypatch.setattr(utils, "get_packages_native", lambda venv: {"rich": "13.0"})
+    run_many(expand_targets(["a/main.py", "b/main.py"]), Options("run-many"), jobs=2)
+    locks = sorted((scripts / ".smartrun").glob("smartrun-main-*.lock.json"))
+    assert len(locks) == 2
+    assert sorted(json.loads(p.read_text())["script"] for p in locks) == [
+        "a/main.py",
+        "b/main.py",
+    ]
@@ -0,0 +1,82 @@
+import pytest
+import smartrun.runner as runner
+import smartrun.satisfaction as satisfaction
+from smartrun.envc.envc2 import EnvComplete
+from smartrun.module_index import target_env_path
+from smartrun.options import Options
+from smartrun.subprocess_ import SubprocessSmart
+from smartrun.satisfaction import check_satisfied, version_satisfies
+
+
+def make_venv(root, dists):
+    site = root / "lib" / "python3.11" / "site-packages"
+    for name, version in dists.items():
+        info = site / f"{name}-{version}.dist-info"
+        info.mkdir(parents=True)
+        info.joinpath("METADATA").write_text(
+            f"Metadata-Version: 2.1\nName: {name}\nVersion: {version}\n\nbody\n"
+        )
+    return root
+
+
+def active_env(monkeypatch, kind=None, path=None):
+    info = {"active": kind is not None, "type": kind, "name": None, "path": path}
+    monkeypatch.setattr(EnvComplete, "get", staticmethod(lambda: dict(info)))
+
+
+@pytest.fixture
+def venv(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    active_env(monkeypatch)  # also when the tests run inside a venv
+    return make_venv(tmp_path / ".venv", {"numpy": "1.26.4", "PyYAML": "6.0.1"})
+
+
+def test_version_satisfies():
+    assert version_satisfies("1.26.4", None)
+    assert version_satisfies("1.26.4", ">=1.20,<2")
+    assert not version_satisfies("1.26.4", ">=2")
+    assert version_satisfies("2.0.0rc1", ">=2.0.0rc1")
+    assert not version_satisfies("not-a-version", ">=1")
+
+
+def test_exact_pins_without_packaging(monkeypatch):
+    monkeypatch.setattr(satisfaction, "HAS_PACKAGING", False)
+    assert version_satisfies("6.0.1", "==6.0.1")
+    assert not version_satisfies("6.0.1", ">=6")
+
+
+def test_check_satisfied(venv):
+    site = next(venv.glob("lib/python*/site-packages"))
+    result = check_satisfied(
+        ["numpy>=1.20", "pyyaml", "numpy<1", "rich", "numpy[extra]", "yaml"], [site]
+    )
+    assert [str(p) for p in result.satisfied] == ["numpy>=1.20", "pyyaml", "PyYAML"]
+    assert [str(p) for p in result.missing] == ["numpy<1", "rich", "numpy[extra]"]
+
+
+def test_install_skips_installer_when_satisfied(venv, monkeypatch):
+    calls = []
+    monkeypatch.setattr(runner.SubprocessSmart, "run", lambda self, p, **kw: calls.append(p) or True)
+    runner.install_packages_smart(Options("x.py"), ["numpy>=1", "pyyaml==6.0.1"])
+    assert calls == []
+    runner.install_packages_smart(Options("x.py"), ["numpy>=1", "rich"])
+    assert calls == [["-m", "uv", "pip", "install", "rich"]]
+
+
+@pytest.mark.parametrize("kind", ["conda", "virtual_env"])
+def test_one_target_env_for_install_and_checks(tmp_path, monkeypatch, kind):
+    monkeypatch.chdir(tmp_path)
+    active = make_venv(tmp_path / "active", {"rich": "13.7.0"})
+    active_env(monkeypatch, kind, str(active))
+    opts = Options("x.py", venv="other")
+    assert target_env_path(opts) == active
+    assert str(SubprocessSmart(opts).python_path).startswith(str(active))
+    assert satisfaction.check_satisfied_in_target(opts, ["rich"]).all_satisfied
+    # a --shared run installs into its store env whatever is active
+    shared = Options("x.py", venv=str(tmp_path / "store-env"), shared=True)
+    assert target_env_path(shared) == tmp_path / "store-env"
+
+
+def test_target_env_without_active_env(venv, monkeypatch):
+    assert target_env_path(Options("x.py")).resolve() == venv.resolve()
+    assert target_env_path(Options("x.py", venv="envs/a")).as_posix() == "envs/a"
@@ -1,5 +1,7 @@
+from smartrun.options import Options
 from smartrun.scan_imports import (
     Scan,
+    scan_imports_file,
 )
 from smartrun.package_name import PackageName
 
@@ -29,3 +31,53 @@ def test_scan_imports_simple():
     print(a)
     assert PackageName("pandas") not in a
     assert PackageName("numpy") in a
+
+
+def test_scan_skips_local_and_relative_imports(tmp_path):
+    (tmp_path / "utils.py").write_text("")
+    (tmp_path / "models").mkdir()
+    (tmp_path / "models" / "__init__.py").write_text("")
+    script = "import utils\nfrom models import Net\nfrom . import x\nfrom .helpers import y\nimport rich"
+    s = Scan(script, path=tmp_path)
+    a: list[PackageName] = s()
+    assert a == [PackageName("rich")]
+
+
+def guarded_script():
+    return """
+from typing import TYPE_CHECKING
+import numpy
+try:
+    import ujson
+except ImportError:
+    ujson = None
+if TYPE_CHECKING:
+    import pandas
+def f():
+    try:
+        import numpy
+    except ImportError:
+        pass
+"""
+
+
+def test_scan_import_policy():
+    s = Scan(guarded_script())
+    assert s() == [PackageName("numpy")]
+    assert s.skipped == {"ujson": "optional", "pandas": "type-checking"}
+    s = Scan(guarded_script(), policy="optional")
+    assert sorted(p.name for p in s()) == ["numpy", "ujson"]
+    s = Scan(guarded_script(), policy="all")
+    assert sorted(p.name for p in s()) == ["numpy", "pandas", "ujson"]
+    assert s.skipped == {}
+
+
+def test_packages_in_lists_skipped_imports(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    script = tmp_path / "main.py"
+    script.write_text(guarded_script() + "#smartrun: ujson\n")
+    packages = scan_imports_file(script, Options(script))
+    assert sorted(p.name for p in packages) == ["numpy", "ujson"]
+    lines = (tmp_path / ".smartrun" / "packages.in").read_text().splitlines()
+    assert "numpy" in lines and "ujson" in lines
+    assert "# pandas" in lines and "# ujson" not in lines
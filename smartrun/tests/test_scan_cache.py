@@ -0,0 +1,78 @@
+import pytest
+import smartrun.scan_imports as scan_imports
+from smartrun.options import Options
+from smartrun.package_name import PackageName
+from smartrun.scan_cache import ScanCache
+from smartrun.scan_imports import scan_imports_file
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "helpers.py").write_text("import seaborn\n")
+    script = tmp_path / "main.py"
+    script.write_text("import helpers\nimport numpy\n")
+    return script
+
+
+def _no_scan(*args, **kw):
+    raise AssertionError("scan should have been served from the cache")
+
+
+def test_second_scan_is_served_from_cache(project, monkeypatch):
+    opts = Options(project, exc="helpers")
+    first = scan_imports_file(project, opts)
+    assert PackageName("seaborn") in first
+    assert ScanCache(project, opts).load() is not None
+    monkeypatch.setattr(scan_imports, "get_problematic_module_names", _no_scan)
+    monkeypatch.setattr(scan_imports, "make_scan", _no_scan)
+    second = scan_imports_file(project, opts)
+    assert set(second) == set(first)
+
+
+def test_child_change_invalidates_entry(project):
+    opts = Options(project, exc="helpers")
+    scan_imports_file(project, opts)
+    (project.parent / "helpers.py").write_text("import plotly\n")
+    assert ScanCache(project, opts).load() is None
+    packages = scan_imports_file(project, opts)
+    assert PackageName("plotly") in packages
+    assert PackageName("seaborn") not in packages
+
+
+def test_script_change_and_options_change_key(project):
+    opts = Options(project)
+    key = ScanCache(project, opts).key
+    assert ScanCache(project, Options(project, inc="rich")).key != key
+    project.write_text("import pandas\n")
+    assert ScanCache(project, opts).key != key
+
+
+def test_no_cache_option(project):
+    opts = Options(project, no_cache=True)
+    scan_imports_file(project, opts)
+    assert ScanCache(project, opts).load() is None
+
+
+def test_files_a_run_writes_keep_the_entry(project):
+    opts = Options(project, exc="helpers")
+    scan_imports_file(project, opts)
+    # what the first run leaves next to the script
+    (project.parent / ".venv").mkdir()
+    (project.parent / ".smartrun" / "smartrun-main.lock.json").write_text("{}")
+    (project.parent / "notes.txt").write_text("")
+    assert ScanCache(project, opts).load() is not None
+
+
+def test_new_local_module_invalidates_entry(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    script = tmp_path / "main.py"
+    script.write_text("import helpers, requests\n")
+    opts = Options(script)
+    first = scan_imports_file(script, opts)
+    assert set(first) == {PackageName("helpers"), PackageName("requests")}
+    (tmp_path / "helpers.py").write_text("import rich\n")
+    assert ScanCache(script, opts).load() is None
+    packages = scan_imports_file(script, opts)
+    assert set(packages) == set(scan_imports_file(script, Options(script, no_cache=True)))
+    assert set(packages) == {PackageName("requests"), PackageName("rich")}
@@ -0,0 +1,87 @@
+import sys
+import threading
+import time
+from smartrun.options import Options
+from smartrun.streaming import (
+    DOWNLOADING,
+    ERROR,
+    EVENT_LIMIT,
+    INSTALLED,
+    RESOLVED,
+    install_timeout,
+    parse_progress,
+    run_streaming,
+)
+from smartrun.subprocess_ import SubprocessSmart
+
+
+def python(code):
+    return [sys.executable, "-c", code]
+
+
+def test_parse_pip_and_uv_lines():
+    assert parse_progress("Collecting rich==13.0").name == "rich==13.0"
+    event = parse_progress("  Downloading rich-13.0-py3-none-any.whl (240 kB)")
+    assert event.kind == DOWNLOADING and event.name.startswith("rich-13.0")
+    assert parse_progress("Successfully installed rich-13.0").kind == INSTALLED
+    assert parse_progress("ERROR: No matching distribution").kind == ERROR
+    assert parse_progress("Resolved 12 packages in 1.02s").kind == RESOLVED
+    assert parse_progress(" + rich==13.0").name == "rich==13.0"
+    assert parse_progress("error: No solution found").kind == ERROR
+    assert parse_progress("Requirement already satisfied: rich") is None
+
+
+def test_output_is_streamed_and_bounded():
+    code = (
+        "import sys\n"
+        "print('Collecting fastimg', flush=True)\n"
+        "for i in range(20000): print('noise', i)\n"
+        "print('ERROR: broken', file=sys.stderr)\n"
+        "sys.exit(3)"
+    )
+    seen = []
+    result = run_streaming(python(code), on_event=seen.append, tail_lines=50)
+    assert result.returncode == 3 and not result.ok
+    assert len(result.tail) == 51  # 50 stdout lines, 1 stderr line
+    assert [e.kind for e in seen] == ["collecting", ERROR]
+    assert result.events == seen
+    assert "ERROR: broken" in result.error_report()
+    assert result.completed().stderr == "ERROR: broken"
+
+
+def test_progress_events_are_bounded():
+    code = "for i in range(%d): print('Collecting pkg%%d' %% i)" % (EVENT_LIMIT * 3)
+    result = run_streaming(python(code))
+    assert len(result.events) == EVENT_LIMIT
+    assert result.events[-1].name == f"pkg{EVENT_LIMIT * 3 - 1}"
+
+
+def test_install_timeout_flag_beats_env_var(monkeypatch):
+    monkeypatch.setenv("SMARTRUN_INSTALL_TIMEOUT", "30")
+    assert install_timeout(5) == 5
+    assert install_timeout() == 30
+    monkeypatch.setenv("SMARTRUN_INSTALL_TIMEOUT", "soon")
+    assert install_timeout() is None
+
+
+def test_timeout_stops_the_child():
+    start = time.monotonic()
+    result = run_streaming(python("import time; time.sleep(60)"), timeout=0.5)
+    assert result.timed_out and not result.ok
+    assert time.monotonic() - start < 10
+    assert "timed out" in result.error_report()
+
+
+def test_cancel_stops_the_child():
+    cancel = threading.Event()
+    threading.Timer(0.3, cancel.set).start()
+    result = run_streaming(python("import time; time.sleep(60)"), cancel=cancel)
+    assert result.cancelled and result.returncode is not None
+
+
+def test_subprocess_smart_streams(monkeypatch):
+    process = SubprocessSmart(Options("x.py", install_timeout=0.5))
+    process.python_path = sys.executable
+    assert process.run(["-c", "print('ok')"], return_output=True).stdout == "ok"
+    assert process.run(["-c", "import time; time.sleep(60)"]) is False
+    assert process.last_result.timed_out
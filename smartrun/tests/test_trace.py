@@ -0,0 +1,53 @@
+import json
+import threading
+
+import smartrun.trace as trace
+from smartrun.cli import main
+from smartrun.trace import span, traced, tracing
+
+
+def test_span_is_noop_without_trace():
+    assert trace._tracer is None
+    with span("nothing"):
+        pass
+    assert traced("x")(lambda: 5)() == 5
+
+
+def test_tracing_writes_chrome_trace(tmp_path, capsys):
+    @traced("work", "test")
+    def work():
+        with span("inner", "test", step=1):
+            pass
+
+    out = tmp_path / "trace.json"
+    with tracing(str(out)) as tracer:
+        work()
+        worker = threading.Thread(target=work, name="worker")
+        worker.start()
+        worker.join()
+    assert trace._tracer is None
+    data = json.loads(out.read_text())
+    events = [e for e in data["traceEvents"] if e["ph"] == "X"]
+    assert [e["name"] for e in events].count("inner") == 2
+    inner, outer = events[0], events[1]
+    assert (inner["name"], outer["name"]) == ("inner", "work")
+    assert outer["ts"] <= inner["ts"] and inner["ts"] + inner["dur"] <= outer["ts"] + outer["dur"]
+    assert inner["args"] == {"step": "1"}
+    threads = {e["args"]["name"] for e in data["traceEvents"] if e["name"] == "thread_name"}
+    assert "worker" in threads
+    assert tracer.totals()["work"][1] == 2
+    assert "work" in capsys.readouterr().out
+
+
+def test_trace_of_a_run(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("CI", "true")
+    for name in ("VIRTUAL_ENV", "CONDA_DEFAULT_ENV"):
+        monkeypatch.delenv(name, raising=False)
+    (tmp_path / "hello.py").write_text("import json\nprint('hello')\n")
+    main(["hello.py", "--trace", "run.json"])
+    names = {e["name"] for e in json.loads((tmp_path / "run.json").read_text())["traceEvents"]}
+    for phase in ("smartrun", "scan", "scan_imports_file", "EnvComplete.get", "env"):
+        assert phase in names
+    for phase in ("install_packages_smart", "run", "script", "lockfile"):
+        assert phase in names
@@ -24,3 +24,50 @@ def test_get_bin_path():
     venv_path = Path(".venv")
     a = get_bin_path(venv_path, "python")
     # assert a.is_file()
+
+
+def make_fake_venv(root: Path, dists: dict) -> Path:
+    site = root / "lib" / "python3.11" / "site-packages"
+    for name, version in dists.items():
+        info = site / f"{name}-{version}.dist-info"
+        info.mkdir(parents=True)
+        info.joinpath("METADATA").write_text(
+            f"Metadata-Version: 2.1\nName: {name}\nVersion: {version}\n\nbody\n"
+        )
+    (site / "legacy.egg-info").mkdir()
+    (site / "legacy.egg-info" / "PKG-INFO").write_text("Name: legacy\nVersion: 0.1\n")
+    return root
+
+
+def test_native_lockfile_matches_pip_list():
+    import json
+    import subprocess
+    import sys
+    from smartrun.utils import get_packages_native
+
+    out = subprocess.run(
+        [sys.executable, "-m", "pip", "list", "--format=json"],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    expected = {p["name"]: p["version"] for p in json.loads(out)}
+    assert get_packages_native(Path(sys.prefix)) == expected
+
+
+def test_write_lockfile_reads_metadata(tmp_path, monkeypatch):
+    import json
+    import smartrun.dist_info as dist_info
+    from smartrun.utils import write_lockfile
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(dist_info, "PARALLEL_THRESHOLD", 1)
+    monkeypatch.setattr(dist_info.os, "cpu_count", lambda: 4)
+    venv = make_fake_venv(tmp_path / "env", {"PyYAML": "6.0.1", "numpy": "1.26.4"})
+    write_lockfile("job.py", venv)
+    lock = json.loads((tmp_path / ".smartrun" / "smartrun-job.lock.json").read_text())
+    assert lock["resolved_packages"] == {
+        "PyYAML": "6.0.1",
+        "legacy": "0.1",
+        "numpy": "1.26.4",
+    }
@@ -0,0 +1,97 @@
+import json
+import zipfile
+import pytest
+import smartrun.installers.from_json_fast as fast
+import smartrun.runner as runner
+import smartrun.wheelhouse as wheelhouse
+from smartrun.cli import main
+from smartrun.options import Options
+from smartrun.streaming import StreamResult
+from smartrun.wheelhouse import (
+    WheelhouseError,
+    build_wheelhouse,
+    dist_file_pin,
+    load_wheelhouse,
+    offline_args,
+    read_lock,
+    verify_wheelhouse,
+)
+
+
+def make_wheel(folder, name, version):
+    path = folder / f"{name}-{version}-py3-none-any.whl"
+    info = f"{name}-{version}.dist-info"
+    with zipfile.ZipFile(path, "w") as z:
+        z.writestr(f"{name}/__init__.py", "")
+        z.writestr(f"{info}/METADATA", f"Metadata-Version: 2.1\nName: {name}\nVersion: {version}\n")
+        z.writestr(f"{info}/WHEEL", "Wheel-Version: 1.0\nRoot-Is-Purelib: true\nTag: py3-none-any\n")
+        z.writestr(f"{info}/RECORD", "")
+    return path
+
+
+def test_dist_file_pin():
+    assert dist_file_pin("Jinja2-3.1.6-py3-none-any.whl") == "jinja2==3.1.6"
+    assert dist_file_pin("numpy-2.0.0-1-cp311-cp311-linux_x86_64.whl") == "numpy==2.0.0"
+    assert dist_file_pin("pyyaml-6.0.2.tar.gz") == "pyyaml==6.0.2"
+    assert dist_file_pin("wheelhouse.json") is None
+
+
+def test_read_lock_formats(tmp_path):
+    (tmp_path / "a.json").write_text(json.dumps({"resolved_packages": {"rich": "13.0"}}))
+    (tmp_path / "a.txt").write_text("# frozen\nrich==13.0\nx @ file:///x\n")
+    (tmp_path / "a.yaml").write_text("dependencies:\n  runtime:\n    rich: '13.0'\n")
+    for suffix in ("json", "txt", "yaml"):
+        assert read_lock(tmp_path / f"a.{suffix}") == {"rich": "13.0"}
+
+
+def test_bundle_lock_offline(tmp_path, monkeypatch):
+    index = tmp_path / "index"
+    index.mkdir()
+    make_wheel(index, "fastimg", "1.0")
+    make_wheel(index, "tinyplot", "0.2")
+    # pip reads its index settings from the environment: a local stand-in
+    monkeypatch.setenv("PIP_NO_INDEX", "1")
+    monkeypatch.setenv("PIP_FIND_LINKS", str(index))
+    lock = tmp_path / "job.lock.json"
+    lock.write_text(json.dumps({"resolved_packages": {"fastimg": "1.0", "tinyplot": "0.2"}}))
+    main(["bundle", str(lock), "--wheelhouse", str(tmp_path / "wh")])
+    house = load_wheelhouse(tmp_path / "wh")
+    assert house.ok and house.requirements == ["fastimg==1.0", "tinyplot==0.2"]
+    assert verify_wheelhouse(tmp_path / "wh") == []
+    (tmp_path / "wh" / "fastimg-1.0-py3-none-any.whl").write_bytes(b"tampered")
+    assert verify_wheelhouse(tmp_path / "wh") == ["fastimg-1.0-py3-none-any.whl"]
+
+
+def test_missing_pins_are_recorded(tmp_path, monkeypatch):
+    monkeypatch.setattr(fast, "prefetch_wheels", lambda specs, dest, python, **kw: list(specs))
+    monkeypatch.setattr(wheelhouse, "run_streaming", lambda cmd, **kw: StreamResult(cmd, 1))
+    house = build_wheelhouse(tmp_path / "wh", pins={"nothere": "1.0"})
+    assert not house.ok and house.missing == ["nothere==1.0"]
+
+
+def test_installers_go_offline(tmp_path, monkeypatch):
+    assert offline_args(None) == []
+    with pytest.raises(WheelhouseError):
+        offline_args(tmp_path / "absent")
+    assert offline_args(tmp_path)[:2] == ["--no-index", "--find-links"]
+    calls = []
+    monkeypatch.setattr(runner.SubprocessSmart, "run", lambda self, p, **kw: calls.append(p))
+    monkeypatch.setattr(runner, "_ensure_pip", lambda p: True)
+    opts = Options("x.py", no_uv=True, wheelhouse=str(tmp_path))
+    runner.install_packages_smart(opts, ["not-installed-pkg-xyz"])
+    assert calls[0][:6] == ["-m", "pip", "install", "--no-index", "--find-links", str(tmp_path)]
+
+
+def test_bundle_reads_run_many_lock(tmp_path, monkeypatch):
+    from smartrun.utils import name_format_json
+
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "a").mkdir()
+    script = tmp_path / "a" / "main.py"
+    script.write_text("import rich\n")
+    lock = name_format_json(str(script), by_path=True)  # as run-many names it
+    lock.write_text(json.dumps({"resolved_packages": {"rich": "13.0"}}))
+    calls = []
+    monkeypatch.setattr(wheelhouse, "build_wheelhouse", lambda dest, **kw: calls.append(kw))
+    wheelhouse.bundle(script, tmp_path / "wh")
+    assert calls[0]["pins"] == {"rich": "13.0"} and calls[0]["source"] == lock
@@ -0,0 +1,151 @@
+"""
+Phase timing for one smartrun invocation: `smartrun script.py --trace FILE`.
+Spans are recorded for the run stages, the import scan, environment
+detection, every installer subprocess, the script itself and the lock
+file. They are written as Chrome trace-event JSON (load it in
+chrome://tracing or https://ui.perfetto.dev), and a one-line summary is
+printed at the end of the run. Spans nest by time on each thread.
+
+Without --trace (or SMARTRUN_TRACE=FILE) nothing is recorded: span()
+returns a shared no-op context manager.
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Optional, Union
+
+TRACE_ENV_VAR = "SMARTRUN_TRACE"  # FILE, the same as --trace FILE
+_NO_SPAN = nullcontext()
+
+
+class Tracer:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.events = []  # complete ("X") events
+        self.threads = {}  # tid -> thread name
+        self._lock = threading.Lock()
+
+    def _now_us(self) -> float:
+        return (time.perf_counter() - self.started) * 1e6
+
+    @contextmanager
+    def span(self, name: str, cat: str = "smartrun", **args):
+        thread = threading.current_thread()
+        start = self._now_us()
+        try:
+            yield
+        finally:
+            event = {
+                "name": name,
+                "cat": cat,
+                "ph": "X",
+                "ts": round(start, 1),
+                "dur": round(self._now_us() - start, 1),
+                "pid": os.getpid(),
+                "tid": thread.ident,
+            }
+            if args:
+                event["args"] = {k: str(v) for k, v in args.items()}
+            with self._lock:
+                self.events.append(event)
+                self.threads.setdefault(thread.ident, thread.name)
+
+    @property
+    def wall(self) -> float:
+        return max((e["ts"] + e["dur"] for e in self.events), default=0.0) / 1e6
+
+    def totals(self) -> dict:
+        """name -> (seconds, count), in order of first start."""
+        totals = {}
+        for event in sorted(self.events, key=lambda e: e["ts"]):
+            seconds, count = totals.get(event["name"], (0.0, 0))
+            totals[event["name"]] = (seconds + event["dur"] / 1e6, count + 1)
+        return totals
+
+    def summary(self) -> str:
+        parts = []
+        for name, (seconds, count) in self.totals().items():
+            parts.append(f"{name} {seconds:.2f}s" + (f" ×{count}" if count > 1 else ""))
+        return f"{' | '.join(parts)} — wall {self.wall:.2f}s"
+
+    def to_dict(self) -> dict:
+        pid = os.getpid()
+        meta = [{"name": "process_name", "ph": "M", "pid": pid, "args": {"name": "smartrun"}}]
+        meta += [
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+            for tid, name in self.threads.items()
+        ]
+        return {"traceEvents": meta + self.events, "displayTimeUnit": "ms"}
+
+    def write(self, path: Union[str, Path]) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.to_dict()), encoding="utf-8")
+        return path
+
+
+_tracer: Optional[Tracer] = None
+
+
+def trace_file(path: Optional[str] = None) -> Optional[str]:
+    return path or os.getenv(TRACE_ENV_VAR) or None
+
+
+def start_trace() -> Tracer:
+    global _tracer
+    _tracer = Tracer()
+    return _tracer
+
+
+def stop_trace() -> Optional[Tracer]:
+    global _tracer
+    tracer, _tracer = _tracer, None
+    return tracer
+
+
+def span(name: str, cat: str = "smartrun", **args):
+    """Context manager timing a block as span *name*; no-op when not tracing."""
+    tracer = _tracer
+    if tracer is None:
+        return _NO_SPAN
+    return tracer.span(name, cat, **args)
+
+
+@contextmanager
+def tracing(path: Optional[str]):
+    """Record spans while the block runs, then write them to *path* and print the summary."""
+    if not path:
+        yield None
+        return
+    from rich import print
+
+    tracer = start_trace()
+    try:
+        with tracer.span("smartrun", "cli"):
+            yield tracer
+    finally:
+        stop_trace()
+        tracer.write(path)
+        print(f"[dim]{tracer.summary()}[/dim]")
+        print(f"trace: {path}")
+
+
+def traced(name: str, cat: str = "smartrun"):
+    """Decorator: every call of the function is a span *name*."""
+
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _tracer is None:
+                return fn(*args, **kwargs)
+            with _tracer.span(name, cat):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
@@ -1,14 +1,19 @@
 # smartrun/utils.py
-import importlib.util
 import sys
 import json
+import hashlib
 import os
 from pathlib import Path
 import subprocess
 from datetime import datetime
 from rich import print
-import re
 from .options import Options
+from .module_index import (
+    EnvModuleIndex,
+    get_local_module_index,
+    get_target_module_index,
+    is_stdlib_name,
+)
 
 SMART_FOLDER = Path(".smartrun")
 from pathlib import Path
@@ -22,6 +27,7 @@ def get_problematic_module_names(
     check_stdlib: bool = True,
     check_installed: bool = True,
     exclude_patterns: Set[str] = None,
+    env_index: EnvModuleIndex = None,
 ) -> List[str]:
     """
     Identify local Python files/folders that could cause import conflicts.
@@ -34,6 +40,8 @@ def get_problematic_module_names(
         check_installed: Whether to check against installed packages
         exclude_patterns: Set of patterns to exclude from conflict checking
                          (e.g., {'__pycache__', '.git', 'venv'})
+        env_index: Module index of the target environment; built from the
+                   active env (or .venv) when not given
     Returns:
         List of local module names that could cause import conflicts
     Example:
@@ -41,18 +49,6 @@ def get_problematic_module_names(
         >>> if problematic:
         ...     print(f"Warning: These local modules may shadow imports: {problematic}")
     """
-    if exclude_patterns is None:
-        exclude_patterns = {
-            "__pycache__",
-            ".git",
-            ".venv",
-            "venv",
-            "env",
-            ".pytest_cache",
-            "node_modules",
-            ".idea",
-            ".vscode",
-        }
     # Determine the folder to scan
     try:
         if hasattr(path_or_opts, "script"):
@@ -67,29 +63,12 @@ def get_problematic_module_names(
         raise ValueError(f"Invalid path or options object: {e}")
     if not folder.exists():
         raise FileNotFoundError(f"Directory does not exist: {folder}")
-    # Get local Python modules
-    local_modules = set()
-    try:
-        for item in folder.iterdir():
-            if item.name.startswith(".") or item.name in exclude_patterns:
-                continue
-            # Python files (excluding __init__.py in some contexts)
-            if item.is_file() and item.suffix == ".py":
-                module_name = item.stem
-                if module_name != "__init__":  # Usually not imported directly
-                    local_modules.add(module_name)
-            # Python packages (directories with __init__.py)
-            elif item.is_dir():
-                if (item / "__init__.py").exists():
-                    local_modules.add(item.name)
-                # Also check directories that could be imported as namespace packages
-                elif any(
-                    child.suffix == ".py" for child in item.iterdir() if child.is_file()
-                ):
-                    local_modules.add(item.name)
-    except PermissionError:
-        print(f"Warning: Permission denied accessing some files in {folder}")
+    # Get local Python modules (shared with Scan through the index cache)
+    local_modules = get_local_module_index(folder, exclude_patterns).names
     # Find potential conflicts
+    if check_installed and env_index is None:
+        opts = path_or_opts if hasattr(path_or_opts, "script") else None
+        env_index = get_target_module_index(opts)
     problematic_modules = []
     for module in local_modules:
         conflicts = []
@@ -97,7 +76,7 @@ def get_problematic_module_names(
         if check_stdlib and _is_stdlib_module(module):
             conflicts.append("stdlib")
         # Check against installed packages
-        if check_installed and _is_installed_module(module):
+        if check_installed and _is_installed_module(module, env_index):
             conflicts.append("installed")
         if conflicts:
             problematic_modules.append(
@@ -108,30 +87,14 @@ def get_problematic_module_names(
 
 def _is_stdlib_module(module_name: str) -> bool:
     """Check if module name conflicts with standard library."""
-    try:
-        # Try importing - if it works and is in stdlib, it's a conflict
-        import importlib.util
-
-        spec = importlib.util.find_spec(module_name)
-        if spec and spec.origin:
-            # Check if it's in the standard library path
-            stdlib_path = Path(sys.executable).parent.parent / "lib"
-            return str(stdlib_path) in spec.origin
-        return False
-    except (ImportError, ModuleNotFoundError, AttributeError):
-        return False
+    return is_stdlib_name(module_name)
 
 
-def _is_installed_module(module_name: str) -> bool:
+def _is_installed_module(module_name: str, env_index: EnvModuleIndex = None) -> bool:
     """Check if module name conflicts with installed packages."""
-    try:
-        # Check if module can be found in installed packages
-        import importlib.util
-
-        spec = importlib.util.find_spec(module_name)
-        return spec is not None
-    except (ImportError, ModuleNotFoundError):
-        return False
+    if env_index is None:
+        env_index = get_target_module_index()
+    return env_index.is_installed(module_name)
 
 
 def print_conflict_report(problematic_modules: List[dict], folder: Path = None) -> None:
@@ -174,18 +137,10 @@ def create_dir(dir: Path):
 
 
 def extract_imports_from_ipynb(ipynb_path) -> str:
-    ipynb_path = Path(ipynb_path)
-    with ipynb_path.open("r", encoding="utf-8") as f:
-        notebook = json.load(f)
-    imports = []
-    for cell in notebook.get("cells", []):
-        if cell.get("cell_type") != "code":
-            continue
-        for line in cell.get("source", []):
-            stripped = line.strip()
-            if re.match(r"^(import\s+\w|from\s+\w)", stripped):
-                imports.append(stripped)
-    return "\n".join(imports)
+    """Import statements of all code cells, one per line."""
+    from .nb.nb_scan import scan_notebook
+
+    return scan_notebook(ipynb_path).as_source()
 
 
 def in_pytest() -> bool:
@@ -223,31 +178,32 @@ def get_input(msg: str = "?") -> str:
     return input(msg)
 
 
-def name_format_json(script_path: str) -> str:
+def name_format_json(script_path: str, by_path: bool = False) -> str:
+    """
+    .smartrun/smartrun-<stem>.lock.json; with *by_path* the stem is followed
+    by a hash of the resolved path, so a/main.py and b/main.py differ.
+    """
     create_dir(SMART_FOLDER)
     stem = Path(script_path).stem
+    if by_path:
+        resolved = str(Path(script_path).resolve())
+        stem = f"{stem}-{hashlib.sha256(resolved.encode()).hexdigest()[:8]}"
     return SMART_FOLDER / f"smartrun-{stem}.lock.json"
 
 
-def get_packages_uv(venv_path: str):  # TODO
-    python_path = get_bin_path(venv_path, "python")
-    cmd = ["uv", "pip", "freeze", "--python", str(python_path)]
-    if is_verbose():
-        print("venv_path:", venv_path)
-        print("cmd:", " ".join(cmd))
+def find_uv():
+    """uv on PATH, else the binary shipped with the `uv` package, else None."""
+    import shutil
+
+    found = shutil.which("uv")
+    if found:
+        return found
     try:
-        result = subprocess.run(
-            cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            check=True,
-        )
-    except subprocess.CalledProcessError as e:
-        print("[red]❌ Failed to freeze packages using uv[/red]")
-        print(e.stderr)
-        return
-    return result
+        from uv import find_uv_bin
+
+        return find_uv_bin()
+    except (ImportError, FileNotFoundError):
+        return None
 
 
 # ---------------------------------------------------------------------------#
@@ -257,30 +213,37 @@ import subprocess
 from pathlib import Path
 
 
-def _ensure_pip(python_path: Path) -> bool:
+def has_pip(python_path: Path) -> bool:
+    result = subprocess.run(
+        [str(python_path), "-m", "pip", "--version"],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        check=False,
+    )
+    return result.returncode == 0
+
+
+def _ensure_pip(python_path: Path, upgrade: bool = False) -> bool:
     """
     Guarantee that `pip` is available in the given Python environment.
-    If `pip` is missing, attempts to install it via `ensurepip`, and then upgrades pip,
-    setuptools, and wheel.
+    Environments are created without pip (see runner_helpers.create_venv),
+    so it is seeded here, with `ensurepip`, only when the pip fallback is
+    actually used. upgrade=True also upgrades pip, setuptools and wheel
+    from the index, which costs a network round trip.
     Returns:
         bool: True if pip is available or was successfully installed; False otherwise.
     """
-    pip_check_cmd = [str(python_path), "-m", "pip", "--version"]
     if is_verbose():
-        print("🧪 Checking pip availability with:", " ".join(pip_check_cmd))
+        print("🧪 Checking pip availability in", python_path)
     try:
-        subprocess.run(
-            pip_check_cmd,
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL,
-            check=False,  # Don't raise exception; we check manually
-        )
-        return True
-    except Exception as e:
-        if is_verbose():
-            print("🔍 pip not available. Attempting to install using ensurepip...")
+        if has_pip(python_path) and not upgrade:
+            return True
+    except OSError:
+        return False
+    if is_verbose():
+        print("🔍 pip not available. Attempting to install using ensurepip...")
     # Try to bootstrap pip using ensurepip
-    ensurepip_cmd = [str(python_path), "-m", "ensurepip", "--upgrade"]
+    ensurepip_cmd = [str(python_path), "-m", "ensurepip", "--default-pip"]
     upgrade_pip_cmd = [
         str(python_path),
         "-m",
@@ -300,13 +263,14 @@ def _ensure_pip(python_path: Path) -> bool:
             stderr=subprocess.DEVNULL,
             check=False,
         )
-        subprocess.run(
-            upgrade_pip_cmd,
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL,
-            check=False,
-        )
-        return True
+        if upgrade:
+            subprocess.run(
+                upgrade_pip_cmd,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                check=False,
+            )
+        return has_pip(python_path)
     except Exception:
         if is_verbose():
             import traceback
@@ -396,15 +360,26 @@ def get_packages_pip(venv_path: Path) -> dict[str, str]:
     return get_packages_pip_direct_helper(pip_path)
 
 
-def get_packages_uv_or_pip(venv_path: Path):
-    packages = get_packages_uv(venv_path)
-    if packages:
-        return packages
-    return get_packages_pip(venv_path)
+def get_packages_native(venv_path: Path) -> dict[str, str]:
+    """
+    {name: version} of every distribution in *venv_path*, read from its
+    site-packages metadata in-process; the same mapping `pip list` gives,
+    without starting (or modifying) the environment.
+    """
+    from smartrun.dist_info import iter_dists
+    from smartrun.module_index import site_packages_dirs
+
+    packages, seen = {}, set()
+    for site_dir in site_packages_dirs(venv_path):
+        for dist in iter_dists(site_dir):
+            if dist.key not in seen:  # first site dir wins, as on sys.path
+                seen.add(dist.key)
+                packages[dist.name] = dist.version
+    return packages
 
 
-def write_lockfile_helper(script_path: str, venv_path: Path) -> None:
-    packages: dict[str, str] = get_packages_uv_or_pip(venv_path)
+def write_lockfile_helper(script_path: str, venv_path: Path, by_path: bool = False) -> None:
+    packages: dict[str, str] = get_packages_native(venv_path)
     if not packages:
         return
     lock_data = {
@@ -414,24 +389,25 @@ def write_lockfile_helper(script_path: str, venv_path: Path) -> None:
         "timestamp": datetime.now().isoformat() + "Z",
     }
     create_dir(SMART_FOLDER)
-    json_file_name = name_format_json(script_path)
+    json_file_name = name_format_json(script_path, by_path)
     with open(json_file_name, "w") as f:
         json.dump(lock_data, f, indent=2)
     print(f"[green]📄 Created {json_file_name} with resolved package versions[/green]")
 
 
-def write_lockfile(script_path: str, venv_path: Path) -> None:
+def write_lockfile(script_path: str, venv_path: Path, by_path: bool = False) -> None:
+    from smartrun.trace import span
+
     try:
-        write_lockfile_helper(script_path, venv_path)
+        with span("write_lockfile", "lockfile", script=script_path):
+            write_lockfile_helper(script_path, venv_path, by_path)
     except Exception:
         ...
 
 
 def is_stdlib(module_name: str) -> bool:
-    spec = importlib.util.find_spec(module_name)
-    if spec is None or spec.origin is None:
-        return False
-    return "site-packages" not in spec.origin
+    """Static lookup in sys.stdlib_module_names; never imports *module_name*."""
+    return is_stdlib_name(module_name)
 
 
 def is_venv_active() -> bool:
@@ -0,0 +1,233 @@
+"""
+Offline wheelhouse bundles.
+`smartrun bundle <script|lock>` downloads every distribution of a lock
+into one directory and writes a manifest next to it; installing with
+`--wheelhouse DIR` then passes --no-index --find-links DIR to uv / pip, so
+no index is contacted and the same files are installed every time.
+"""
+
+import hashlib
+import json
+import os
+import sys
+import sysconfig
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Union
+
+from smartrun.dist_info import canonical_name
+from smartrun.streaming import install_timeout, print_event, run_streaming
+
+MANIFEST_NAME = "wheelhouse.json"
+WHEELHOUSE_ENV_VAR = "SMARTRUN_WHEELHOUSE"
+DIST_SUFFIXES = (".whl", ".tar.gz", ".zip")
+
+
+class WheelhouseError(Exception): ...
+
+
+@dataclass
+class Wheelhouse:
+    path: Path
+    requirements: list = field(default_factory=list)  # pins, name==version
+    files: dict = field(default_factory=dict)  # file name -> sha256
+    missing: list = field(default_factory=list)  # pins that could not be fetched
+    source: str = ""
+    python: str = f"{sys.version_info[0]}.{sys.version_info[1]}"
+    platform: str = sysconfig.get_platform()
+    created: str = ""
+
+    @property
+    def ok(self) -> bool:
+        return not self.missing
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data.pop("path")
+        return data
+
+
+def wheelhouse_dir(path: Optional[Union[str, Path]] = None) -> Optional[Path]:
+    """*path*, else $SMARTRUN_WHEELHOUSE, else None (use the index)."""
+    path = path or os.getenv(WHEELHOUSE_ENV_VAR)
+    return Path(path).expanduser() if path else None
+
+
+def offline_args(wheelhouse: Optional[Union[str, Path]]) -> list:
+    """uv / pip install arguments that install from *wheelhouse* only."""
+    if not wheelhouse:
+        return []
+    wheelhouse = Path(wheelhouse)
+    if not wheelhouse.is_dir():
+        raise WheelhouseError(f"Wheelhouse not found: {wheelhouse}")
+    return ["--no-index", "--find-links", str(wheelhouse.resolve())]
+
+
+def install_source_args(opts) -> list:
+    """Offline args for opts.wheelhouse, else --find-links for prefetched wheels."""
+    wheelhouse = wheelhouse_dir(opts.wheelhouse)
+    if wheelhouse:
+        return offline_args(wheelhouse)
+    return ["--find-links", str(opts.find_links)] if opts.find_links else []
+
+
+def sha256_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def dist_file_pin(file_name: str) -> Optional[str]:
+    """'Jinja2-3.1.6-py3-none-any.whl' -> 'jinja2==3.1.6'"""
+    for suffix in DIST_SUFFIXES:
+        if file_name.endswith(suffix):
+            stem = file_name[: -len(suffix)]
+            break
+    else:
+        return None
+    if suffix == ".whl":
+        parts = stem.split("-")
+        return f"{canonical_name(parts[0])}=={parts[1]}" if len(parts) >= 5 else None
+    name, sep, version = stem.rpartition("-")
+    return f"{canonical_name(name)}=={version}" if sep else None
+
+
+def dist_files(path: Path) -> list:
+    return sorted(p for p in Path(path).iterdir() if p.name.endswith(DIST_SUFFIXES))
+
+
+def read_lock(path: Union[str, Path]) -> dict:
+    """{name: version} from a .json / .yaml lock or a pip-freeze .txt."""
+    path = Path(path)
+    if path.suffix == ".json":
+        return dict(json.loads(path.read_text(encoding="utf-8")).get("resolved_packages", {}))
+    if path.suffix in {".yaml", ".yml"}:
+        from smartrun.installers.from_yaml import SmartRunYAMLHandler
+
+        handler = SmartRunYAMLHandler()
+        return dict(handler._extract_packages_from_yaml(handler.load_yaml_environment(path)))
+    packages = {}
+    for line in path.read_text(encoding="utf-8").splitlines():
+        line = line.split("#", 1)[0].strip()
+        if "==" in line and " @ " not in line:
+            name, version = line.split("==", 1)
+            packages[name.strip()] = version.strip()
+    return packages
+
+
+def download_requirements(
+    requirements: list,
+    dest: Path,
+    python=sys.executable,
+    on_event=print_event,
+    timeout: Optional[float] = None,
+) -> bool:
+    """One `pip download` (with dependencies) for unpinned requirements."""
+    cmd = [str(python), "-m", "pip", "download", "-d", str(dest), *requirements]
+    return run_streaming(cmd, on_event=on_event, timeout=install_timeout(timeout)).ok
+
+
+def build_wheelhouse(
+    dest: Union[str, Path],
+    pins: Optional[dict] = None,
+    requirements: Optional[list] = None,
+    source: str = "",
+    python=sys.executable,
+    timeout: Optional[float] = None,
+) -> Wheelhouse:
+    """
+    Download *pins* ({name: version}, a complete lock: fetched in parallel
+    without dependencies) or *requirements* (resolved by pip, dependencies
+    included) into *dest* and write its manifest. *timeout* applies to
+    each pip call.
+    """
+    from smartrun.installers.from_json_fast import pins as pin_specs
+    from smartrun.installers.from_json_fast import prefetch_wheels
+
+    dest = Path(dest)
+    dest.mkdir(parents=True, exist_ok=True)
+    missing = []
+    if pins:
+        specs = pin_specs(pins)
+        missing = prefetch_wheels(specs, dest, python, timeout=timeout)
+        # no wheel for this platform: keep the sdist, pip can build it offline
+        missing = [s for s in missing if not _download_sdist(s, dest, python, timeout)]
+    elif requirements and not download_requirements(
+        requirements, dest, python, timeout=timeout
+    ):
+        missing = list(requirements)
+    files = {p.name: sha256_file(p) for p in dist_files(dest)}
+    house = Wheelhouse(
+        dest,
+        requirements=sorted(filter(None, map(dist_file_pin, files))),
+        files=files,
+        missing=missing,
+        source=str(source),
+        created=datetime.now().isoformat(),
+    )
+    write_manifest(house)
+    return house
+
+
+def _download_sdist(spec: str, dest: Path, python, timeout: Optional[float] = None) -> bool:
+    cmd = [str(python), "-m", "pip", "download", "--no-deps", "-q", "-d", str(dest), spec]
+    return run_streaming(cmd, timeout=install_timeout(timeout)).ok
+
+
+def write_manifest(house: Wheelhouse) -> Path:
+    path = house.path / MANIFEST_NAME
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(house.to_dict(), indent=2))
+    os.replace(tmp, path)
+    return path
+
+
+def load_wheelhouse(path: Union[str, Path]) -> Wheelhouse:
+    path = Path(path)
+    try:
+        data = json.loads((path / MANIFEST_NAME).read_text())
+    except (OSError, ValueError) as e:
+        raise WheelhouseError(f"No readable {MANIFEST_NAME} in {path}") from e
+    return Wheelhouse(path, **data)
+
+
+def verify_wheelhouse(path: Union[str, Path]) -> list:
+    """Files of the manifest that are missing or whose hash changed."""
+    house = load_wheelhouse(path)
+    bad = []
+    for name, digest in house.files.items():
+        file = house.path / name
+        if not file.is_file() or sha256_file(file) != digest:
+            bad.append(name)
+    return bad
+
+
+def bundle(target: Union[str, Path], dest: Union[str, Path], opts=None) -> Wheelhouse:
+    """
+    Wheelhouse for a lock file, or for a script: its lock in .smartrun when
+    one exists (`smartrun script.py` and run-many write it), else its
+    scanned imports.
+    """
+    target = Path(target)
+    if not target.exists():
+        raise WheelhouseError(f"File not found: {target}")
+    timeout = getattr(opts, "install_timeout", None)
+    if target.suffix in {".json", ".txt", ".yaml", ".yml"}:
+        return build_wheelhouse(dest, pins=read_lock(target), source=target, timeout=timeout)
+    from smartrun.utils import name_format_json
+
+    # `smartrun script.py` names the lock by stem, run-many by path: the newer one
+    locks = [Path(name_format_json(str(target), by_path)) for by_path in (True, False)]
+    locks = [lock for lock in locks if lock.exists()]
+    if locks:
+        lock = max(locks, key=lambda p: p.stat().st_mtime_ns)
+        return build_wheelhouse(dest, pins=read_lock(lock), source=lock, timeout=timeout)
+    from smartrun.options import Options
+    from smartrun.scan_imports import scan_imports_file
+
+    packages = scan_imports_file(target, opts=opts or Options(target))
+    requirements = [str(p) for p in packages]
+    return build_wheelhouse(dest, requirements=requirements, source=target, timeout=timeout)